@@ -0,0 +1,6 @@
+"""Benchmarks for the ESPHome Designer integration.
+
+They live outside custom_components/esphome_designer so they are not
+installed with the integration. Run them from the repository root, e.g.
+``python -m benchmarks.bench_models``.
+"""
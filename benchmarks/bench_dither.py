@@ -0,0 +1,48 @@
+"""
+Benchmark for the dithering stage (dither.py).
+
+Times every dither mode for the gray and colour palettes on a rendered
+synthetic page (the common case: mostly flat with anti-aliased text) and on
+a full-frame gradient (the worst case for error diffusion), against Pillow's
+convert("1") as the baseline.
+
+Run from the repository root (needs the integration's requirements):
+    python -m benchmarks.bench_dither [widgets]
+"""
+
+from __future__ import annotations
+
+import sys
+
+from PIL import Image
+
+from benchmarks.bench_renderer import StubHass, _best_of, build_page
+from custom_components.esphome_designer.dither import DITHER_MODES, PALETTES, dither_image
+from custom_components.esphome_designer.renderer import render_page_image
+
+BENCH_PALETTES = ("bw", "gray4", "bwry", "acep7")
+
+
+def _report(name: str, image: Image.Image) -> None:
+    print(f"{name} ({image.width}x{image.height} {image.mode})")
+    t_base = _best_of(lambda: image.convert("1"), repeat=3)
+    print(f"  {'PIL convert(1)':<28}: {t_base * 1000:8.2f} ms")
+    for palette in BENCH_PALETTES:
+        for mode in DITHER_MODES:
+            result = dither_image(image, mode, palette)
+            assert max(result.tobytes()) < len(PALETTES[palette]), "index outside the palette"
+            t_mode = _best_of(lambda: dither_image(image, mode, palette), repeat=3)
+            print(f"  {mode + ' / ' + palette:<28}: {t_mode * 1000:8.2f} ms  ({t_mode / t_base:.1f}x baseline)")
+
+
+def main(widget_count: int = 100) -> None:
+    device, page, entity_ids = build_page(widget_count)
+    hass = StubHass({entity_id: 20.5 for entity_id in entity_ids})
+    rendered = render_page_image(hass, device, page)
+
+    _report(f"rendered page, {widget_count} widgets", rendered)
+    _report("gradient", Image.linear_gradient("L").resize(rendered.size))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,176 @@
+"""
+Microbenchmark for layout model (de)serialization.
+
+Builds a synthetic layout and times DeviceConfig.to_dict()/from_dict()
+against a dataclasses.asdict() based reference, checking that both produce
+byte-identical JSON. Also reports the memory retained by a loaded
+multi-layout state (tracemalloc) and the cost of loading stored layouts at
+startup, eagerly versus with LazyDeviceMap.
+
+Run from the repository root (needs the integration's requirements):
+    python -m benchmarks.bench_models [widgets]
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+
+from custom_components.esphome_designer.models import DeviceConfig, LazyDeviceMap, PageConfig, WidgetConfig
+
+WIDGETS_PER_PAGE = 200
+
+
+def build_layout(widget_count: int = 2000) -> DeviceConfig:
+    """Return a DeviceConfig with widget_count widgets spread over pages."""
+    page_count = max(1, (widget_count + WIDGETS_PER_PAGE - 1) // WIDGETS_PER_PAGE)
+    pages = []
+    n = 0
+    for p in range(page_count):
+        widgets = []
+        while n < widget_count and len(widgets) < WIDGETS_PER_PAGE:
+            kind = ("label", "sensor_text", "shape_rect", "icon")[n % 4]
+            widgets.append(
+                WidgetConfig(
+                    id=f"w_{n}",
+                    type=kind,
+                    x=(n * 7) % 780,
+                    y=(n * 13) % 460,
+                    width=120,
+                    height=40,
+                    entity_id=f"sensor.bench_{n % 50}" if kind == "sensor_text" else None,
+                    title=f"Widget {n}",
+                    props={
+                        "text": f"Value {n}",
+                        "font_size": 14 + n % 10,
+                        "font_family": "Roboto",
+                        "color": "black",
+                        "invert": False,
+                        "opacity": 100,
+                        "points": [[n % 10, n % 20], [n % 30, n % 40]],
+                        "style": {"border_width": 1, "radius": 4},
+                    },
+                )
+            )
+            n += 1
+        pages.append(PageConfig(id=f"page_{p}", name=f"Page {p + 1}", widgets=widgets))
+    cfg = DeviceConfig(device_id="bench", api_token="token", pages=pages)
+    cfg.ensure_pages()
+    return cfg
+
+
+def reference_to_dict(cfg: DeviceConfig) -> dict:
+    """Serialize the way the models did before the hand-written to_dict()."""
+    cfg.ensure_pages()
+    data = cfg.to_dict()
+    data["pages"] = []
+    for page in cfg.pages:
+        page_data = {
+            "id": page.id,
+            "name": page.name,
+            "widgets": [asdict(w) for w in page.widgets],
+        }
+        if page.refresh_s is not None:
+            page_data["refresh_s"] = page.refresh_s
+        if page.dark_mode is not None:
+            page_data["dark_mode"] = page.dark_mode
+        data["pages"].append(page_data)
+    return data
+
+
+def _best_of(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_memory(layouts: int = 8, widgets_per_layout: int = 400) -> int:
+    """Bytes retained by `layouts` DeviceConfigs loaded from stored JSON."""
+    stored = _stored_layouts(layouts, widgets_per_layout)
+
+    gc.collect()
+    tracemalloc.start()
+    devices = {
+        f"bench_{i}": DeviceConfig.from_dict(json.loads(raw))
+        for i, raw in enumerate(stored)
+    }
+    gc.collect()
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del devices
+    return retained
+
+
+def _stored_layouts(layouts: int, widgets_per_layout: int) -> list:
+    stored = []
+    for i in range(layouts):
+        data = build_layout(widgets_per_layout).to_dict()
+        data["device_id"] = f"bench_{i}"
+        stored.append(json.dumps(data))
+    return stored
+
+
+def measure_startup(layouts: int = 20, widgets_per_layout: int = 400) -> tuple:
+    """(eager, lazy, first access) seconds to load `layouts` stored shards."""
+    stored = _stored_layouts(layouts, widgets_per_layout)
+
+    def eager():
+        return {f"bench_{i}": DeviceConfig.from_dict(json.loads(raw)) for i, raw in enumerate(stored)}
+
+    def lazy():
+        devices = LazyDeviceMap()
+        for i, raw in enumerate(stored):
+            devices.add_raw(f"bench_{i}", json.loads(raw))
+        return devices
+
+    t_eager = _best_of(eager)
+    t_lazy = _best_of(lazy)
+    maps = iter([lazy() for _ in range(5)])
+    t_first = _best_of(lambda: next(maps)["bench_0"])
+    return t_eager, t_lazy, t_first
+
+
+def main(widget_count: int = 2000) -> None:
+    cfg = build_layout(widget_count)
+
+    fast = json.dumps(cfg.to_dict())
+    ref = json.dumps(reference_to_dict(cfg))
+    assert fast == ref, "to_dict() output differs from the asdict() reference"
+    print(f"✓ to_dict() output identical to asdict() reference ({len(fast)} bytes)")
+
+    raw = cfg.to_dict()
+    assert DeviceConfig.from_dict(raw).to_dict() == raw
+    print("✓ from_dict() round-trip verified")
+
+    t_ref = _best_of(lambda: reference_to_dict(cfg))
+    t_fast = _best_of(cfg.to_dict)
+    t_load = _best_of(lambda: DeviceConfig.from_dict(raw))
+
+    print(f"{widget_count} widgets on {len(cfg.pages)} pages")
+    print(f"  asdict() reference : {t_ref * 1000:8.2f} ms")
+    print(f"  to_dict()          : {t_fast * 1000:8.2f} ms  ({t_ref / t_fast:.1f}x)")
+    print(f"  from_dict()        : {t_load * 1000:8.2f} ms")
+
+    layouts, per_layout = 8, 400
+    retained = measure_memory(layouts, per_layout)
+    print(f"{layouts} layouts x {per_layout} widgets loaded")
+    print(f"  retained memory    : {retained / 1024:8.0f} KiB"
+          f"  ({retained / (layouts * per_layout):.0f} B/widget)")
+
+    layouts = 20
+    t_eager, t_lazy, t_first = measure_startup(layouts, per_layout)
+    print(f"startup with {layouts} stored layouts x {per_layout} widgets")
+    print(f"  eager from_dict()  : {t_eager * 1000:8.2f} ms")
+    print(f"  lazy (raw dicts)   : {t_lazy * 1000:8.2f} ms")
+    print(f"  first access       : {t_first * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
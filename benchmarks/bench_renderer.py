@@ -0,0 +1,356 @@
+"""
+Benchmark and visual-regression check for the server-side renderer.
+
+Builds synthetic pages of increasing size (10 / 100 / 1000 widgets) cycling
+through the registered widget types, renders them against stubbed entity
+states and a frozen clock, and reports:
+
+- draw time per widget type,
+- per page: full redraw vs. cached static layer (renderer.render_page_image),
+  for the mixed page and for a mostly static one (labels, every tenth widget
+  a sensor), PNG encode time and size with optimize on and off, and peak memory
+  (Python allocations via tracemalloc; Pillow's image buffers are not
+  traced, so the process peak RSS is printed as well),
+- golden-image comparison: a hash of every rendered page (light and dark)
+  against bench_renderer_golden.json, so renderer speed work cannot change
+  the output unnoticed. Layered renders must also match a full redraw.
+  tests/test_renderer_golden.py runs the same comparison in the test suite.
+
+Text rendering depends on Pillow/FreeType and the fonts found, and qr_code
+on the qrcode package (drawn as a placeholder without it); the golden file records that environment
+and a mismatching environment is reported before the comparison.
+
+Run from the repository root (needs the integration's requirements):
+    python -m benchmarks.bench_renderer [--counts 10,100,1000]
+        [--update-golden] [--save DIR]
+
+Exits non-zero if a page differs from its golden hash.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from unittest.mock import patch
+
+from PIL import Image, ImageDraw, features
+
+from homeassistant.core import State
+from homeassistant.util import dt as dt_util
+
+from custom_components.esphome_designer.layers import STATIC_LAYER_CACHE
+from custom_components.esphome_designer.models import DeviceConfig, PageConfig, WidgetConfig
+from custom_components.esphome_designer.renderer import (
+    RenderContext,
+    WIDGET_RENDERERS,
+    _draw_widget,
+    render_page_image,
+)
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "bench_renderer_golden.json")
+
+# Rendered "now" for clock and datetime widgets.
+FROZEN_NOW = datetime(2024, 5, 17, 9, 41, tzinfo=dt_util.UTC)
+
+
+class _StubStates:
+    def __init__(self, states: dict) -> None:
+        self._states = states
+
+    def get(self, entity_id: str):
+        return self._states.get(entity_id)
+
+
+class StubHass:
+    """Just enough of HomeAssistant for the renderer: hass.states.get().
+
+    values maps entity ids to a state (shown with unit °C) or to a
+    (state, attributes) tuple.
+    """
+
+    def __init__(self, values: dict) -> None:
+        states = {}
+        for entity_id, value in values.items():
+            state, attributes = value if isinstance(value, tuple) else (value, {"unit_of_measurement": "°C"})
+            states[entity_id] = State(entity_id, str(state), attributes)
+        self.states = _StubStates(states)
+
+
+def build_page(widget_count: int = 100, dynamic_every: int = 10) -> tuple:
+    """(device, page, entity ids): labels, with every Nth widget a sensor."""
+    widgets = []
+    entity_ids = []
+    for n in range(widget_count):
+        x, y = (n % 8) * 100, (n // 8) * 40 % 480
+        if n % dynamic_every == 0:
+            entity_id = f"sensor.bench_{n}"
+            entity_ids.append(entity_id)
+            widgets.append(
+                WidgetConfig(id=f"w_{n}", type="sensor", x=x, y=y, width=96, height=36, entity_id=entity_id,
+                             props={"font_size": 14})
+            )
+        else:
+            widgets.append(
+                WidgetConfig(id=f"w_{n}", type="label", x=x, y=y, width=96, height=36,
+                             props={"text": f"Label {n}", "font_size": 12 + n % 6})
+            )
+    page = PageConfig(id="page_0", name="Bench", widgets=widgets)
+    device = DeviceConfig(device_id="bench", api_token="token", pages=[page])
+    device.ensure_pages()
+    return device, page, entity_ids
+
+
+# (type, entity state or None, props) for the mixed pages, one per registered type.
+_MIXED_WIDGETS = (
+    ("label", None, {"text": "Living room", "font_size": 16, "text_align": "CENTER"}),
+    ("sensor", "21.5", {"font_size": 18}),
+    ("shape_rect", None, {"fill": False, "border_width": 2}),
+    ("line", None, {"stroke_width": 2}),
+    ("progress_bar", ("64", {}), {"show_label": True}),
+    ("icon", None, {"code": "F07D0", "size": 28}),
+    ("rounded_rect", None, {"fill": True, "color": "gray", "radius": 8}),
+    ("battery_icon", ("76", {"unit_of_measurement": "%"}), {"size": 28}),
+    ("datetime", None, {"format": "time_date"}),
+    ("shape_circle", None, {"fill": True, "color": "black"}),
+    ("weather_icon", ("partlycloudy", {}), {"size": 32}),
+    ("list", ("Milk\nEggs\nBread", {}), {"font_size": 12}),
+    ("clock", None, {"time_font_size": 20, "date_font_size": 12}),
+    ("qr_code", None, {"value": "https://www.home-assistant.io", "scale": 2}),
+    ("sensor_text", ("Dry", {}), {"font_size": 14}),
+    ("text", None, {"text": "Kitchen", "font_size": 14, "color": "red"}),
+)
+
+
+def _mixed_widget(n: int, template: tuple, x: int, y: int, values: dict) -> WidgetConfig:
+    wtype, state, props = template
+    entity_id = None
+    if state is not None:
+        entity_id = f"sensor.bench_{wtype}_{n}"
+        values[entity_id] = state
+    height = 4 if wtype == "line" else 44
+    return WidgetConfig(id=f"w_{n}", type=wtype, x=x, y=y, width=96, height=height, entity_id=entity_id,
+                        props=dict(props))
+
+
+def build_mixed_page(widget_count: int, dark: bool = False) -> tuple:
+    """(device, page, state values) with widget types cycling through _MIXED_WIDGETS."""
+    values: dict = {}
+    widgets = []
+    for n in range(widget_count):
+        template = _MIXED_WIDGETS[n % len(_MIXED_WIDGETS)]
+        # 8 x 10 grid, wrapping onto itself beyond 80 widgets.
+        x, y = (n % 8) * 100 + (n // 80) % 4, (n // 8) % 10 * 48
+        widgets.append(_mixed_widget(n, template, x, y, values))
+    page = PageConfig(id="page_0", name="Bench", widgets=widgets, dark_mode="dark" if dark else "light")
+    device = DeviceConfig(device_id=f"bench_{widget_count}", api_token="token", pages=[page])
+    device.ensure_pages()
+    return device, page, values
+
+
+def _best_of(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def environment() -> dict:
+    """Versions the golden hashes depend on."""
+    try:
+        import qrcode  # noqa: F401
+    except ImportError:
+        has_qrcode = False
+    else:
+        has_qrcode = True
+    return {
+        "pillow": Image.__version__,
+        "freetype": features.version("freetype2"),
+        "qrcode": has_qrcode,
+    }
+
+
+def load_golden() -> dict:
+    """The golden file: {"environment": ..., "pages": {name: hash}}, or {} if missing."""
+    if not os.path.exists(GOLDEN_FILE):
+        return {}
+    with open(GOLDEN_FILE, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _image_hash(image: Image.Image) -> str:
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _encode(image: Image.Image, optimize: bool) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=optimize)
+    return output.getvalue()
+
+
+def bench_widget_types(per_type: int = 50) -> None:
+    """Print the draw time per widget for every registered type."""
+    print(f"Draw time per widget type ({per_type} widgets each, best of 5):")
+    for template in _MIXED_WIDGETS:
+        if template[0] not in WIDGET_RENDERERS:
+            continue
+        values: dict = {}
+        widgets = [_mixed_widget(n, template, (n % 8) * 100, (n // 8) * 48, values) for n in range(per_type)]
+        hass = StubHass(values)
+        device = DeviceConfig(device_id="bench_types", api_token="token")
+        ctx = RenderContext(hass, device, False)
+        image = Image.new("L", (800, 480), 255)
+        draw = ImageDraw.Draw(image)
+
+        def draw_all() -> None:
+            for w_cfg in widgets:
+                _draw_widget(ctx, draw, w_cfg)
+
+        draw_all()  # load fonts
+        elapsed = _best_of(draw_all)
+        print(f"  {template[0]:<14}: {elapsed * 1e6 / per_type:9.1f} µs")
+
+
+def bench_page(widget_count: int) -> dict:
+    """Benchmark one mixed page; returns its golden hashes (light, dark)."""
+    hashes = {}
+    device, page, values = build_mixed_page(widget_count)
+    hass = StubHass(values)
+
+    STATIC_LAYER_CACHE.clear()
+    t_full = _best_of(lambda: render_page_image(hass, device, page, use_layer_cache=False))
+    t_layered = _best_of(lambda: render_page_image(hass, device, page))
+
+    image = render_page_image(hass, device, page)
+    t_png_opt = _best_of(lambda: _encode(image, True), repeat=3)
+    t_png = _best_of(lambda: _encode(image, False), repeat=3)
+    size_opt, size = len(_encode(image, True)), len(_encode(image, False))
+
+    static_device, static_page, entity_ids = build_page(widget_count)
+    static_hass = StubHass({entity_id: 20.5 for entity_id in entity_ids})
+    t_static_full = _best_of(lambda: render_page_image(static_hass, static_device, static_page, use_layer_cache=False))
+    t_static_layered = _best_of(lambda: render_page_image(static_hass, static_device, static_page))
+
+    STATIC_LAYER_CACHE.clear()
+    tracemalloc.start()
+    render_page_image(hass, device, page, use_layer_cache=False)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{widget_count} widgets:")
+    print(f"  full redraw        : {t_full * 1000:8.2f} ms")
+    print(f"  cached base layer  : {t_layered * 1000:8.2f} ms  ({t_full / t_layered:.1f}x)")
+    print(f"  mostly static page : {t_static_full * 1000:8.2f} ms -> {t_static_layered * 1000:.2f} ms"
+          f"  ({t_static_full / t_static_layered:.1f}x)")
+    print(f"  PNG optimize=True  : {t_png_opt * 1000:8.2f} ms  {size_opt / 1024:7.1f} KiB")
+    print(f"  PNG optimize=False : {t_png * 1000:8.2f} ms  {size / 1024:7.1f} KiB")
+    print(f"  peak Python memory : {peak / 1024:8.1f} KiB")
+
+    for dark in (False, True):
+        name = golden_name(widget_count, dark)
+        full = render_golden_page(widget_count, dark)
+        hashes[name] = _image_hash(full)
+        if _SAVE_DIR:
+            full.save(os.path.join(_SAVE_DIR, f"{name}.png"))
+    return hashes
+
+
+def golden_name(widget_count: int, dark: bool) -> str:
+    return f"mixed_{widget_count}_{'dark' if dark else 'light'}"
+
+
+def render_golden_page(widget_count: int, dark: bool) -> Image.Image:
+    """Full redraw of a mixed page at FROZEN_NOW; the layered render must match it."""
+    device, page, values = build_mixed_page(widget_count, dark)
+    hass = StubHass(values)
+    with patch.object(dt_util, "now", return_value=FROZEN_NOW):
+        full = render_page_image(hass, device, page, use_layer_cache=False)
+        render_page_image(hass, device, page)
+        layered = render_page_image(hass, device, page)
+    assert full.tobytes() == layered.tobytes(), (
+        f"layered render differs from a full redraw ({widget_count} widgets, dark={dark})"
+    )
+    return full
+
+
+def golden_page_hash(widget_count: int, dark: bool) -> str:
+    """Hash of render_golden_page(), as stored in the golden file."""
+    return _image_hash(render_golden_page(widget_count, dark))
+
+
+_SAVE_DIR = None
+
+
+def main(argv=None) -> int:
+    global _SAVE_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--counts", default="10,100,1000", help="comma separated widget counts")
+    parser.add_argument("--update-golden", action="store_true", help=f"rewrite {os.path.basename(GOLDEN_FILE)}")
+    parser.add_argument("--save", metavar="DIR", help="write the rendered pages as PNG to DIR")
+    args = parser.parse_args(argv)
+    counts = [int(c) for c in args.counts.split(",") if c]
+    _SAVE_DIR = args.save
+    if _SAVE_DIR:
+        os.makedirs(_SAVE_DIR, exist_ok=True)
+
+    env = environment()
+    print(f"Pillow {env['pillow']}, FreeType {env['freetype']}, qrcode: {env['qrcode']}\n")
+
+    hashes = {}
+    with patch.object(dt_util, "now", return_value=FROZEN_NOW):
+        bench_widget_types()
+        print()
+        for count in counts:
+            hashes.update(bench_page(count))
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"\npeak RSS: {peak_rss / 1024:.1f} MiB")
+
+    if args.update_golden:
+        golden = {"environment": env, "pages": {}}
+        if os.path.exists(GOLDEN_FILE):
+            with open(GOLDEN_FILE, encoding="utf-8") as file:
+                golden["pages"] = json.load(file).get("pages", {})
+        golden["pages"].update(hashes)
+        with open(GOLDEN_FILE, "w", encoding="utf-8") as file:
+            json.dump(golden, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"✓ {len(hashes)} golden hashes written to {os.path.basename(GOLDEN_FILE)}")
+        return 0
+
+    if not os.path.exists(GOLDEN_FILE):
+        print("no golden file; run with --update-golden to create it")
+        return 1
+    golden = load_golden()
+    if golden.get("environment") != env:
+        print(f"! goldens were recorded with {golden.get('environment')}; differences may be environmental")
+
+    failed = 0
+    for name, digest in hashes.items():
+        expected = golden.get("pages", {}).get(name)
+        if expected is None:
+            print(f"  {name}: no golden hash")
+        elif expected != digest:
+            failed += 1
+            print(f"✗ {name}: output differs from golden")
+    if failed:
+        print(f"{failed} page(s) differ; inspect with --save DIR against the previous commit")
+        return 1
+    print(f"✓ {len(hashes)} pages match their golden hashes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,11 +19,26 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN, STORAGE_KEY, STORAGE_VERSION
+from .const import (
+    CONF_RENDER_PROCESSES,
+    CONF_RENDER_WORKERS,
+    CONF_SAVE_DELAY,
+    DEFAULT_SAVE_DELAY,
+    DOMAIN,
+    RENDER_POOL_WORKERS,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
 from .http_api import async_register_http_views
+from .fonts import FONT_CACHE, font_search_dirs
 from .panel import ESPHomeDesignerPanelView, ESPHomeDesignerFontView
+from .framebuffer_diff import FrameHistory
+from .render_cache import PageRenderCache
+from .render_pool import RenderPool
+from .scheduler import PreRenderScheduler
 from .services import async_register_services, async_unregister_services
 from .storage import DashboardStorage
+from .thumbnails import LayoutThumbnails
 from .models import DashboardState, DeviceConfig, PageConfig, WidgetConfig
 
 _LOGGER = logging.getLogger(__name__)
@@ -128,10 +143,10 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
             current_page=int(raw.get("current_page", 0)),
         )
         device.ensure_pages()
-        state.devices[device_id] = device
+        # Only the YAML-defined layouts are re-written, not the whole store.
+        await storage.async_set_device(device)
         _LOGGER.debug("%s: Loaded YAML device '%s' with %d pages", DOMAIN, device_id, len(device.pages))
 
-    await storage.async_save()
     _LOGGER.info("%s: YAML configuration loaded (%d devices)", DOMAIN, len(state.devices))
 
     return True
@@ -157,8 +172,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     else:
         storage = hass.data[DOMAIN]["storage"]
 
+    storage.save_delay = entry.options.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY)
+
+    render_workers = entry.options.get(CONF_RENDER_WORKERS, RENDER_POOL_WORKERS)
+    render_processes = entry.options.get(CONF_RENDER_PROCESSES, False)
+    render_pool = hass.data[DOMAIN].get("render_pool")
+    if render_pool is None:
+        render_pool = hass.data[DOMAIN]["render_pool"] = RenderPool(
+            hass, workers=render_workers, use_processes=render_processes
+        )
+    else:
+        render_pool.async_configure(render_workers, render_processes)
+
+    render_cache = hass.data[DOMAIN].get("render_cache")
+    if render_cache is None:
+        render_cache = hass.data[DOMAIN]["render_cache"] = PageRenderCache(hass, pool=render_pool)
+        storage.async_add_change_listener(render_cache.async_layout_changed)
+        FONT_CACHE.set_search_dirs(font_search_dirs(hass.config.path))
+
+    scheduler = hass.data[DOMAIN].get("scheduler")
+    if scheduler is None:
+        scheduler = hass.data[DOMAIN]["scheduler"] = PreRenderScheduler(hass, storage, render_cache)
+    frames = hass.data[DOMAIN].setdefault("frames", FrameHistory())
+
+    thumbnails = hass.data[DOMAIN].get("thumbnails")
+    if thumbnails is None:
+        thumbnails = hass.data[DOMAIN]["thumbnails"] = LayoutThumbnails(hass, render_pool)
+        # Thumbnails of layouts deleted while we were not running.
+        hass.async_create_background_task(
+            thumbnails.async_prune(list(storage.state.devices)), f"{DOMAIN} thumbnail cleanup"
+        )
+
+    # Register page navigation services (idempotent)
+    async_register_services(hass, storage)
+
     # Register HTTP views (idempotent)
-    await async_register_http_views(hass, storage)
+    await async_register_http_views(hass, storage, render_cache, scheduler, frames, thumbnails)
     _LOGGER.info("%s: HTTP API views registered", DOMAIN)
 
     # Register the embedded editor panel backend view
@@ -211,6 +260,15 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if len(entries) <= 1:
         async_unregister_services(hass)
         _LOGGER.debug("%s: Unregistered services (last entry unloaded)", DOMAIN)
+        render_cache = hass.data.get(DOMAIN, {}).get("render_cache")
+        if render_cache is not None:
+            render_cache.async_shutdown()
+        scheduler = hass.data.get(DOMAIN, {}).get("scheduler")
+        if scheduler is not None:
+            scheduler.async_shutdown()
+        render_pool = hass.data.get(DOMAIN, {}).get("render_pool")
+        if render_pool is not None:
+            render_pool.async_shutdown()
     
     # Remove the sidebar panel
     try:
@@ -219,6 +277,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     except Exception:
         pass
 
+    # Write out any coalesced (delayed) layout saves before unloading.
+    storage = hass.data.get(DOMAIN, {}).get("storage")
+    if storage is not None:
+        await storage.async_flush()
+
     # Keep storage in memory; if you want to fully unload, you could:
     # hass.data[DOMAIN].pop("storage", None) when last entry is removed.
 
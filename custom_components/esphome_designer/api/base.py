@@ -30,12 +30,19 @@ class DesignerBaseView(HomeAssistantView):
         response.headers["Access-Control-Allow-Private-Network"] = "true"
         return response
 
-    def json(self, data: Any, status_code: int = HTTPStatus.OK, request: web.Request = None) -> web.Response:
+    def json(
+        self,
+        data: Any,
+        status_code: int = HTTPStatus.OK,
+        request: web.Request = None,
+        headers: dict[str, str] | None = None,
+    ) -> web.Response:
         """Return a JSON response using Home Assistant's json_dumps."""
         response = web.Response(
             body=json_dumps(data),
             status=status_code,
             content_type="application/json",
+            headers=headers,
         )
         # Add PNA headers if request is available
         if request:
@@ -45,3 +52,56 @@ class DesignerBaseView(HomeAssistantView):
     def json_response(self, data: Any, request: web.Request, status_code: int = HTTPStatus.OK) -> web.Response:
         """Return a JSON response with PNA headers."""
         return self.json(data, status_code, request)
+
+    @staticmethod
+    def _etag_headers(etag: str) -> dict[str, str]:
+        """Headers for a revalidatable response: clients must check the ETag."""
+        return {"ETag": etag, "Cache-Control": "no-cache"}
+
+    @staticmethod
+    def _if_none_match(request: web.Request, *etags: str, wildcard: bool = True) -> bool:
+        """Return True if the request's If-None-Match covers one of etags.
+
+        wildcard=False treats "*" as naming no representation.
+        """
+        header = request.headers.get("If-None-Match")
+        if not header:
+            return False
+        if header.strip() == "*":
+            return wildcard
+        # If-None-Match uses the weak comparison function (RFC 9110 13.1.2).
+        return any(
+            tag.strip().removeprefix("W/") in etags for tag in header.split(",")
+        )
+
+    @staticmethod
+    def _accepts_gzip(request: web.Request) -> bool:
+        return "gzip" in request.headers.get("Accept-Encoding", "").lower()
+
+    def _bytes_response(
+        self,
+        request: web.Request,
+        body: bytes,
+        status_code: int = HTTPStatus.OK,
+        headers: dict[str, str] | None = None,
+        gzipped: bool = False,
+        content_type: str = "application/json",
+    ) -> web.Response:
+        """Return pre-encoded bytes (JSON unless content_type says otherwise) as-is."""
+        response = web.Response(
+            body=body,
+            status=status_code,
+            content_type=content_type,
+            headers=headers,
+        )
+        if gzipped:
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers["Vary"] = "Accept-Encoding"
+        elif content_type == "application/json":
+            response.headers["Vary"] = "Accept-Encoding"
+        return self._add_pna_headers(response, request)
+
+    def _not_modified_response(self, request: web.Request, etag: str) -> web.Response:
+        """Return an empty 304 response carrying the current ETag."""
+        response = web.Response(status=HTTPStatus.NOT_MODIFIED, headers=self._etag_headers(etag))
+        return self._add_pna_headers(response, request)
@@ -1,15 +1,34 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from http import HTTPStatus
+from typing import Any, Callable, Dict
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State
 
-from ..const import API_BASE_PATH
+from ..const import API_BASE_PATH, ENTITIES_DEFAULT_FIELDS, ENTITIES_MAX_RESULTS
 from .base import DesignerBaseView
 
 _LOGGER = logging.getLogger(__name__)
 
+# Field name -> value for a state. entity_id is always included.
+_FIELDS: Dict[str, Callable[[State], Any]] = {
+    "entity_id": lambda state: state.entity_id,
+    "friendly_name": lambda state: state.attributes.get("friendly_name", state.entity_id),
+    "state": lambda state: state.state,
+    "domain": lambda state: state.domain,
+    "unit": lambda state: state.attributes.get("unit_of_measurement"),
+    "icon": lambda state: state.attributes.get("icon"),
+    "attributes": lambda state: state.attributes,
+    "last_changed": lambda state: state.last_changed.isoformat(),
+    "last_updated": lambda state: state.last_updated.isoformat(),
+}
+
+
+def _split(value: str | None) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()] if value else []
+
+
 class ReTerminalEntitiesView(DesignerBaseView):
     """Expose a filtered list of Home Assistant entities for the editor entity picker."""
 
@@ -20,31 +39,71 @@ class ReTerminalEntitiesView(DesignerBaseView):
         self.hass = hass
 
     async def get(self, request) -> Any:
-        """Return a compact list of entities."""
-        domains = request.query.get("domains", "").split(",") if request.query.get("domains") else []
-        search = request.query.get("search", "").lower()
+        """Return a compact list of entities.
+
+        Query parameters, all optional:
+        - domains, search: filter by domain list / substring of the entity id
+          or friendly name,
+        - ids: comma separated entity ids (e.g. those a layout uses); unknown
+          ids are skipped,
+        - fields: comma separated subset of _FIELDS; defaults to
+          ENTITIES_DEFAULT_FIELDS, full attributes only on request,
+        - limit / cursor: page through the entities ordered by entity id.
+          With either, the response is {"entities": [...], "next_cursor":
+          <entity id to pass as cursor, or null>} instead of a bare list.
+
+        At most ENTITIES_MAX_RESULTS entities are returned per request; page
+        with limit / cursor to get more.
+        """
+        query = request.query
+        fields = _split(query.get("fields")) or list(ENTITIES_DEFAULT_FIELDS)
+        if any(field not in _FIELDS for field in fields):
+            return self.json(
+                {"error": "invalid_fields", "allowed": list(_FIELDS)}, HTTPStatus.BAD_REQUEST, request=request
+            )
+        if "entity_id" not in fields:
+            fields.insert(0, "entity_id")
+        getters = [(field, _FIELDS[field]) for field in fields]
+
+        paginated = "limit" in query or "cursor" in query
+        try:
+            limit = int(query["limit"]) if query.get("limit") else ENTITIES_MAX_RESULTS
+            if limit < 1:
+                raise ValueError("limit must be positive")
+        except ValueError:
+            return self.json({"error": "invalid_pagination"}, HTTPStatus.BAD_REQUEST, request=request)
+        limit = min(limit, ENTITIES_MAX_RESULTS)
+        cursor = query.get("cursor") or None
+
+        domains = set(_split(query.get("domains")))
+        search = query.get("search", "").lower()
+        ids = _split(query.get("ids"))
+
+        if ids:
+            states = [state for state in map(self.hass.states.get, dict.fromkeys(ids)) if state is not None]
+        else:
+            states = self.hass.states.async_all(domains) if domains else self.hass.states.async_all()
+        if paginated:
+            states = sorted(states, key=lambda state: state.entity_id)
 
         entities = []
-        for state in self.hass.states.async_all():
+        next_cursor = None
+        for state in states:
+            if cursor is not None and state.entity_id <= cursor:
+                continue
             if domains and state.domain not in domains:
                 continue
-            
+
             # Simple substring filters
             if search and search not in state.entity_id.lower() and \
-               search not in state.attributes.get("friendly_name", "").lower():
+               search not in str(state.attributes.get("friendly_name", "")).lower():
                 continue
 
-            entities.append({
-                "entity_id": state.entity_id,
-                "friendly_name": state.attributes.get("friendly_name", state.entity_id),
-                "state": state.state,
-                "domain": state.domain,
-                "unit": state.attributes.get("unit_of_measurement"),
-                "icon": state.attributes.get("icon"),
-                "attributes": dict(state.attributes)  # Include full attributes for preview
-            })
-
-            if len(entities) >= 5000: # Safety cap
+            if len(entities) >= limit:
+                next_cursor = entities[-1]["entity_id"] if paginated else None
                 break
+            entities.append({field: getter(state) for field, getter in getters})
 
-        return self.json(entities, request=request)
+        if not paginated:
+            return self.json(entities, request=request)
+        return self.json({"entities": entities, "next_cursor": next_cursor}, request=request)
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import logging
+from http import HTTPStatus
+from typing import Any, Optional, Tuple
+
+from homeassistant.core import HomeAssistant
+
+from ..const import (
+    API_DIFF_PATH,
+    API_FRAMEBUFFER_PATH,
+    API_IMAGE_PATH,
+    DIFF_MAX_RECTS,
+    LONG_POLL_MAX_WAIT,
+)
+from ..framebuffer import COMPRESSION_NONE, COMPRESSION_RLE, SUPPORTED_BPP, SUPPORTED_COMPRESSION
+from ..dither import PALETTES
+from ..framebuffer_diff import FrameHistory, encode_diff
+from ..models import DeviceConfig
+from ..render_cache import OutputFormat, PageRenderCache, RenderedPage
+from ..render_pool import RenderQueueFull
+from ..scheduler import PreRenderScheduler
+from ..storage import DashboardStorage
+from .base import DesignerBaseView
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _PageRenderView(DesignerBaseView):
+    """Common handling for the device-facing page render routes.
+
+    Devices authenticate with their per-device api_token (?token=...).
+    Renders are cached, see render_cache.PageRenderCache. Every fetch also
+    schedules a pre-render ahead of the device's next wake (scheduler.py).
+
+    The PNG and framebuffer routes send a strong ETag derived from the
+    frame content and answer If-None-Match with 304. With ?wait=<seconds>
+    (up to LONG_POLL_MAX_WAIT) and an If-None-Match naming the current ETag,
+    the request is held until the frame actually changes, or answered with
+    304 when the time is up. "If-None-Match: *" names no frame the client
+    has, so a long-poll with it is answered right away.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        storage: DashboardStorage,
+        render_cache: PageRenderCache,
+        scheduler: PreRenderScheduler,
+        frames: FrameHistory,
+    ) -> None:
+        self.hass = hass
+        self.storage = storage
+        self.render_cache = render_cache
+        self.scheduler = scheduler
+        self.frames = frames
+
+    async def _async_render(
+        self,
+        request,
+        device_id: str,
+        page_index: str,
+        output: Optional[OutputFormat],
+    ) -> Tuple[Optional[DeviceConfig], Optional[RenderedPage], Any]:
+        """Authenticate and render; returns (device, rendered, None) or (None, None, error response)."""
+        device = self.storage.get_device_by_token(device_id, request.query.get("token", ""))
+        if device is None:
+            return None, None, self.json({"error": "unauthorized"}, HTTPStatus.UNAUTHORIZED, request=request)
+
+        try:
+            index = int(page_index)
+        except ValueError:
+            return None, None, self.json({"error": "invalid_page"}, HTTPStatus.BAD_REQUEST, request=request)
+
+        try:
+            rendered = await self.render_cache.async_get_rendered(device, index, output)
+        except ImportError as exc:
+            _LOGGER.error("Server-side rendering needs Pillow: %s", exc)
+            return None, None, self.json(
+                {"error": "renderer_unavailable"}, HTTPStatus.SERVICE_UNAVAILABLE, request=request
+            )
+        except RenderQueueFull:
+            return None, None, self._queue_full_response(request)
+        if rendered is None:
+            return None, None, self.json({"error": "page_not_found"}, HTTPStatus.NOT_FOUND, request=request)
+
+        self.scheduler.async_note_fetch(device.device_id, output, index)
+        return device, rendered, None
+
+    async def _async_render_changed(
+        self,
+        request,
+        device_id: str,
+        page_index: str,
+        output: Optional[OutputFormat],
+    ) -> Tuple[Optional[DeviceConfig], Optional[RenderedPage], Any]:
+        """_async_render() with conditional GET and ?wait= long-poll.
+
+        Returns (device, rendered, None) for a new frame, or (None, None,
+        response) with a 304 or an error.
+        """
+        try:
+            wait = min(float(request.query.get("wait", 0)), LONG_POLL_MAX_WAIT)
+        except ValueError:
+            wait = -1
+        if not wait >= 0:
+            return None, None, self.json({"error": "invalid_query"}, HTTPStatus.BAD_REQUEST, request=request)
+
+        # Only park requests that name the current frame; "*" does not.
+        wildcard = not wait
+        device, rendered, error = await self._async_render(request, device_id, page_index, output)
+        if error is not None or not self._if_none_match(request, rendered.etag, wildcard=wildcard):
+            return device, rendered, error
+
+        deadline = self.hass.loop.time() + wait
+        while (remaining := deadline - self.hass.loop.time()) > 0:
+            await self.render_cache.async_wait_for_change(device, int(page_index), remaining)
+            device, rendered, error = await self._async_render(request, device_id, page_index, output)
+            if error is not None or not self._if_none_match(request, rendered.etag, wildcard=wildcard):
+                return device, rendered, error
+        return None, None, self._not_modified_response(request, rendered.etag)
+
+    def _queue_full_response(self, request) -> Any:
+        return self.json(
+            {"error": "render_queue_full"},
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            request=request,
+            headers={"Retry-After": "5"},
+        )
+
+    def _remember_frame(self, device: DeviceConfig, rendered: RenderedPage) -> None:
+        """Record a framebuffer render as delivered to the device (a possible diff base).
+
+        The unpacked frame comes from the render job, so nothing is decoded here.
+        """
+        self.frames.add(device.device_id, rendered.frame)
+
+    def _binary_response(self, request, data: bytes, content_type: str, etag: Optional[str] = None) -> Any:
+        return self._bytes_response(
+            request,
+            data,
+            headers=self._etag_headers(etag) if etag else {"Cache-Control": "no-cache"},
+            content_type=content_type,
+        )
+
+
+def _framebuffer_query(request) -> Tuple[Optional[int], Optional[str]]:
+    """Parse ?bpp= and ?compression= (None for invalid values)."""
+    try:
+        bpp = int(request.query.get("bpp", 1))
+    except ValueError:
+        bpp = None
+    compression = request.query.get("compression", COMPRESSION_NONE)
+    return (
+        bpp if bpp in SUPPORTED_BPP else None,
+        compression if compression in SUPPORTED_COMPRESSION else None,
+    )
+
+
+class ReTerminalPageImageView(_PageRenderView):
+    """Serve a server-rendered page as PNG to the device.
+
+    Grayscale by default; ?palette=<name> (see dither.PALETTES) returns an
+    indexed PNG dithered with the device's oepl_dither mode.
+    """
+
+    url = API_IMAGE_PATH
+    name = "api:esphome_designer_page_image"
+
+    async def get(self, request, device_id: str, page_index: str) -> Any:
+        """Return the PNG for one page of a device."""
+        palette = request.query.get("palette")
+        if palette is not None and palette not in PALETTES:
+            return self.json({"error": "invalid_palette"}, HTTPStatus.BAD_REQUEST, request=request)
+
+        _device, rendered, error = await self._async_render_changed(request, device_id, page_index, palette)
+        if error is not None:
+            return error
+        return self._binary_response(request, rendered.data, "image/png", rendered.etag)
+
+
+class ReTerminalPageFramebufferView(_PageRenderView):
+    """Serve a server-rendered page as a packed framebuffer (see framebuffer.py).
+
+    Query: ?bpp=1|2|4 (default 1) and ?compression=none|rle (default none).
+    The page is dithered to the gray levels with the device's oepl_dither
+    mode (dither.py). The frame is remembered as a possible base for diff requests.
+    """
+
+    url = API_FRAMEBUFFER_PATH
+    name = "api:esphome_designer_page_framebuffer"
+
+    async def get(self, request, device_id: str, page_index: str) -> Any:
+        """Return the framebuffer for one page of a device."""
+        bpp, compression = _framebuffer_query(request)
+        if bpp is None:
+            return self.json({"error": "invalid_bpp"}, HTTPStatus.BAD_REQUEST, request=request)
+        if compression is None:
+            return self.json({"error": "invalid_compression"}, HTTPStatus.BAD_REQUEST, request=request)
+
+        device, rendered, error = await self._async_render_changed(
+            request, device_id, page_index, (bpp, compression)
+        )
+        if error is not None:
+            return error
+        self._remember_frame(device, rendered)
+        return self._binary_response(request, rendered.data, "application/octet-stream", rendered.etag)
+
+
+class ReTerminalPageDiffView(_PageRenderView):
+    """Serve the changed rectangles of a page since the frame the device shows.
+
+    See framebuffer_diff.py for the format. Query: ?bpp=, ?compression= as for
+    the framebuffer route, ?max_rects= (default DIFF_MAX_RECTS) and
+    ?base=<crc32 hex> of the frame the device currently shows (the frame CRC
+    of the last framebuffer or diff it applied). If it is missing or not one
+    of the frames recently delivered to the device, the full frame is sent
+    as a single rectangle.
+    """
+
+    url = API_DIFF_PATH
+    name = "api:esphome_designer_page_diff"
+
+    async def get(self, request, device_id: str, page_index: str) -> Any:
+        """Return the dirty-rectangle diff for one page of a device."""
+        bpp, compression = _framebuffer_query(request)
+        if bpp is None:
+            return self.json({"error": "invalid_bpp"}, HTTPStatus.BAD_REQUEST, request=request)
+        if compression is None:
+            return self.json({"error": "invalid_compression"}, HTTPStatus.BAD_REQUEST, request=request)
+        try:
+            max_rects = min(64, max(1, int(request.query.get("max_rects", DIFF_MAX_RECTS))))
+            base_crc = int(request.query["base"], 16) if request.query.get("base") else None
+        except ValueError:
+            return self.json({"error": "invalid_query"}, HTTPStatus.BAD_REQUEST, request=request)
+
+        # Diffs work on the unpacked buffer; rect payloads are compressed individually.
+        device, rendered, error = await self._async_render(request, device_id, page_index, (bpp, COMPRESSION_NONE))
+        if error is not None:
+            return error
+        data = rendered.data
+
+        frame = rendered.frame
+        previous = self.frames.find(device.device_id, base_crc) if base_crc is not None else None
+        base = None
+        if previous is not None and (previous.bpp, previous.width, previous.height) == (
+            frame.bpp,
+            frame.width,
+            frame.height,
+        ):
+            base = previous.raw
+
+        # Encoded on the render pool, so diffs share its concurrency bound.
+        # The device's base is whatever it names, so a lost response only
+        # costs a diff against an older frame (or a full frame).
+        base_id = previous.crc32 if base is not None else None
+        key = ("diff", device.device_id, base_id, frame.crc32, bpp, max_rects, compression)
+        try:
+            diff, rects = await self.render_cache.pool.async_run(
+                key,
+                encode_diff,
+                base,
+                frame.raw,
+                frame.width,
+                frame.height,
+                bpp,
+                max_rects,
+                compression == COMPRESSION_RLE,
+                label=f"{device.device_id} diff",
+            )
+        except RenderQueueFull:
+            return self._queue_full_response(request)
+        self.frames.add(device.device_id, frame)
+        self.frames.record_diff(len(diff), len(data), rects, base is None)
+        return self._binary_response(request, diff, "application/octet-stream")
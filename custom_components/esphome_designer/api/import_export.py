@@ -5,12 +5,14 @@ from http import HTTPStatus
 from typing import Any
 
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes, json_fragment
 
 from ..const import API_BASE_PATH
 from ..models import DeviceConfig
 from ..storage import DashboardStorage
 from ..yaml_parser import yaml_to_layout
 from .base import DesignerBaseView
+from .layout import layout_response
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,10 +40,11 @@ class ReTerminalImportSnippetView(DesignerBaseView):
             # Save as default
             await self.storage.async_save_layout_default(layout)
             
-            return self.json({
+            body = json_bytes({
                 "status": "ok",
-                "layout": layout.to_dict()
-            }, request=request)
+                "layout": json_fragment(self.storage.layout_json(layout))
+            })
+            return self._bytes_response(request, body)
         except ValueError as exc:
             return self.json({"error": str(exc)}, HTTPStatus.BAD_REQUEST, request=request)
         except Exception as exc:
@@ -62,8 +65,8 @@ class ReTerminalLayoutExportView(DesignerBaseView):
         layout = await self.storage.async_get_layout(layout_id)
         if not layout:
             return self.json({"error": "not_found"}, HTTPStatus.NOT_FOUND, request=request)
-        
-        return self.json(layout.to_dict(), request=request)
+
+        return layout_response(self, request, self.storage, layout)
 
 class ReTerminalLayoutImportView(DesignerBaseView):
     """Import a JSON layout file."""
@@ -5,10 +5,14 @@ from http import HTTPStatus
 from typing import Any
 
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes, json_fragment
 
-from ..const import API_BASE_PATH
+from ..const import API_BASE_PATH, THUMBNAIL_FORMATS, THUMBNAIL_WIDTH, THUMBNAIL_WIDTHS
+from ..layout_patch import LayoutPatchDuplicateId, LayoutPatchError, LayoutPatchTestFailed
 from ..models import DeviceConfig
-from ..storage import DashboardStorage
+from ..render_pool import RenderQueueFull
+from ..storage import DashboardStorage, LayoutConflictError
+from ..thumbnails import LayoutThumbnails
 from .base import DesignerBaseView
 import json
 
@@ -35,6 +39,51 @@ async def _parse_json_body(request):
         _LOGGER.warning("Failed to parse JSON body: %s", e)
         return {}
 
+def layout_response(view: DesignerBaseView, request, storage: DashboardStorage, device: DeviceConfig) -> Any:
+    """Serve a layout from the storage serialization cache.
+
+    Honours If-None-Match (304) and serves cached gzip bytes to clients that
+    accept them. The gzip representation gets its own strong ETag.
+    """
+    etag = device.etag
+    gzip_etag = f'{etag[:-1]}-gzip"'
+    use_gzip = view._accepts_gzip(request)
+    current = gzip_etag if use_gzip else etag
+
+    if view._if_none_match(request, etag, gzip_etag):
+        return view._not_modified_response(request, current)
+
+    if use_gzip:
+        body = storage.layout_json_gzip(device)
+    else:
+        body = storage.layout_json(device)
+    return view._bytes_response(request, body, headers=view._etag_headers(current), gzipped=use_gzip)
+
+
+def if_match_etags(request) -> list[str] | None:
+    """Parse If-Match into layout ETags (gzip variants map to the same revision)."""
+    header = request.headers.get("If-Match")
+    if header is None:
+        return None
+    tags = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.endswith('-gzip"'):
+            tag = tag[: -len('-gzip"')] + '"'
+        tags.append(tag)
+    return tags
+
+
+def conflict_response(view: DesignerBaseView, request, exc: LayoutConflictError) -> Any:
+    """409 carrying the current revision so the editor can reload and retry."""
+    return view.json(
+        {"error": "conflict", "revision": exc.revision, "etag": exc.etag},
+        HTTPStatus.CONFLICT,
+        request=request,
+        headers=view._etag_headers(exc.etag) if exc.etag else None,
+    )
+
+
 class ReTerminalLayoutView(DesignerBaseView):
     """Provide layout GET/POST for the ESPHome Designer editor."""
 
@@ -51,7 +100,7 @@ class ReTerminalLayoutView(DesignerBaseView):
         _LOGGER.info("Loading layout: %d pages, %d total widgets", 
                      len(device.pages),
                      sum(len(p.widgets) for p in device.pages))
-        return self.json(device.to_dict(), status_code=HTTPStatus.OK, request=request)
+        return layout_response(self, request, self.storage, device)
 
     async def post(self, request) -> Any:
         """Update layout for the default device from JSON body."""
@@ -68,7 +117,10 @@ class ReTerminalLayoutView(DesignerBaseView):
                      len(body.get("pages", [])),
                      sum(len(p.get("widgets", [])) for p in body.get("pages", [])))
 
-        updated = await self.storage.async_update_layout_default(body)
+        try:
+            updated = await self.storage.async_update_layout_default(body, if_match=if_match_etags(request))
+        except LayoutConflictError as exc:
+            return conflict_response(self, request, exc)
         if not isinstance(updated, DeviceConfig):
             _LOGGER.error("Failed to update layout: storage returned invalid result")
             return self.json(
@@ -77,7 +129,8 @@ class ReTerminalLayoutView(DesignerBaseView):
                 request=request,
             )
 
-        return self.json({"status": "ok", "layout": updated.to_dict()}, request=request)
+        body = json_bytes({"status": "ok", "layout": json_fragment(self.storage.layout_json(updated))})
+        return self._bytes_response(request, body, headers=self._etag_headers(updated.etag))
 
     async def _async_get_default_device(self) -> DeviceConfig:
         """Return the default device/layout, creating if necessary."""
@@ -97,12 +150,45 @@ class ReTerminalLayoutsListView(DesignerBaseView):
         self.storage = storage
 
     async def get(self, request) -> Any:
-        """List all layouts."""
-        layouts = await self.storage.async_list_layouts()
+        """List layouts.
+
+        Optional query parameters: search, device_model, sort (e.g. "name",
+        "-modified"), offset and limit. Without them all layouts are returned
+        in storage order.
+        """
+        query = request.query
+        try:
+            offset = max(0, int(query.get("offset", 0)))
+            limit = int(query["limit"]) if query.get("limit") else None
+            if limit is not None and limit < 1:
+                raise ValueError("limit must be positive")
+        except ValueError:
+            return self.json({"error": "invalid_pagination"}, HTTPStatus.BAD_REQUEST, request=request)
+
+        try:
+            layouts = await self.storage.async_list_layouts(
+                search=query.get("search") or None,
+                device_model=query.get("device_model") or None,
+                sort=query.get("sort") or None,
+            )
+        except ValueError as exc:
+            return self.json({"error": "invalid_sort", "message": str(exc)}, HTTPStatus.BAD_REQUEST, request=request)
+
+        total = len(layouts)
+        end = offset + limit if limit is not None else None
         last_active = None
         if self.storage._state and self.storage._state.last_active_layout_id:
             last_active = self.storage._state.last_active_layout_id
-        return self.json({"layouts": layouts, "last_active_layout_id": last_active}, request=request)
+        return self.json(
+            {
+                "layouts": layouts[offset:end],
+                "last_active_layout_id": last_active,
+                "total": total,
+                "offset": offset,
+                "limit": limit,
+            },
+            request=request,
+        )
 
     async def post(self, request) -> Any:
         """Create a new layout."""
@@ -134,7 +220,7 @@ class ReTerminalLayoutsListView(DesignerBaseView):
             )
             await self.storage.async_save_layout(new_layout)
             _LOGGER.info("Created layout: %s", layout_id)
-            return self.json(new_layout.to_dict(), request=request)
+            return self._bytes_response(request, self.storage.layout_json(new_layout))
         except Exception as exc:
             _LOGGER.exception("Error creating layout: %s", exc)
             return self.json({"error": str(exc)}, HTTPStatus.INTERNAL_SERVER_ERROR, request=request)
@@ -152,7 +238,7 @@ class ReTerminalLayoutDetailView(DesignerBaseView):
         layout = await self.storage.async_get_layout(layout_id)
         if not layout:
             return self.json({"error": "not_found"}, HTTPStatus.NOT_FOUND, request=request)
-        return self.json(layout.to_dict(), request=request)
+        return layout_response(self, request, self.storage, layout)
 
     async def delete(self, request, layout_id: str) -> Any:
         if layout_id == "default":
@@ -175,12 +261,106 @@ class ReTerminalLayoutDetailView(DesignerBaseView):
                 _LOGGER.info("Layout deleted: %s", layout_id)
                 return self.json({"status": "deleted"}, request=request)
 
-            updated = await self.storage.async_update_layout(layout_id, body)
+            updated = await self.storage.async_update_layout(layout_id, body, if_match=if_match_etags(request))
             if not updated:
                 _LOGGER.error("Failed to update layout: %s", layout_id)
                 return self.json({"error": "update_failed"}, HTTPStatus.INTERNAL_SERVER_ERROR, request=request)
             _LOGGER.info("Layout updated: %s", layout_id)
-            return self.json(updated.to_dict(), request=request)
+            return self._bytes_response(
+                request, self.storage.layout_json(updated), headers=self._etag_headers(updated.etag)
+            )
+        except LayoutConflictError as exc:
+            _LOGGER.info("Rejected stale update for layout %s (current revision %s)", layout_id, exc.revision)
+            return conflict_response(self, request, exc)
         except Exception as exc:
             _LOGGER.exception("Error in post for layout %s: %s", layout_id, exc)
             return self.json({"error": str(exc)}, HTTPStatus.INTERNAL_SERVER_ERROR, request=request)
+
+    async def patch(self, request, layout_id: str) -> Any:
+        """Apply a JSON Patch (RFC 6902) or widget-level op list in place.
+
+        Body is either a list of ops or {"ops": [...]}; see layout_patch.
+        Only a small status is returned so the response scales with the edit.
+        """
+        body = await _parse_json_body(request)
+        ops = body.get("ops") if isinstance(body, dict) else body
+        if not isinstance(ops, list):
+            return self.json({"error": "invalid_patch"}, HTTPStatus.BAD_REQUEST, request=request)
+
+        try:
+            updated = await self.storage.async_patch_layout(layout_id, ops, if_match=if_match_etags(request))
+        except LayoutConflictError as exc:
+            return conflict_response(self, request, exc)
+        except LayoutPatchTestFailed as exc:
+            return self.json({"error": "test_failed", "detail": str(exc)}, HTTPStatus.CONFLICT, request=request)
+        except LayoutPatchDuplicateId as exc:
+            return self.json(
+                {"error": "duplicate_widget_id", "detail": str(exc)}, HTTPStatus.UNPROCESSABLE_ENTITY, request=request
+            )
+        except LayoutPatchError as exc:
+            return self.json({"error": "invalid_patch", "detail": str(exc)}, HTTPStatus.BAD_REQUEST, request=request)
+
+        if updated is None:
+            return self.json({"error": "not_found"}, HTTPStatus.NOT_FOUND, request=request)
+
+        _LOGGER.debug("Layout %s patched with %d ops", layout_id, len(ops))
+        return self.json(
+            {"status": "ok", "applied": len(ops), "revision": updated.revision},
+            request=request,
+            headers=self._etag_headers(updated.etag),
+        )
+
+
+class ReTerminalLayoutThumbnailView(DesignerBaseView):
+    """Serve a small preview of a layout's first page (see thumbnails.py).
+
+    Query: ?width= (one of THUMBNAIL_WIDTHS, default THUMBNAIL_WIDTH) and
+    ?format=png|webp (default png). The ETag changes with the layout
+    revision, so clients revalidate with If-None-Match.
+    """
+
+    url = f"{API_BASE_PATH}/layouts/{{layout_id}}/thumbnail"
+    name = "api:esphome_designer_layout_thumbnail"
+    # Only the editor uses it; a preview of any layout is not public.
+    requires_auth = True
+
+    def __init__(self, hass: HomeAssistant, storage: DashboardStorage, thumbnails: LayoutThumbnails) -> None:
+        self.hass = hass
+        self.storage = storage
+        self.thumbnails = thumbnails
+
+    async def get(self, request, layout_id: str) -> Any:
+        """Return the thumbnail image of a layout."""
+        fmt = request.query.get("format", "png")
+        try:
+            width = int(request.query.get("width", THUMBNAIL_WIDTH))
+        except ValueError:
+            width = None
+        if width not in THUMBNAIL_WIDTHS or fmt not in THUMBNAIL_FORMATS:
+            return self.json({"error": "invalid_query"}, HTTPStatus.BAD_REQUEST, request=request)
+
+        layout = await self.storage.async_get_layout(layout_id)
+        if not layout:
+            return self.json({"error": "not_found"}, HTTPStatus.NOT_FOUND, request=request)
+
+        etag = self.thumbnails.etag(layout, width, fmt)
+        if self._if_none_match(request, etag):
+            return self._not_modified_response(request, etag)
+
+        try:
+            thumbnail = await self.thumbnails.async_get(layout, width, fmt)
+        except ImportError as exc:
+            _LOGGER.error("Server-side rendering needs Pillow: %s", exc)
+            return self.json({"error": "renderer_unavailable"}, HTTPStatus.SERVICE_UNAVAILABLE, request=request)
+        except RenderQueueFull:
+            return self.json(
+                {"error": "render_queue_full"},
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                request=request,
+                headers={"Retry-After": "5"},
+            )
+        if thumbnail is None:
+            return self.json({"error": "no_pages"}, HTTPStatus.NOT_FOUND, request=request)
+        return self._bytes_response(
+            request, thumbnail.data, headers=self._etag_headers(thumbnail.etag), content_type=thumbnail.content_type
+        )
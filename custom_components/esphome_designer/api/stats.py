@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from ..const import API_BASE_PATH
+from ..fonts import FONT_CACHE
+from ..layers import STATIC_LAYER_CACHE
+from ..text_layout import TEXT_LAYOUT_CACHE
+from ..framebuffer_diff import FrameHistory
+from ..render_cache import PageRenderCache
+from ..scheduler import PreRenderScheduler
+from ..storage import DashboardStorage
+from ..thumbnails import LayoutThumbnails
+from .base import DesignerBaseView
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ReTerminalStatsView(DesignerBaseView):
+    """Expose internal performance counters (storage writes, caches)."""
+
+    url = f"{API_BASE_PATH}/stats"
+    name = "api:esphome_designer_stats"
+    # Lists device ids, render jobs and cache contents: HA users only.
+    requires_auth = True
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        storage: DashboardStorage,
+        render_cache: PageRenderCache,
+        scheduler: PreRenderScheduler,
+        frames: FrameHistory,
+        thumbnails: LayoutThumbnails,
+    ) -> None:
+        self.hass = hass
+        self.storage = storage
+        self.render_cache = render_cache
+        self.scheduler = scheduler
+        self.frames = frames
+        self.thumbnails = thumbnails
+
+    async def get(self, request) -> Any:
+        """Return counters for diagnostics."""
+        return self.json(
+            {
+                "storage": self.storage.stats,
+                "render_cache": self.render_cache.stats,
+                "render_pool": self.render_cache.pool.stats,
+                "fonts": FONT_CACHE.stats,
+                "static_layers": STATIC_LAYER_CACHE.stats,
+                "text_layout": TEXT_LAYOUT_CACHE.stats,
+                "scheduler": self.scheduler.stats,
+                "diffs": self.frames.stats,
+                "thumbnails": self.thumbnails.stats,
+            },
+            request=request,
+        )
@@ -32,6 +32,11 @@ from .const import (
     DOMAIN,
     API_BASE_PATH,
     API_TOKEN_BYTES,
+    CONF_RENDER_PROCESSES,
+    CONF_RENDER_WORKERS,
+    CONF_SAVE_DELAY,
+    DEFAULT_SAVE_DELAY,
+    RENDER_POOL_WORKERS,
 )
 from .storage import DashboardStorage
 
@@ -137,6 +142,9 @@ class ESPHomeDesignerOptionsFlow(config_entries.OptionsFlow):
 
         # Default to True if not set
         show_in_sidebar = self._config_entry.options.get("show_in_sidebar", True)
+        save_delay = self._config_entry.options.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY)
+        render_workers = self._config_entry.options.get(CONF_RENDER_WORKERS, RENDER_POOL_WORKERS)
+        render_processes = self._config_entry.options.get(CONF_RENDER_PROCESSES, False)
 
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
@@ -144,6 +152,15 @@ class ESPHomeDesignerOptionsFlow(config_entries.OptionsFlow):
         schema = vol.Schema(
             {
                 vol.Optional("show_in_sidebar", default=show_in_sidebar): bool,
+                # Seconds to coalesce editor autosaves before writing to disk.
+                vol.Optional(CONF_SAVE_DELAY, default=save_delay): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=60)
+                ),
+                # Server-side render workers; processes sidestep the GIL.
+                vol.Optional(CONF_RENDER_WORKERS, default=render_workers): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=8)
+                ),
+                vol.Optional(CONF_RENDER_PROCESSES, default=render_processes): bool,
             }
         )
 
@@ -5,8 +5,19 @@ Constants for the ESPHome Designer Designer integration.
 DOMAIN = "esphome_designer"
 
 # Storage
+# STORAGE_KEY is the prefix for the sharded layout store: one small index file
+# ("<key>.index") plus one file per layout ("<key>.layout.<slug>").
+# A bare STORAGE_KEY file is the pre-sharding single-blob format and is only
+# read once for migration.
 STORAGE_KEY = DOMAIN
 STORAGE_VERSION = 1
+STORAGE_INDEX_SUFFIX = ".index"
+STORAGE_LAYOUT_SUFFIX = ".layout."
+LEGACY_STORAGE_KEY = "reterminal_dashboard"
+
+# Write-behind delay (seconds) used to coalesce bursts of layout saves.
+CONF_SAVE_DELAY = "save_delay"
+DEFAULT_SAVE_DELAY = 2
 
 # Image / layout defaults for reTerminal E1001
 IMAGE_WIDTH = 800
@@ -22,13 +33,52 @@ CONF_PAGES = "pages"
 SERVICE_SET_PAGE = "set_page"
 SERVICE_NEXT_PAGE = "next_page"
 SERVICE_PREV_PAGE = "prev_page"
+SERVICE_RENDER_ALL = "render_all"
 
 # HTTP API paths (joined with /api/)
 API_BASE_PATH = f"/api/{DOMAIN}"
 API_IMAGE_PATH = f"{API_BASE_PATH}" + "/{device_id}/page/{page_index}/image.png"
+API_FRAMEBUFFER_PATH = f"{API_BASE_PATH}" + "/{device_id}/page/{page_index}/framebuffer.bin"
+API_DIFF_PATH = f"{API_BASE_PATH}" + "/{device_id}/page/{page_index}/diff.bin"
 API_LAYOUT_PATH = f"{API_BASE_PATH}" + "/{device_id}/layout"
 API_LAYOUT_PAGE_PATH = f"{API_BASE_PATH}" + "/{device_id}/page/{page_index}"
 
+# Server-side rendering: number of rendered page images kept in memory.
+RENDER_CACHE_SIZE = 32
+# Loaded fonts kept by the renderer, keyed by (family, size, weight, style).
+FONT_CACHE_SIZE = 64
+# Static base layers (page without its state-dependent widgets) kept in memory.
+STATIC_LAYER_CACHE_SIZE = 16
+# Text measurements and line layouts kept by the renderer, keyed by (font, text).
+TEXT_LAYOUT_CACHE_SIZE = 4096
+# Entities endpoint: most entities returned per request, bare list or page
+# (?limit=), and the fields sent when the request does not ask for others
+# (?fields=).
+ENTITIES_MAX_RESULTS = 5000
+ENTITIES_DEFAULT_FIELDS = ("entity_id", "friendly_name", "state", "unit")
+# Layout thumbnails (thumbnails.py): directory under <config>/esphome_designer,
+# widths offered (pixels), default width, formats and WebP quality.
+THUMBNAIL_DIR = "thumbnails"
+THUMBNAIL_WIDTHS = (80, 160, 320)
+THUMBNAIL_WIDTH = 160
+THUMBNAIL_FORMATS = ("png", "webp")
+THUMBNAIL_WEBP_QUALITY = 80
+# Seconds before a device's expected wake at which its page is pre-rendered.
+PRERENDER_LEAD_TIME = 15
+# Default maximum number of rectangles in a partial-refresh diff.
+DIFF_MAX_RECTS = 8
+# Recently delivered frames kept per device as possible diff bases.
+DIFF_BASE_HISTORY = 4
+# Longest ?wait= (seconds) a page request may be held until its frame changes.
+LONG_POLL_MAX_WAIT = 300
+# Render worker pool (render_pool.py): workers, extra jobs allowed to wait
+# beyond them, and number of recent jobs kept for the timing stats.
+CONF_RENDER_WORKERS = "render_workers"
+CONF_RENDER_PROCESSES = "render_processes"
+RENDER_POOL_WORKERS = 2
+RENDER_POOL_QUEUE_SIZE = 16
+RENDER_POOL_HISTORY = 20
+
 # Defaults
 DEFAULT_PAGES = 1
 MIN_PAGES = 1
@@ -0,0 +1,302 @@
+"""
+Dithering of rendered pages to e-paper palettes.
+
+The renderer draws anti-aliased grayscale, or RGB for palettes with colored
+inks (is_color_palette()); panels show 2 to 16 gray levels or a handful of
+inks. dither_image() maps an "L" or "RGB" image onto one of
+PALETTES and returns a "P" image whose pixel values are palette indices
+(for the gray palettes the index is the gray level, 0 = black, as packed by
+framebuffer.py).
+
+Modes:
+
+- threshold: nearest palette colour, no dithering,
+- ordered: 8x8 Bayer matrix,
+- floyd_steinberg / atkinson: error diffusion.
+
+Threshold and ordered are plain NumPy array operations. Floyd-Steinberg
+uses Pillow's quantizer, which implements it in C. Pillow has no Atkinson, so
+that runs a row-wise kernel: error diffusion is sequential along a row, so
+each row is first quantized as a whole, pixels that land exactly on a
+palette colour and receive no error from their left neighbours are skipped,
+and the error for the rows below is spread with array shifts once the row
+is done. Rendered pages are mostly flat colour, so most rows never enter the
+per-pixel loop.
+
+Gray images are only dithered onto the neutral (gray) colours of a palette;
+an ink such as red is never used to approximate a gray.
+
+NumPy is optional (it ships with Home Assistant). Without it, threshold
+also uses Pillow's quantizer and the other modes fall back to
+Floyd-Steinberg. Pillow is imported on first use: api/image.py imports
+PALETTES at setup.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .models import DeviceConfig
+
+_LOGGER = logging.getLogger(__name__)
+
+DITHER_THRESHOLD = "threshold"
+DITHER_ORDERED = "ordered"
+DITHER_FLOYD_STEINBERG = "floyd_steinberg"
+DITHER_ATKINSON = "atkinson"
+DITHER_MODES = (DITHER_THRESHOLD, DITHER_ORDERED, DITHER_FLOYD_STEINBERG, DITHER_ATKINSON)
+
+# DeviceConfig.oepl_dither uses the OpenEPaperLink values.
+_OEPL_DITHER_MODES = {0: DITHER_THRESHOLD, 1: DITHER_FLOYD_STEINBERG, 2: DITHER_ORDERED}
+
+RGB = Tuple[int, int, int]
+
+PALETTES: Dict[str, Tuple[RGB, ...]] = {
+    "bw": ((0, 0, 0), (255, 255, 255)),
+    "gray4": tuple((v, v, v) for v in (0, 85, 170, 255)),
+    "gray16": tuple((v * 17, v * 17, v * 17) for v in range(16)),
+    "bwr": ((0, 0, 0), (255, 255, 255), (255, 0, 0)),
+    # reTerminal E1002 / OpenEPaperLink BWRY tags.
+    "bwry": ((0, 0, 0), (255, 255, 255), (255, 0, 0), (255, 255, 0)),
+    # 7-colour ACeP panels.
+    "acep7": (
+        (0, 0, 0),
+        (255, 255, 255),
+        (0, 255, 0),
+        (0, 0, 255),
+        (255, 0, 0),
+        (255, 255, 0),
+        (255, 128, 0),
+    ),
+}
+
+# Gray palette matching each framebuffer depth.
+GRAY_PALETTES = {1: "bw", 2: "gray4", 4: "gray16"}
+
+# Atkinson error diffusion: (dx, dy, weight); 2/8 of the error is dropped.
+_ATKINSON = ((1, 0, 1 / 8), (2, 0, 1 / 8), (-1, 1, 1 / 8), (0, 1, 1 / 8), (1, 1, 1 / 8), (0, 2, 1 / 8))
+
+# Ordered dithering offset for colour palettes, in channel units.
+_COLOR_SPREAD = 128.0
+
+_warned_fallback = False
+
+
+def device_dither_mode(device: DeviceConfig) -> str:
+    """Dither mode configured for a device (DeviceConfig.oepl_dither)."""
+    return _OEPL_DITHER_MODES.get(device.oepl_dither, DITHER_ORDERED)
+
+
+def prepare_image(image, device: DeviceConfig):
+    """Apply device output settings that precede dithering (inverted_colors)."""
+    if device.inverted_colors:
+        from PIL import ImageOps
+
+        image = ImageOps.invert(image.convert("RGB") if image.mode not in ("L", "RGB") else image)
+    return image
+
+
+def _bayer(n: int):
+    """n x n Bayer threshold matrix, values in (-0.5, 0.5)."""
+    matrix = np.zeros((1, 1))
+    while matrix.shape[0] < n:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]])
+    return (matrix + 0.5) / matrix.size - 0.5
+
+
+def is_color_palette(palette: str) -> bool:
+    """True if the palette has inks other than grays (e.g. red on "bwr")."""
+    return any(not c[0] == c[1] == c[2] for c in PALETTES.get(palette, ()))
+
+
+def _candidates(palette: Sequence[RGB], gray: bool) -> List[int]:
+    """Indices of the palette colours usable for an image."""
+    indices = [i for i, c in enumerate(palette) if not gray or c[0] == c[1] == c[2]]
+    return indices or list(range(len(palette)))
+
+
+def _to_palette_image(indices: bytes, size: Tuple[int, int], palette: Sequence[RGB]):
+    from PIL import Image
+
+    result = Image.frombytes("P", size, indices)
+    result.putpalette([v for color in palette for v in color])
+    return result
+
+
+def dither_image(image, mode: str, palette: str = "bw"):
+    """Dither an image onto a palette; returns a "P" image of palette indices.
+
+    Raises ValueError for an unknown mode or palette.
+    """
+    if mode not in DITHER_MODES:
+        raise ValueError(f"Unsupported dither mode: {mode}")
+    colors = PALETTES.get(palette)
+    if colors is None:
+        raise ValueError(f"Unsupported palette: {palette}")
+
+    if image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
+    gray = image.mode == "L"
+    candidates = _candidates(colors, gray)
+
+    if np is None or mode == DITHER_FLOYD_STEINBERG:
+        indices = _dither_pillow(image, mode, colors, candidates)
+    else:
+        indices = _dither_numpy(image, mode, colors, candidates, gray)
+    return _to_palette_image(indices, image.size, colors)
+
+
+def _dither_pillow(image, mode: str, colors: Sequence[RGB], candidates: List[int]) -> bytes:
+    global _warned_fallback
+    from PIL import Image
+
+    if np is None and mode in (DITHER_ORDERED, DITHER_ATKINSON) and not _warned_fallback:
+        _warned_fallback = True
+        _LOGGER.info("NumPy is not available; using Floyd-Steinberg instead of %s dithering", mode)
+
+    palette_image = Image.new("P", (1, 1))
+    flat = [v for i in candidates for v in colors[i]]
+    # Pad with the first colour so Pillow never picks an unused entry.
+    palette_image.putpalette(flat + flat[:3] * (256 - len(candidates)))
+    dither = Image.Dither.NONE if mode == DITHER_THRESHOLD else Image.Dither.FLOYDSTEINBERG
+    quantized = image.convert("RGB").quantize(palette=palette_image, dither=dither)
+    return quantized.point(candidates + [candidates[0]] * (256 - len(candidates))).tobytes()
+
+
+def _nearest(pixels, targets):
+    """Index into targets (K x C) of the nearest colour for each pixel (... x C)."""
+    if targets.shape[1] == 1:
+        levels = targets[:, 0]
+        lut = np.abs(np.arange(256, dtype=np.float32)[:, None] - levels).argmin(axis=1).astype(np.uint8)
+        return lut[np.rint(np.clip(pixels[..., 0], 0, 255)).astype(np.uint8)]
+    best = np.zeros(pixels.shape[:-1], dtype=np.uint8)
+    best_dist = np.full(pixels.shape[:-1], np.inf, dtype=np.float32)
+    for k, target in enumerate(targets):
+        dist = np.square(pixels - target).sum(axis=-1)
+        closer = dist < best_dist
+        best[closer] = k
+        best_dist = np.minimum(best_dist, dist)
+    return best
+
+
+def _dither_numpy(
+    image, mode: str, colors: Sequence[RGB], candidates: List[int], gray: bool
+) -> bytes:
+    width, height = image.size
+    pixels = np.asarray(image, dtype=np.float32)
+    if gray:
+        pixels = pixels[..., None]
+        targets = np.array([[colors[i][0]] for i in candidates], dtype=np.float32)
+    else:
+        targets = np.array([colors[i] for i in candidates], dtype=np.float32)
+
+    if mode == DITHER_THRESHOLD:
+        local = _nearest(pixels, targets)
+    elif mode == DITHER_ORDERED:
+        spread = 255.0 / max(1, len(candidates) - 1) if gray else _COLOR_SPREAD
+        bayer = _bayer(8)
+        threshold = np.tile(bayer, (height // 8 + 1, width // 8 + 1))[:height, :width, None]
+        local = _nearest(pixels + threshold * spread, targets)
+    else:
+        local = _diffuse(pixels, targets, _ATKINSON)
+
+    lookup = np.array(candidates, dtype=np.uint8)
+    return lookup[local].tobytes()
+
+
+def _diffuse(pixels, targets, kernel):
+    """Row-wise error diffusion; returns target indices (height x width)."""
+    height, width, channels = pixels.shape
+    buf = pixels.copy()
+    result = np.empty((height, width), dtype=np.uint8)
+    forward = [(dx, w) for dx, dy, w in kernel if dy == 0]
+    below = [(dx, dy, w) for dx, dy, w in kernel if dy > 0]
+    target_list = [tuple(float(v) for v in t) for t in targets]
+
+    if channels == 1:
+        # Nearest target for every rounded gray value.
+        levels = [t[0] for t in target_list]
+        lut = [min(range(len(levels)), key=lambda k: abs(levels[k] - v)) for v in range(256)]
+
+    for y in range(height):
+        row = np.clip(buf[y], 0, 255)
+        indices = _nearest(row, targets)
+        errors = row - targets[indices]
+        dirty = np.abs(errors).max(axis=-1) >= 0.5
+
+        if dirty.any():
+            # Sub-level errors are dropped.
+            errors[~dirty] = 0
+            # Sequential pass, starting at the first pixel that leaves an error.
+            idx_row = indices.tolist()
+            clean = (~dirty).tolist()
+            pending = [0.0] * (width + 3)
+            start = int(np.argmax(dirty))
+
+            if channels == 1:
+                values = row[:, 0].tolist()
+                err_row = errors[:, 0].tolist()
+                for x in range(start, width):
+                    carry = pending[x]
+                    if clean[x] and -0.5 < carry < 0.5:
+                        err_row[x] = 0.0
+                        continue
+                    v = values[x] + carry
+                    v = 0.0 if v < 0.0 else 255.0 if v > 255.0 else v
+                    k = lut[int(v + 0.5)]
+                    idx_row[x] = k
+                    e = v - levels[k]
+                    err_row[x] = e
+                    for dx, w in forward:
+                        pending[x + dx] += e * w
+                errors = np.array(err_row, dtype=np.float32)[:, None]
+            else:
+                # RGB, one pending list per channel.
+                pend_r, pend_g, pend_b = pending, [0.0] * (width + 3), [0.0] * (width + 3)
+                values = row.tolist()
+                err_row = errors.tolist()
+                for x in range(start, width):
+                    cr, cg, cb = pend_r[x], pend_g[x], pend_b[x]
+                    if clean[x] and -0.5 < cr < 0.5 and -0.5 < cg < 0.5 and -0.5 < cb < 0.5:
+                        err_row[x] = (0.0, 0.0, 0.0)
+                        continue
+                    r, g, b = values[x]
+                    r = min(255.0, max(0.0, r + cr))
+                    g = min(255.0, max(0.0, g + cg))
+                    b = min(255.0, max(0.0, b + cb))
+                    k, best = 0, None
+                    for i, (tr, tg, tb) in enumerate(target_list):
+                        dist = (r - tr) ** 2 + (g - tg) ** 2 + (b - tb) ** 2
+                        if best is None or dist < best:
+                            k, best = i, dist
+                    idx_row[x] = k
+                    tr, tg, tb = target_list[k]
+                    er, eg, eb = r - tr, g - tg, b - tb
+                    err_row[x] = (er, eg, eb)
+                    for dx, w in forward:
+                        pend_r[x + dx] += er * w
+                        pend_g[x + dx] += eg * w
+                        pend_b[x + dx] += eb * w
+                errors = np.array(err_row, dtype=np.float32)
+            indices = np.array(idx_row, dtype=np.uint8)
+        else:
+            errors = None
+
+        result[y] = indices
+        if errors is None:
+            continue
+        for dx, dy, w in below:
+            if y + dy >= height:
+                continue
+            dst = buf[y + dy]
+            if dx >= 0:
+                dst[dx:] += errors[:width - dx] * w
+            else:
+                dst[:dx] += errors[-dx:] * w
+    return result
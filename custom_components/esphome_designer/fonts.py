@@ -0,0 +1,225 @@
+"""
+Font resolution and caching for the server-side renderer.
+
+Loading a FreeType face means a filesystem lookup plus parsing the font file,
+which used to happen for every text element of every render. FontCache keeps a
+bounded LRU of loaded faces keyed by (family, size, weight, style), shared by
+all renders, and remembers where each (family, weight, style) was found.
+
+Families are the ones the editor offers (Roboto, Inter, Open Sans, ...).
+They are looked up, in order, in:
+- ESPHome's Google Fonts cache (<config>/esphome/.esphome/font), which holds
+  "<Family>@<weight>@<italic>@v1.ttf" files for every font a device compiled,
+- <config>/fonts and the system font directories, as "<Family>-<Style>.ttf"
+  (e.g. "OpenSans-BoldItalic.ttf") or "<Family>.ttf".
+Anything not found falls back to DejaVu Sans, then Pillow's built-in font.
+The Material Design Icons font used by icon widgets (ICON_FONT_FAMILY) is
+bundled with the editor and always found.
+
+Pillow is imported lazily, so this module can be imported without it.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .const import FONT_CACHE_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_FAMILY = "Roboto"
+
+# Material Design Icons, shipped with the editor frontend.
+ICON_FONT_FAMILY = "materialdesignicons-webfont"
+_BUNDLED_FONT_DIR = os.path.join(os.path.dirname(__file__), "frontend")
+
+_SYSTEM_FONT_DIRS = (
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    os.path.expanduser("~/.fonts"),
+)
+
+# CSS weight -> style name used in static font file names.
+_WEIGHT_NAMES = {
+    100: "Thin",
+    200: "ExtraLight",
+    300: "Light",
+    400: "Regular",
+    500: "Medium",
+    600: "SemiBold",
+    700: "Bold",
+    800: "ExtraBold",
+    900: "Black",
+}
+
+# Fallback faces: (bold, italic) -> DejaVu file name (found by Pillow on the
+# system font path; HA containers ship DejaVu).
+_FALLBACK_FILES = {
+    (False, False): "DejaVuSans.ttf",
+    (True, False): "DejaVuSans-Bold.ttf",
+    (False, True): "DejaVuSans-Oblique.ttf",
+    (True, True): "DejaVuSans-BoldOblique.ttf",
+}
+
+FontKey = Tuple[str, int, int, str]
+
+
+def normalize_weight(weight: Any) -> int:
+    """Clamp a CSS font weight to the nearest multiple of 100 in 100..900."""
+    try:
+        value = int(weight)
+    except (TypeError, ValueError):
+        return 400
+    return min(900, max(100, int(round(value / 100.0)) * 100))
+
+
+def normalize_style(style: Any) -> str:
+    return "italic" if style in ("italic", "oblique", True) else "normal"
+
+
+class FontCache:
+    """Bounded LRU of loaded fonts, safe to share between render threads."""
+
+    def __init__(self, max_faces: int = FONT_CACHE_SIZE, search_dirs: Sequence[str] = ()) -> None:
+        self._max_faces = max(1, max_faces)
+        self._search_dirs: List[str] = list(search_dirs)
+        self._faces: OrderedDict[FontKey, Any] = OrderedDict()
+        # (family, weight, style) -> resolved file (None: use the fallback)
+        self._paths: Dict[Tuple[str, int, str], Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._fallbacks = 0
+
+    @property
+    def search_dirs(self) -> List[str]:
+        return list(self._search_dirs)
+
+    def set_search_dirs(self, search_dirs: Sequence[str]) -> None:
+        """Set the user font directories searched before the system ones."""
+        with self._lock:
+            self._search_dirs = list(search_dirs)
+            self._paths.clear()
+            self._faces.clear()
+
+    def get(
+        self,
+        size: int,
+        family: Optional[str] = None,
+        weight: Any = 400,
+        style: Any = "normal",
+    ):
+        """Return a Pillow font for the given family/size/weight/style."""
+        family = (family or DEFAULT_FAMILY).strip() or DEFAULT_FAMILY
+        key: FontKey = (family.casefold(), max(1, int(size)), normalize_weight(weight), normalize_style(style))
+
+        with self._lock:
+            font = self._faces.get(key)
+            if font is not None:
+                self._faces.move_to_end(key)
+                self._hits += 1
+                return font
+            self._misses += 1
+
+        font = self._load(family, *key[1:])
+
+        with self._lock:
+            self._faces[key] = font
+            while len(self._faces) > self._max_faces:
+                self._faces.popitem(last=False)
+                self._evictions += 1
+        return font
+
+    def _load(self, family: str, size: int, weight: int, style: str):
+        from PIL import ImageFont
+
+        path_key = (family.casefold(), weight, style)
+        with self._lock:
+            known = path_key in self._paths
+            path = self._paths.get(path_key)
+        if not known:
+            path = self._resolve(family, weight, style)
+            with self._lock:
+                self._paths[path_key] = path
+
+        if path is not None:
+            try:
+                return ImageFont.truetype(path, size)
+            except OSError as exc:
+                _LOGGER.debug("Failed to load font %s: %s", path, exc)
+
+        with self._lock:
+            self._fallbacks += 1
+        try:
+            return ImageFont.truetype(_FALLBACK_FILES[(weight >= 600, style == "italic")], size)
+        except OSError:
+            pass
+        try:
+            return ImageFont.truetype(_FALLBACK_FILES[(False, False)], size)
+        except OSError:
+            return ImageFont.load_default(size)
+
+    def _resolve(self, family: str, weight: int, style: str) -> Optional[str]:
+        """Find the font file for a family/weight/style, or None."""
+        italic = style == "italic"
+        compact = family.replace(" ", "")
+        style_name = _WEIGHT_NAMES[weight]
+        if italic:
+            style_name = "Italic" if weight == 400 else f"{style_name}Italic"
+
+        candidates = [
+            f"{family}@{weight}@{italic}@v1.ttf",
+            f"{compact}-{style_name}.ttf",
+            f"{compact}-{style_name}.otf",
+        ]
+        if weight == 400 and not italic:
+            candidates += [f"{compact}.ttf", f"{family}.ttf", f"{compact}.otf"]
+        wanted = {name.casefold() for name in candidates}
+
+        for directory in (*self._search_dirs, _BUNDLED_FONT_DIR):
+            for name in candidates:
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    return path
+
+        # System directories are nested (e.g. /usr/share/fonts/truetype/x/).
+        for root_dir in _SYSTEM_FONT_DIRS:
+            for dirpath, _dirnames, filenames in os.walk(root_dir):
+                for filename in filenames:
+                    if filename.casefold() in wanted:
+                        return os.path.join(dirpath, filename)
+
+        _LOGGER.debug("Font %s (%s %s) not found, using fallback", family, weight, style)
+        return None
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "faces": len(self._faces),
+                "max_faces": self._max_faces,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+                "evictions": self._evictions,
+                "fallbacks": self._fallbacks,
+                "resolved": sum(1 for path in self._paths.values() if path is not None),
+            }
+
+
+def font_search_dirs(config_path) -> List[str]:
+    """User font directories for a Home Assistant config (hass.config.path)."""
+    return [
+        config_path("esphome", ".esphome", "font"),
+        config_path("fonts"),
+    ]
+
+
+# Shared by every render.
+FONT_CACHE = FontCache()
@@ -0,0 +1,183 @@
+"""
+Device-native packed framebuffers for the ESPHome Designer Designer.
+
+Decoding a PNG on an ESP32 without PSRAM is slow and needs a full 8-bit
+scratch buffer. As an alternative to the PNG route, a rendered page can be
+served as a raw buffer in the layout the ESPHome waveshare_epaper /
+epaper_spi drivers keep in memory, so the device can copy it straight into
+its display buffer:
+
+- rows top to bottom, each row padded to a whole byte,
+- pixels packed most significant bits first,
+- 1 bpp: 1 = white, 0 = black,
+- 2 bpp / 4 bpp: gray level, 0 = black .. 3 / 15 = white.
+
+The buffer is optionally PackBits run-length encoded (simple enough to
+decode in a few lines of C, and e-paper pages are mostly long white runs)
+and prefixed with a 24-byte little-endian header:
+
+    offset  size  field
+    0       4     magic b"EDFB"
+    4       1     format version (1)
+    5       1     bits per pixel (1, 2 or 4)
+    6       1     flags (bit 0: payload is PackBits encoded)
+    7       1     reserved (0)
+    8       2     width in pixels
+    10      2     height in pixels
+    12      4     size of the unpacked buffer in bytes
+    16      4     size of the payload that follows the header
+    20      4     CRC-32 (zlib) of the unpacked buffer
+"""
+
+from __future__ import annotations
+
+import re
+import struct
+import zlib
+from typing import NamedTuple, Optional, Tuple
+
+FRAMEBUFFER_MAGIC = b"EDFB"
+FRAMEBUFFER_VERSION = 1
+FLAG_PACKBITS = 0x01
+
+SUPPORTED_BPP = (1, 2, 4)
+COMPRESSION_NONE = "none"
+COMPRESSION_RLE = "rle"
+SUPPORTED_COMPRESSION = (COMPRESSION_NONE, COMPRESSION_RLE)
+
+_HEADER = struct.Struct("<4sBBBxHHIII")
+HEADER_SIZE = _HEADER.size
+
+# Runs of three or more equal bytes are worth a PackBits repeat packet.
+_RUN = re.compile(rb"(.)\1{2,}", re.DOTALL)
+
+
+class FramebufferHeader(NamedTuple):
+    bpp: int
+    compressed: bool
+    width: int
+    height: int
+    raw_size: int
+    payload_size: int
+    crc32: int
+
+
+def stride(width: int, bpp: int) -> int:
+    """Bytes per packed row."""
+    return (width * bpp + 7) // 8
+
+
+def pack_image(image, bpp: int) -> bytes:
+    """Pack a Pillow image into a 1/2/4 bpp buffer (see module docstring).
+
+    "P" images are packed as is (pixel values are the gray levels, as
+    returned by dither.dither_image()); others are quantized to the nearest
+    gray level.
+    """
+    if bpp not in SUPPORTED_BPP:
+        raise ValueError(f"Unsupported bits per pixel: {bpp}")
+    from PIL import Image
+
+    if image.mode == "P":
+        return image.tobytes("raw", f"P;{bpp}")
+    if image.mode != "L":
+        image = image.convert("L")
+    levels = (1 << bpp) - 1
+    # Nearest gray level; for 1 bpp this is a threshold at 50 %.
+    quantized = image.point([(value * levels + 127) // 255 for value in range(256)])
+    # Pillow's palette packers do the bit packing (MSB first, rows padded).
+    indexed = Image.frombytes("P", image.size, quantized.tobytes())
+    return indexed.tobytes("raw", f"P;{bpp}")
+
+
+def packbits_encode(data: bytes) -> bytes:
+    """PackBits (TIFF/Apple) run-length encoding."""
+    out = bytearray()
+
+    def literal(chunk: bytes) -> None:
+        for start in range(0, len(chunk), 128):
+            block = chunk[start:start + 128]
+            out.append(len(block) - 1)
+            out.extend(block)
+
+    pos = 0
+    for match in _RUN.finditer(data):
+        if match.start() > pos:
+            literal(data[pos:match.start()])
+        value = match.group(1)
+        count = match.end() - match.start()
+        while count >= 3:
+            n = min(count, 128)
+            out.append(257 - n)
+            out += value
+            count -= n
+        if count:
+            literal(value * count)
+        pos = match.end()
+    if pos < len(data):
+        literal(data[pos:])
+    return bytes(out)
+
+
+def packbits_decode(data: bytes) -> bytes:
+    """Inverse of packbits_encode()."""
+    out = bytearray()
+    pos, size = 0, len(data)
+    while pos < size:
+        n = data[pos]
+        pos += 1
+        if n < 128:
+            out += data[pos:pos + n + 1]
+            pos += n + 1
+        elif n > 128:
+            out += data[pos:pos + 1] * (257 - n)
+            pos += 1
+    return bytes(out)
+
+
+def encode_framebuffer(image, bpp: int, compression: str = COMPRESSION_NONE) -> bytes:
+    """Return header + (optionally PackBits encoded) packed buffer for an image."""
+    return encode_packed(pack_image(image, bpp), *image.size, bpp, compression)
+
+
+def encode_packed(
+    raw: bytes, width: int, height: int, bpp: int, compression: str = COMPRESSION_NONE, crc: Optional[int] = None
+) -> bytes:
+    """encode_framebuffer() for an already packed buffer; crc is zlib.crc32(raw) if known."""
+    if compression not in SUPPORTED_COMPRESSION:
+        raise ValueError(f"Unsupported compression: {compression}")
+    compressed = compression == COMPRESSION_RLE
+    payload = packbits_encode(raw) if compressed else raw
+    header = _HEADER.pack(
+        FRAMEBUFFER_MAGIC,
+        FRAMEBUFFER_VERSION,
+        bpp,
+        FLAG_PACKBITS if compressed else 0,
+        width,
+        height,
+        len(raw),
+        len(payload),
+        zlib.crc32(raw) if crc is None else crc,
+    )
+    return header + payload
+
+
+def decode_framebuffer(data: bytes) -> Tuple[FramebufferHeader, bytes]:
+    """Parse and verify an encoded framebuffer, returning (header, unpacked buffer).
+
+    Raises ValueError on a malformed buffer or CRC mismatch.
+    """
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Framebuffer too short")
+    magic, version, bpp, flags, width, height, raw_size, payload_size, crc = _HEADER.unpack_from(data)
+    if magic != FRAMEBUFFER_MAGIC or version != FRAMEBUFFER_VERSION:
+        raise ValueError("Not a framebuffer")
+    header = FramebufferHeader(bpp, bool(flags & FLAG_PACKBITS), width, height, raw_size, payload_size, crc)
+
+    payload = data[HEADER_SIZE:HEADER_SIZE + payload_size]
+    raw = packbits_decode(payload) if header.compressed else payload
+    if len(raw) != raw_size or raw_size != stride(width, bpp) * height:
+        raise ValueError("Framebuffer size mismatch")
+    if zlib.crc32(raw) != crc:
+        raise ValueError("Framebuffer CRC mismatch")
+    return header, raw
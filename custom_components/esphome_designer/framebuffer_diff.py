@@ -0,0 +1,274 @@
+"""
+Dirty-rectangle diffs between packed framebuffers, for e-paper partial refresh.
+
+A full refresh of a 7.5" panel takes seconds and flashes the screen even if
+only one value changed. The server remembers the last few packed frames it
+delivered to each device (FrameHistory); the device names the one it shows
+by CRC, the diff route compares the current render against it and returns
+only the changed rectangles with their packed pixels, so the device can
+partially refresh those windows.
+
+Rectangles are computed on the packed buffer in whole bytes horizontally
+(8 / 4 / 2 pixels at 1 / 2 / 4 bpp), which is also the x alignment most
+e-paper controllers require for partial windows. Changed tiles are merged
+into at most max_rects rectangles by repeatedly joining the pair whose
+union adds the least unchanged area. Pair costs are kept in a heap, and
+past _MAX_CANDIDATES runs of changed tiles (a page that changed nearly
+everywhere) the changes are sent as their bounding box instead.
+
+Response layout (little endian), header:
+
+    offset  size  field
+    0       4     magic b"EDDF"
+    4       1     format version (1)
+    5       1     bits per pixel (1, 2 or 4)
+    6       1     flags (bit 0: rect payloads are PackBits encoded,
+                         bit 1: full frame, the device has no usable base)
+    7       1     reserved (0)
+    8       2     frame width in pixels
+    10      2     frame height in pixels
+    12      2     number of rectangles
+    14      2     reserved (0)
+    16      4     CRC-32 of the base frame the diff applies to (0 if full)
+    20      4     CRC-32 of the resulting full frame
+
+followed by, per rectangle, x, y, width, height (u16 pixels), the payload
+size (u32) and the payload: height rows of ceil(width * bpp / 8) bytes,
+packed like framebuffer.py.
+"""
+
+from __future__ import annotations
+
+import heapq
+import struct
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .const import DIFF_BASE_HISTORY
+from .framebuffer import FLAG_PACKBITS, packbits_encode, stride
+
+DIFF_MAGIC = b"EDDF"
+DIFF_VERSION = 1
+FLAG_FULL_FRAME = 0x02
+
+_HEADER = struct.Struct("<4sBBBxHHHxxII")
+_RECT = struct.Struct("<HHHHI")
+
+# Tile size, in packed bytes x rows, used to find changed areas.
+_TILE_COLS = 4
+_TILE_ROWS = 8
+
+# Above this many candidate rects, merging is skipped for one bounding box.
+_MAX_CANDIDATES = 128
+
+# Rect in packed units: (byte column, row, byte columns, rows).
+ByteRect = Tuple[int, int, int, int]
+
+
+def _union(a: ByteRect, b: ByteRect) -> ByteRect:
+    x0, y0 = min(a[0], b[0]), min(a[1], b[1])
+    x1 = max(a[0] + a[2], b[0] + b[2])
+    y1 = max(a[1] + a[3], b[1] + b[3])
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def _area(rect: ByteRect) -> int:
+    return rect[2] * rect[3]
+
+
+def _merge_cost(a: ByteRect, b: ByteRect) -> int:
+    """Unchanged area added by joining a and b."""
+    return _area(_union(a, b)) - _area(a) - _area(b)
+
+
+def _merge_rects(rects: List[ByteRect], max_rects: int) -> List[ByteRect]:
+    """Join the cheapest pair of rects until at most max_rects remain."""
+    if len(rects) > _MAX_CANDIDATES:
+        bounds = rects[0]
+        for rect in rects[1:]:
+            bounds = _union(bounds, rect)
+        return [bounds]
+
+    live = dict(enumerate(rects))
+    heap = [
+        (_merge_cost(rects[i], rects[j]), i, j) for i in range(len(rects)) for j in range(i + 1, len(rects))
+    ]
+    heapq.heapify(heap)
+    next_id = len(rects)
+    while len(live) > max_rects:
+        _cost, i, j = heapq.heappop(heap)
+        if i not in live or j not in live:
+            continue  # one side was merged already
+        union = _union(live.pop(i), live.pop(j))
+        for k, other in live.items():
+            heapq.heappush(heap, (_merge_cost(other, union), k, next_id))
+        live[next_id] = union
+        next_id += 1
+    return list(live.values())
+
+
+def dirty_rects(old: bytes, new: bytes, row_bytes: int, height: int, max_rects: int) -> List[ByteRect]:
+    """Changed areas between two packed buffers, in byte columns and rows."""
+    from PIL import Image, ImageChops
+
+    size = (row_bytes, height)
+    diff = ImageChops.difference(Image.frombytes("L", size, old), Image.frombytes("L", size, new))
+    if diff.getbbox() is None:
+        return []
+
+    # Any changed byte makes its tile non-zero after the box reduction.
+    mask = diff.point(lambda v: 255 if v else 0)
+    tiles = mask.reduce((_TILE_COLS, _TILE_ROWS))
+    tile_w, tile_h = tiles.size
+    cells = tiles.tobytes()
+
+    # Horizontal runs of changed tiles, joined downwards when they line up.
+    rects: List[ByteRect] = []
+    open_runs: Dict[Tuple[int, int], int] = {}
+    for ty in range(tile_h):
+        row = cells[ty * tile_w:(ty + 1) * tile_w]
+        runs = []
+        tx = 0
+        while tx < tile_w:
+            if row[tx]:
+                start = tx
+                while tx < tile_w and row[tx]:
+                    tx += 1
+                runs.append((start, tx))
+            else:
+                tx += 1
+        next_runs: Dict[Tuple[int, int], int] = {}
+        for run in runs:
+            index = open_runs.get(run)
+            if index is None:
+                rects.append((run[0], ty, run[1] - run[0], 1))
+                index = len(rects) - 1
+            else:
+                x, y, w, h = rects[index]
+                rects[index] = (x, y, w, h + 1)
+            next_runs[run] = index
+        open_runs = next_runs
+
+    rects = _merge_rects(rects, max(1, max_rects))
+
+    # Tiles -> bytes, shrunk to the exact changed bounding box.
+    result = []
+    for tx, ty, tw, th in rects:
+        box = (
+            tx * _TILE_COLS,
+            ty * _TILE_ROWS,
+            min(row_bytes, (tx + tw) * _TILE_COLS),
+            min(height, (ty + th) * _TILE_ROWS),
+        )
+        bbox = diff.crop(box).getbbox()
+        if bbox is not None:
+            result.append((box[0] + bbox[0], box[1] + bbox[1], bbox[2] - bbox[0], bbox[3] - bbox[1]))
+    return sorted(result, key=lambda r: (r[1], r[0]))
+
+
+def encode_diff(
+    old: Optional[bytes],
+    new: bytes,
+    width: int,
+    height: int,
+    bpp: int,
+    max_rects: int,
+    compress: bool = False,
+) -> Tuple[bytes, int]:
+    """Encode the diff from old to new (both unpacked buffers); old None -> full frame.
+
+    Returns (encoded diff, number of rectangles).
+    """
+    row_bytes = stride(width, bpp)
+    px_per_byte = 8 // bpp
+    full = old is None or len(old) != len(new)
+    rects = [(0, 0, row_bytes, height)] if full else dirty_rects(old, new, row_bytes, height, max_rects)
+
+    flags = (FLAG_PACKBITS if compress else 0) | (FLAG_FULL_FRAME if full else 0)
+    parts = [
+        _HEADER.pack(
+            DIFF_MAGIC,
+            DIFF_VERSION,
+            bpp,
+            flags,
+            width,
+            height,
+            len(rects),
+            0 if full else zlib.crc32(old),
+            zlib.crc32(new),
+        )
+    ]
+    for bx, y, bw, h in rects:
+        payload = b"".join(
+            new[row * row_bytes + bx:row * row_bytes + bx + bw] for row in range(y, y + h)
+        )
+        if compress:
+            payload = packbits_encode(payload)
+        x = bx * px_per_byte
+        parts.append(_RECT.pack(x, y, min(width - x, bw * px_per_byte), h, len(payload)))
+        parts.append(payload)
+    return b"".join(parts), len(rects)
+
+
+@dataclass(slots=True)
+class DeliveredFrame:
+    bpp: int
+    width: int
+    height: int
+    raw: bytes
+    crc32: int
+
+
+class FrameHistory:
+    """Recent packed frames delivered to each device, by CRC (event loop only).
+
+    A sent frame is not necessarily shown: the response may never reach the
+    device. Keeping the last few lets a diff be based on whichever frame the
+    device reports instead of the last one sent.
+    """
+
+    def __init__(self, depth: int = DIFF_BASE_HISTORY) -> None:
+        self._depth = max(1, depth)
+        self._frames: Dict[str, OrderedDict[int, DeliveredFrame]] = {}
+        self._diffs = 0
+        self._full_frames = 0
+        self._unchanged = 0
+        self._bytes_sent = 0
+        self._bytes_full = 0
+
+    def find(self, device_id: str, crc32: int) -> Optional[DeliveredFrame]:
+        """Return the frame with this CRC recently delivered to the device, if any."""
+        frames = self._frames.get(device_id)
+        return frames.get(crc32) if frames else None
+
+    def add(self, device_id: str, frame: DeliveredFrame) -> None:
+        """Remember a delivered frame, dropping the oldest beyond the depth."""
+        frames = self._frames.setdefault(device_id, OrderedDict())
+        frames[frame.crc32] = frame
+        frames.move_to_end(frame.crc32)
+        while len(frames) > self._depth:
+            frames.popitem(last=False)
+
+    def record_diff(self, sent: int, full_size: int, rects: int, full: bool) -> None:
+        """Count a served diff of `sent` bytes against a `full_size` byte frame."""
+        if full:
+            self._full_frames += 1
+        elif rects:
+            self._diffs += 1
+        else:
+            self._unchanged += 1
+        self._bytes_sent += sent
+        self._bytes_full += full_size
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "devices": len(self._frames),
+            "diffs": self._diffs,
+            "full_frames": self._full_frames,
+            "unchanged": self._unchanged,
+            "bytes_sent": self._bytes_sent,
+            "bytes_saved": self._bytes_full - self._bytes_sent,
+        }
@@ -25,6 +25,9 @@ export function getHaHeaders() {
     return headers;
 }
 
+// The entities endpoint caps a response; the picker list is fetched in pages.
+const ENTITY_LIST_PAGE_SIZE = 2000;
+
 // --- Entity Datalist for Autocomplete ---
 export const ENTITY_DATALIST_ID = 'entity-datalist-global';
 let entityDatalistEl = null;
@@ -56,6 +59,23 @@ function updateEntityDatalist(entities) {
     Logger.log(`[EntityDatalist] Updated with ${entities.length} entities`);
 }
 
+/**
+ * Builds an entityStatesCache entry from an entities endpoint (or native HA) item.
+ * @param {Object} entity
+ * @param {Object} [previous] - Existing entry, whose attributes are kept if entity has none.
+ */
+function toCacheEntry(entity, previous) {
+    const formatted = entity.unit ? `${entity.state} ${entity.unit}` : entity.state;
+    return {
+        entity_id: entity.entity_id,
+        name: entity.friendly_name || entity.name || entity.entity_id,
+        state: entity.state,
+        unit: entity.unit,
+        attributes: entity.attributes || previous?.attributes || {},
+        formatted: formatted
+    };
+}
+
 /**
  * Fetches entity states from Home Assistant.
  * Supports both integrated mode (custom component API) and standalone mode (HA REST API).
@@ -85,7 +105,7 @@ export async function fetchEntityStates() {
         const token = getHaToken();
 
         // First try the custom component endpoint
-        apiUrl = `${HA_API_BASE}/entities?domains=sensor,binary_sensor,weather,light,switch,fan,cover,climate,media_player,input_number,number,input_boolean,input_text,input_select,button,input_button,lock,scene,script,automation`;
+        apiUrl = `${HA_API_BASE}/entities?domains=sensor,binary_sensor,weather,light,switch,fan,cover,climate,media_player,input_number,number,input_boolean,input_text,input_select,button,input_button,lock,scene,script,automation&limit=${ENTITY_LIST_PAGE_SIZE}`;
 
         Logger.log("[EntityStates] Fetching from:", apiUrl);
 
@@ -121,6 +141,23 @@ export async function fetchEntityStates() {
 
         let entities = await resp.json();
 
+        // Follow the endpoint's cursor until every page is in.
+        if (!useNativeHaApi && entities && Array.isArray(entities.entities)) {
+            const pages = [...entities.entities];
+            let cursor = entities.next_cursor;
+            while (cursor) {
+                const pageResp = await fetch(`${apiUrl}&cursor=${encodeURIComponent(cursor)}`, {
+                    headers: getHaHeaders(),
+                    signal: controller.signal
+                });
+                if (!pageResp.ok) throw new Error(`HTTP ${pageResp.status}`);
+                const page = await pageResp.json();
+                pages.push(...page.entities);
+                cursor = page.next_cursor;
+            }
+            entities = pages;
+        }
+
         // Transform native HA API response to our format
         if (useNativeHaApi && Array.isArray(entities)) {
             // Native HA /api/states returns full state objects
@@ -151,21 +188,15 @@ export async function fetchEntityStates() {
 
         Logger.log(`[EntityStates] Received ${entities.length} entities`);
 
-        // Cache as array of objects for easier searching/filtering
-        entityStatesCache = entities.map(entity => {
-            const formatted = entity.unit ? `${entity.state} ${entity.unit}` : entity.state;
-            return {
-                entity_id: entity.entity_id,
-                name: entity.name || entity.entity_id,
-                state: entity.state,
-                unit: entity.unit,
-                attributes: entity.attributes || {},
-                formatted: formatted
-            };
-        });
+        // Cache as array of objects for easier searching/filtering.
+        // The list is lean (no attributes); keep the attributes last fetched
+        // for layout entities (fetchLayoutEntityStates).
+        const previous = new Map(entityStatesCache.map(e => [e.entity_id, e]));
+        entityStatesCache = entities.map(entity => toCacheEntry(entity, previous.get(entity.entity_id)));
 
         haEntitiesLoaded = true;
         haEntitiesLoadError = false;
+        lastFullEntityFetch = Date.now();
         Logger.log(`[EntityStates] Cached ${entityStatesCache.length} entity states`);
 
         // Also populate AppState.entityStates as lookup object for render functions
@@ -182,6 +213,9 @@ export async function fetchEntityStates() {
 
         emit(EVENTS.ENTITIES_LOADED, entityStatesCache);
 
+        // The list carries no attributes; fetch them for the layout's entities.
+        if (!useNativeHaApi) setTimeout(fetchLayoutEntityStates, 0);
+
         return entityStatesCache;
     } catch (err) {
         if (err.name === 'AbortError') {
@@ -196,9 +230,119 @@ export async function fetchEntityStates() {
     }
 }
 
+// --- Layout Entity States ---
+const LAYOUT_ENTITY_FIELDS = "entity_id,friendly_name,state,unit,attributes";
+const LAYOUT_ENTITY_CHUNK = 100; // ids per request, keeps URLs short
+
+/**
+ * Collects the entity ids referenced by the widgets of the current layout.
+ * @returns {string[]}
+ */
+export function getLayoutEntityIds() {
+    const ids = new Set();
+    const isEntityKey = key => key === "entity" || key === "entity_id" ||
+        key.endsWith("_entity") || key.endsWith("_entity_id");
+    (AppState?.pages || []).forEach(page => {
+        (page.widgets || []).forEach(widget => {
+            if (widget.entity_id) ids.add(widget.entity_id);
+            if (widget.condition_entity) ids.add(widget.condition_entity);
+            Object.entries(widget.props || {}).forEach(([key, value]) => {
+                if (typeof value === "string" && value.includes(".") && isEntityKey(key)) ids.add(value);
+                else if (Array.isArray(value) && key.endsWith("entities")) {
+                    value.forEach(v => { if (typeof v === "string" && v) ids.add(v); });
+                }
+            });
+        });
+    });
+    return [...ids];
+}
+
+/**
+ * Replaces or adds cache entries for entities fetched with their attributes.
+ * @param {Array} entities - Items from the entities endpoint.
+ * @returns {Array} The new cache entries.
+ */
+function mergeCacheEntries(entities) {
+    const index = new Map(entityStatesCache.map((e, i) => [e.entity_id, i]));
+    return entities.map(entity => {
+        const entry = toCacheEntry(entity);
+        if (index.has(entry.entity_id)) entityStatesCache[index.get(entry.entity_id)] = entry;
+        else entityStatesCache.push(entry);
+        if (AppState) {
+            AppState.entityStates = AppState.entityStates || {};
+            AppState.entityStates[entry.entity_id] = entry;
+        }
+        return entry;
+    });
+}
+
+/**
+ * Fetches one entity with its attributes (the entity list is lean) and
+ * merges it into the cache, e.g. for an entity just picked for a widget.
+ * @param {string} entityId
+ * @returns {Promise<Object|null>} The cache entry, or the cached one if the fetch fails.
+ */
+export async function fetchEntityWithAttributes(entityId) {
+    const cached = entityStatesCache.find(e => e.entity_id === entityId) || null;
+    if (!hasHaBackend() || !entityId) return cached;
+    if (cached && Object.keys(cached.attributes || {}).length > 0) return cached;
+    try {
+        const resp = await fetch(
+            `${HA_API_BASE}/entities?ids=${encodeURIComponent(entityId)}&fields=${LAYOUT_ENTITY_FIELDS}`,
+            { headers: getHaHeaders() }
+        );
+        if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+        const [entry] = mergeCacheEntries(await resp.json());
+        return entry || cached;
+    } catch (err) {
+        Logger.warn(`[EntityStates] Could not fetch attributes of ${entityId}:`, err);
+        return cached;
+    }
+}
+
+/**
+ * Refreshes the states (with attributes) of the entities the current layout
+ * uses, via the entities endpoint's ids= filter, and merges them into the cache.
+ * Falls back to a full fetch when the cache is empty or the endpoint fails.
+ * @returns {Promise<Array>} The entity cache.
+ */
+export async function fetchLayoutEntityStates() {
+    if (!hasHaBackend()) return [];
+    if (!haEntitiesLoaded) return fetchEntityStates();
+    const ids = getLayoutEntityIds();
+    if (ids.length === 0 || entityStatesFetchInProgress) return entityStatesCache;
+
+    entityStatesFetchInProgress = true;
+    try {
+        const updated = [];
+        for (let i = 0; i < ids.length; i += LAYOUT_ENTITY_CHUNK) {
+            const chunk = ids.slice(i, i + LAYOUT_ENTITY_CHUNK).map(encodeURIComponent).join(",");
+            const resp = await fetch(`${HA_API_BASE}/entities?ids=${chunk}&fields=${LAYOUT_ENTITY_FIELDS}`, {
+                headers: getHaHeaders()
+            });
+            if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+            updated.push(...await resp.json());
+        }
+
+        mergeCacheEntries(updated);
+        emit(EVENTS.ENTITIES_LOADED, entityStatesCache);
+        return entityStatesCache;
+    } catch (err) {
+        Logger.warn("[EntityStates] Layout entity refresh failed, fetching all:", err);
+        entityStatesFetchInProgress = false;
+        return fetchEntityStates();
+    } finally {
+        entityStatesFetchInProgress = false;
+    }
+}
+
 // --- Periodic Entity State Polling ---
 let entityPollingInterval = null;
+let lastFullEntityFetch = 0;
 const ENTITY_POLL_INTERVAL_MS = 5000; // Poll every 5 seconds
+// Polls only refresh the layout's entities; the full (lean) list, which picks
+// up added or renamed entities, is refetched at this interval.
+const ENTITY_LIST_REFRESH_MS = 60000;
 
 /**
  * Starts periodic polling for entity state updates.
@@ -211,7 +355,11 @@ export function startEntityPolling() {
     Logger.log(`[EntityPolling] Starting periodic entity state polling (every ${ENTITY_POLL_INTERVAL_MS/1000}s)`);
     entityPollingInterval = setInterval(async () => {
         try {
-            await fetchEntityStates();
+            if (Date.now() - lastFullEntityFetch >= ENTITY_LIST_REFRESH_MS) {
+                await fetchEntityStates();
+            } else {
+                await fetchLayoutEntityStates();
+            }
         } catch (err) {
             Logger.warn("[EntityPolling] Error during poll:", err);
         }
@@ -1,6 +1,6 @@
 import { hasHaBackend } from '../utils/env.js';
 import { Logger } from '../utils/logger.js';
-import { fetchEntityStates } from '../io/ha_api.js';
+import { fetchEntityStates, fetchEntityWithAttributes } from '../io/ha_api.js';
 import { AppState } from '../core/state.js';
 
 /**
@@ -128,21 +128,26 @@ export function openEntityPickerForWidget(widget, inputEl, callback) {
                         title: e.name || e.entity_id || ""
                     });
 
-                    // Automate Graph settings based on attributes
-                    if (widget.type === "graph" && e.attributes) {
-                        const attrs = e.attributes;
-                        const updates = {};
-                        if (attrs.unit_of_measurement === "%") {
-                            if (!widget.props.min_value) updates.min_value = "0";
-                            if (!widget.props.max_value) updates.max_value = "100";
-                        }
-                        if (attrs.min !== undefined && !widget.props.min_value) updates.min_value = String(attrs.min);
-                        if (attrs.max !== undefined && !widget.props.max_value) updates.max_value = String(attrs.max);
+                    // Automate Graph settings based on attributes. The entity list
+                    // carries none, so fetch the picked entity's first.
+                    if (widget.type === "graph") {
+                        fetchEntityWithAttributes(e.entity_id).then((entity) => {
+                            const current = AppState.getWidgetById(widget.id);
+                            if (!current || current.entity_id !== e.entity_id) return;
+                            const attrs = entity?.attributes || {};
+                            const props = current.props || {};
+                            const updates = {};
+                            if ((attrs.unit_of_measurement ?? entity?.unit ?? e.unit) === "%") {
+                                if (!props.min_value) updates.min_value = "0";
+                                if (!props.max_value) updates.max_value = "100";
+                            }
+                            if (attrs.min !== undefined && !props.min_value) updates.min_value = String(attrs.min);
+                            if (attrs.max !== undefined && !props.max_value) updates.max_value = String(attrs.max);
 
-                        if (Object.keys(updates).length > 0) {
-                            const newProps = { ...widget.props, ...updates };
-                            AppState.updateWidget(widget.id, { props: newProps });
-                        }
+                            if (Object.keys(updates).length > 0) {
+                                AppState.updateWidget(widget.id, { props: { ...props, ...updates } });
+                            }
+                        });
                     }
 
                     // Automate Unit for Sensor Text AND auto-detect text sensors
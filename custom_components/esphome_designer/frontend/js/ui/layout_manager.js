@@ -17,6 +17,8 @@ class LayoutManager {
         this.modal = null;
         this.currentLayoutId = "reterminal_e1001"; // Default
         this.layouts = [];
+        // Layout id -> { url: thumbnail URL, blobUrl: object URL of the fetched image }.
+        this.thumbnailBlobs = new Map();
     }
 
     init() {
@@ -108,6 +110,7 @@ class LayoutManager {
         if (this.modal) {
             this.modal.classList.add("hidden");
         }
+        this.clearThumbnails();
     }
 
     setStatus(message, type = "info") {
@@ -193,6 +196,7 @@ class LayoutManager {
             return `
                 <tr style="border-bottom: 1px solid var(--border-subtle); ${isCurrent ? 'background: var(--accent-soft);' : ''}">
                     <td style="padding: 8px 4px;">
+                        ${layout.page_count > 0 ? `<img data-layout-id="${this.escapeHtml(layout.id)}" data-thumbnail="${this.getThumbnailUrl(layout)}" alt="" loading="lazy" style="display: block; width: 80px; margin-bottom: 4px; border: 1px solid var(--border); border-radius: 2px;" onerror="this.remove()">` : ''}
                         <span style="font-weight: 500;">${this.escapeHtml(layout.name)}</span>
                         ${isCurrent ? '<span style="background: var(--accent); color: white; font-size: 9px; padding: 2px 4px; border-radius: 2px; margin-left: 4px;">current</span>' : ''}
                         ${duplicateNames ? '<br><span style="font-size: 9px; color: var(--muted);">' + this.escapeHtml(layout.id) + '</span>' : ''}
@@ -209,6 +213,48 @@ class LayoutManager {
                 </tr>
             `;
         }).join("");
+
+        this.loadThumbnails(tbody);
+    }
+
+    /**
+     * Fills in the thumbnails of a rendered list. The thumbnail route needs
+     * authentication, which an <img src> cannot send, so the images are
+     * fetched with the HA headers and shown from object URLs. One object URL
+     * is kept per layout; it is revoked when a newer revision replaces it.
+     */
+    loadThumbnails(container) {
+        container.querySelectorAll("img[data-thumbnail]").forEach(async (img) => {
+            const { layoutId, thumbnail: url } = img.dataset;
+            try {
+                let entry = this.thumbnailBlobs.get(layoutId);
+                if (!entry || entry.url !== url) {
+                    const resp = await fetch(url, { headers: getHaHeaders() });
+                    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+                    const blobUrl = URL.createObjectURL(await resp.blob());
+                    // Another render may have stored an entry while this one was fetching.
+                    const previous = this.thumbnailBlobs.get(layoutId);
+                    if (previous) URL.revokeObjectURL(previous.blobUrl);
+                    entry = { url, blobUrl };
+                    this.thumbnailBlobs.set(layoutId, entry);
+                }
+                img.src = entry.blobUrl;
+            } catch (err) {
+                Logger.warn("[LayoutManager] Could not load thumbnail:", err);
+                img.remove();
+            }
+        });
+    }
+
+    /** Revokes every thumbnail object URL, e.g. when the manager closes. */
+    clearThumbnails() {
+        this.thumbnailBlobs.forEach(entry => URL.revokeObjectURL(entry.blobUrl));
+        this.thumbnailBlobs.clear();
+    }
+
+    getThumbnailUrl(layout) {
+        // The revision only busts the browser cache; the server keys thumbnails by it too.
+        return `${HA_API_BASE}/layouts/${encodeURIComponent(layout.id)}/thumbnail?width=80&rev=${layout.revision ?? ""}`;
     }
 
     escapeHtml(text) {
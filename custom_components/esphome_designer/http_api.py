@@ -7,11 +7,16 @@ from __future__ import annotations
 import logging
 from homeassistant.core import HomeAssistant
 
+from .framebuffer_diff import FrameHistory
+from .render_cache import PageRenderCache
+from .scheduler import PreRenderScheduler
 from .storage import DashboardStorage
+from .thumbnails import LayoutThumbnails
 from .api.layout import (
     ReTerminalLayoutView, 
     ReTerminalLayoutsListView, 
-    ReTerminalLayoutDetailView
+    ReTerminalLayoutDetailView,
+    ReTerminalLayoutThumbnailView,
 )
 from .api.entities import ReTerminalEntitiesView
 from .api.proxy import (
@@ -26,6 +31,12 @@ from .api.import_export import (
 from .api.base import DesignerBaseView
 from .api.hardware import ReTerminalHardwareListView, ReTerminalHardwareUploadView
 from .api.history import HistoryProxyView
+from .api.image import (
+    ReTerminalPageDiffView,
+    ReTerminalPageFramebufferView,
+    ReTerminalPageImageView,
+)
+from .api.stats import ReTerminalStatsView
 from .api.simulator import (
     SimulatorCheckView,
     SimulatorStartView,
@@ -35,7 +46,14 @@ from .api.simulator import (
 
 _LOGGER = logging.getLogger(__name__)
 
-async def async_register_http_views(hass: HomeAssistant, storage: DashboardStorage) -> None:
+async def async_register_http_views(
+    hass: HomeAssistant,
+    storage: DashboardStorage,
+    render_cache: PageRenderCache,
+    scheduler: PreRenderScheduler,
+    frames: FrameHistory,
+    thumbnails: LayoutThumbnails,
+) -> None:
     """Register all HTTP views with the Home Assistant application."""
     
     views = [
@@ -43,6 +61,12 @@ async def async_register_http_views(hass: HomeAssistant, storage: DashboardStora
         ReTerminalLayoutView(hass, storage),
         ReTerminalLayoutsListView(hass, storage),
         ReTerminalLayoutDetailView(hass, storage),
+        ReTerminalLayoutThumbnailView(hass, storage, thumbnails),
+
+        # Device-facing rendering
+        ReTerminalPageImageView(hass, storage, render_cache, scheduler, frames),
+        ReTerminalPageFramebufferView(hass, storage, render_cache, scheduler, frames),
+        ReTerminalPageDiffView(hass, storage, render_cache, scheduler, frames),
         
         # Entities & Proxies
         ReTerminalEntitiesView(hass),
@@ -64,6 +88,9 @@ async def async_register_http_views(hass: HomeAssistant, storage: DashboardStora
         SimulatorStartView(hass),
         SimulatorStopView(hass),
         SimulatorStatusView(hass),
+
+        # Diagnostics
+        ReTerminalStatsView(hass, storage, render_cache, scheduler, frames, thumbnails),
     ]
 
     for view in views:
@@ -0,0 +1,67 @@
+"""
+Static layer cache for the server-side renderer.
+
+Most widgets on a page (labels, shapes, lines, images) only change when the
+layout is edited; only state-dependent ones (sensor values, clocks, lists)
+change between renders. The renderer draws the static widgets once into a
+base image cached here under (device_id, layout revision, page id, dark
+mode) and, on every render, only draws the dynamic widgets onto a copy of
+it. See renderer.split_layers() for how widgets are assigned to a layer.
+
+Renders run in executor threads, so the cache is locked.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+from .const import STATIC_LAYER_CACHE_SIZE
+
+
+class StaticLayerCache:
+    """Bounded LRU of rendered static base layers (Pillow images)."""
+
+    def __init__(self, max_layers: int = STATIC_LAYER_CACHE_SIZE) -> None:
+        self._max_layers = max(1, max_layers)
+        self._layers: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable):
+        """Return the cached base layer for key, or None. Do not draw on it."""
+        with self._lock:
+            layer = self._layers.get(key)
+            if layer is None:
+                self._misses += 1
+                return None
+            self._layers.move_to_end(key)
+            self._hits += 1
+            return layer
+
+    def put(self, key: Hashable, layer) -> None:
+        with self._lock:
+            self._layers[key] = layer
+            self._layers.move_to_end(key)
+            while len(self._layers) > self._max_layers:
+                self._layers.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._layers.clear()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "layers": len(self._layers),
+                "max_layers": self._max_layers,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+# Shared by every render.
+STATIC_LAYER_CACHE = StaticLayerCache()
@@ -0,0 +1,564 @@
+"""
+Partial (in-place) layout updates for the ESPHome Designer Designer.
+
+The editor used to POST the whole layout document for every change, which
+made the server re-parse every page and widget. This module applies a list of
+edit operations directly to the DeviceConfig/PageConfig/WidgetConfig objects,
+so the work scales with the size of the edit instead of the layout.
+
+Two op flavours are accepted and can be mixed in one list:
+
+- RFC 6902 JSON Patch ops ("add", "remove", "replace", "move", "copy",
+  "test"). Paths address the layout as serialized by DeviceConfig.to_dict(),
+  e.g. "/pages/0/widgets/3/x", "/pages/1/widgets/-" or
+  "/pages/0/widgets/2/props/color".
+
+- Widget-level ops, addressing widgets by id:
+    {"op": "add_widget", "page": 0, "widget": {...}, "index": 3}
+    {"op": "update_widget", "page": 0, "id": "w1", "changes": {"x": 10, "props": {"color": "red"}}}
+    {"op": "remove_widget", "page": 0, "id": "w1"}
+    {"op": "move_widget", "page": 0, "id": "w1", "to_page": 1, "index": 0}
+    {"op": "reorder_page", "from": 2, "to": 0}
+  "page" may be a page index or a page id. In update_widget, "props" is
+  merged key by key and a null value removes the key.
+
+A patch is applied atomically: if any op fails, the ops already applied are
+rolled back through an undo log and the layout is left untouched.
+"""
+
+from __future__ import annotations
+
+import copy
+import functools
+import re
+from dataclasses import MISSING, fields, is_dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .models import DeviceConfig, PageConfig, WidgetConfig
+
+# Fields owned by storage (identity, revision) that must not be patched.
+_READ_ONLY_FIELDS = {"device_id", "revision"}
+
+# Widget geometry fields; changing them re-runs clamp_to_canvas().
+_GEOMETRY_FIELDS = ("x", "y", "width", "height")
+
+_Undo = List[Callable[[], None]]
+
+# "Optional[X]" / "X | None" model annotations (they are strings, see
+# `from __future__ import annotations` in models.py).
+_OPTIONAL_RE = re.compile(r"^Optional\[(.+)\]$|^(.+?)\s*\|\s*None$")
+
+
+class LayoutPatchError(ValueError):
+    """Raised when a patch is malformed or cannot be applied."""
+
+
+class LayoutPatchTestFailed(LayoutPatchError):
+    """Raised when an RFC 6902 "test" op does not match."""
+
+
+class LayoutPatchDuplicateId(LayoutPatchError):
+    """Raised when a patch would give two widgets on a page the same id."""
+
+
+def apply_layout_patch(device: DeviceConfig, ops: List[Dict[str, Any]]) -> None:
+    """Apply ops to device in place; all-or-nothing."""
+    if not isinstance(ops, list):
+        raise LayoutPatchError("patch must be a list of operations")
+
+    undo: _Undo = []
+    try:
+        for index, op in enumerate(ops):
+            if not isinstance(op, dict) or not isinstance(op.get("op"), str):
+                raise LayoutPatchError(f"operation {index} is not an object with an 'op'")
+            handler = _OPS.get(op["op"])
+            if handler is None:
+                raise LayoutPatchError(f"operation {index}: unsupported op '{op['op']}'")
+            try:
+                handler(device, op, undo)
+            except LayoutPatchError as exc:
+                raise type(exc)(f"operation {index} ({op['op']}): {exc}") from exc
+            except Exception as exc:  # noqa: BLE001
+                raise LayoutPatchError(f"operation {index} ({op['op']}): {exc}") from exc
+        pages, page_list, current_page = device.pages, list(device.pages or []), device.current_page
+        undo.append(lambda: _restore_pages(device, pages, page_list, current_page))
+        try:
+            device.ensure_pages()
+        except Exception as exc:  # noqa: BLE001
+            raise LayoutPatchError(f"patched layout is invalid: {exc}") from exc
+    except Exception:
+        for revert in reversed(undo):
+            revert()
+        raise
+
+
+def _restore_pages(device: DeviceConfig, pages: Any, page_list: List[PageConfig], current_page: Any) -> None:
+    """Undo ensure_pages(): it may replace the list, append pages and clamp current_page."""
+    if isinstance(pages, list):
+        pages[:] = page_list
+    device.pages = pages
+    device.current_page = current_page
+
+
+#
+# Value conversion
+#
+
+
+def _to_plain(value: Any) -> Any:
+    """Serialize model objects (or containers of them) to plain JSON values."""
+    if isinstance(value, (DeviceConfig, PageConfig, WidgetConfig)):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_to_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _to_plain(v) for k, v in value.items()}
+    return value
+
+
+def _to_page(value: Any) -> PageConfig:
+    if isinstance(value, PageConfig):
+        return value
+    if not isinstance(value, dict):
+        raise LayoutPatchError("page must be an object")
+    return PageConfig.from_dict(value)
+
+
+def _to_widget(value: Any) -> WidgetConfig:
+    if isinstance(value, WidgetConfig):
+        return value
+    if not isinstance(value, dict):
+        raise LayoutPatchError("widget must be an object")
+    return WidgetConfig.from_dict(value)
+
+
+def _list_element_converter(owner: Any, name: str) -> Callable[[Any], Any]:
+    if isinstance(owner, DeviceConfig) and name == "pages":
+        return _to_page
+    if isinstance(owner, PageConfig) and name == "widgets":
+        return _to_widget
+    return copy.deepcopy
+
+
+def _coerce_field(obj: Any, name: str, value: Any) -> Any:
+    """Coerce a JSON value for a model attribute, mirroring from_dict()."""
+    if name in _READ_ONLY_FIELDS:
+        raise LayoutPatchError(f"'{name}' cannot be patched")
+
+    convert = _list_element_converter(obj, name)
+    if convert is not copy.deepcopy:
+        if not isinstance(value, list):
+            raise LayoutPatchError(f"'{name}' must be a list")
+        converted = [convert(v) for v in value]
+        if convert is _to_widget:
+            _check_unique_widget_ids(obj, converted)
+        else:
+            for page in converted:
+                _check_unique_widget_ids(page, page.widgets)
+        return converted
+
+    if isinstance(obj, WidgetConfig) and name in ("condition_min", "condition_max"):
+        if value is None or value == "":
+            return None
+        return float(value)
+
+    if isinstance(obj, PageConfig) and name == "dark_mode":
+        if value is not None and value not in ("inherit", "light", "dark"):
+            raise LayoutPatchError("dark_mode must be 'inherit', 'light' or 'dark'")
+        return value
+
+    if isinstance(obj, WidgetConfig) and name in _GEOMETRY_FIELDS:
+        return _to_int(name, value)
+
+    kind, nullable = _field_types(type(obj)).get(name, ("Any", True))
+    if value is None:
+        if not nullable:
+            raise LayoutPatchError(f"'{name}' cannot be null")
+        return None
+    if kind == "bool":
+        if not isinstance(value, bool):
+            raise LayoutPatchError(f"'{name}' must be true or false")
+        return value
+    if kind == "int":
+        return _to_int(name, value)
+    if kind == "str":
+        if not isinstance(value, str):
+            raise LayoutPatchError(f"'{name}' must be a string")
+        return value
+    if kind.startswith("Dict[") and not isinstance(value, dict):
+        raise LayoutPatchError(f"'{name}' must be an object")
+    if kind.startswith("List["):
+        if not isinstance(value, list):
+            raise LayoutPatchError(f"'{name}' must be a list")
+        if kind == "List[str]" and not all(isinstance(v, str) for v in value):
+            raise LayoutPatchError(f"'{name}' must be a list of strings")
+    return copy.deepcopy(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _field_types(cls: type) -> Dict[str, Tuple[str, bool]]:
+    """Field name -> (annotated type without Optional, nullable) of a model class."""
+    types = {}
+    for f in fields(cls):
+        annotation = str(f.type).strip()
+        match = _OPTIONAL_RE.match(annotation)
+        if match:
+            types[f.name] = ((match.group(1) or match.group(2)).strip(), True)
+        else:
+            types[f.name] = (annotation, False)
+    return types
+
+
+def _to_int(name: str, value: Any) -> int:
+    """Integer field value: a number or numeric string, never null or a bool."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise LayoutPatchError(f"'{name}' must be a number")
+    try:
+        return int(value) if isinstance(value, int) else int(float(value))
+    except (ValueError, OverflowError) as exc:
+        raise LayoutPatchError(f"'{name}' must be a number") from exc
+
+
+def _field_default(obj: Any, name: str) -> Any:
+    for f in fields(obj):
+        if f.name == name:
+            if f.default is not MISSING:
+                return f.default
+            if f.default_factory is not MISSING:  # type: ignore[misc]
+                return f.default_factory()  # type: ignore[misc]
+            break
+    raise LayoutPatchError(f"'{name}' is required and cannot be removed")
+
+
+#
+# Primitive mutations (each records its inverse)
+#
+
+
+def _set_attr(obj: Any, name: str, value: Any, undo: _Undo) -> None:
+    old = getattr(obj, name)
+    setattr(obj, name, value)
+    undo.append(lambda: setattr(obj, name, old))
+    if isinstance(obj, WidgetConfig) and name in _GEOMETRY_FIELDS:
+        geometry = tuple(getattr(obj, g) for g in _GEOMETRY_FIELDS)
+        obj.clamp_to_canvas()
+        undo.append(lambda: _restore_geometry(obj, geometry))
+
+
+def _restore_geometry(widget: WidgetConfig, geometry: Tuple[int, ...]) -> None:
+    for name, value in zip(_GEOMETRY_FIELDS, geometry):
+        setattr(widget, name, value)
+
+
+def _list_insert(lst: List[Any], index: int, value: Any, undo: _Undo) -> None:
+    lst.insert(index, value)
+    undo.append(lambda: lst.pop(index))
+
+
+def _list_pop(lst: List[Any], index: int, undo: _Undo) -> Any:
+    value = lst.pop(index)
+    undo.append(lambda: lst.insert(index, value))
+    return value
+
+
+def _list_set(lst: List[Any], index: int, value: Any, undo: _Undo) -> None:
+    old = lst[index]
+    lst[index] = value
+    undo.append(lambda: lst.__setitem__(index, old))
+
+
+def _dict_set(dct: Dict[str, Any], key: str, value: Any, undo: _Undo) -> None:
+    if key in dct:
+        old = dct[key]
+        undo.append(lambda: dct.__setitem__(key, old))
+    else:
+        undo.append(lambda: dct.pop(key, None))
+    dct[key] = value
+
+
+def _dict_del(dct: Dict[str, Any], key: str, undo: _Undo) -> Any:
+    old = dct.pop(key)
+    undo.append(lambda: dct.__setitem__(key, old))
+    return old
+
+
+#
+# JSON Pointer resolution
+#
+
+
+def _parse_pointer(path: Any) -> List[str]:
+    if not isinstance(path, str) or (path and not path.startswith("/")):
+        raise LayoutPatchError(f"invalid JSON pointer {path!r}")
+    if path == "":
+        return []
+    return [t.replace("~1", "/").replace("~0", "~") for t in path[1:].split("/")]
+
+
+def _list_index(lst: List[Any], token: str, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(lst)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise LayoutPatchError(f"invalid list index {token!r}")
+    index = int(token)
+    limit = len(lst) if allow_end else len(lst) - 1
+    if index > limit:
+        raise LayoutPatchError(f"list index {index} out of range")
+    return index
+
+
+def _child(container: Any, token: str) -> Any:
+    if is_dataclass(container):
+        if token not in {f.name for f in fields(container)}:
+            raise LayoutPatchError(f"unknown field {token!r}")
+        return getattr(container, token)
+    if isinstance(container, list):
+        return container[_list_index(container, token, allow_end=False)]
+    if isinstance(container, dict):
+        if token not in container:
+            raise LayoutPatchError(f"missing key {token!r}")
+        return container[token]
+    raise LayoutPatchError(f"cannot descend into {type(container).__name__}")
+
+
+def _resolve_parent(device: DeviceConfig, path: Any) -> Tuple[Any, Any, str, str]:
+    """Return (owner, parent, owner_field, last_token) for a pointer.
+
+    owner/owner_field describe the model attribute holding `parent` when
+    `parent` is a list, so list elements can be converted to model objects.
+    """
+    tokens = _parse_pointer(path)
+    if not tokens:
+        raise LayoutPatchError("the root document cannot be replaced")
+
+    owner: Any = None
+    owner_field = ""
+    parent: Any = device
+    for token in tokens[:-1]:
+        if is_dataclass(parent):
+            owner, owner_field = parent, token
+        parent = _child(parent, token)
+    return owner, parent, owner_field, tokens[-1]
+
+
+def _get(device: DeviceConfig, path: Any) -> Any:
+    value: Any = device
+    for token in _parse_pointer(path):
+        value = _child(value, token)
+    return value
+
+
+def _add(device: DeviceConfig, path: Any, value: Any, undo: _Undo, replace: bool = False) -> None:
+    owner, parent, owner_field, token = _resolve_parent(device, path)
+
+    if is_dataclass(parent):
+        _child(parent, token)  # validates the field name
+        value = _coerce_field(parent, token, value)
+        if isinstance(parent, WidgetConfig) and token == "id" and isinstance(owner, PageConfig):
+            _check_widget_id(owner, value, parent)
+        _set_attr(parent, token, value, undo)
+    elif isinstance(parent, list):
+        convert = _list_element_converter(owner, owner_field)
+        index = _list_index(parent, token, allow_end=not replace)
+        if isinstance(owner, PageConfig) and owner_field == "widgets":
+            value = convert(value)
+            _check_widget_id(owner, value.id, parent[index] if replace else None)
+        elif isinstance(owner, DeviceConfig) and owner_field == "pages":
+            value = convert(value)
+            _check_unique_widget_ids(value, value.widgets)
+        if replace:
+            _list_set(parent, index, convert(value), undo)
+        else:
+            _list_insert(parent, index, convert(value), undo)
+    elif isinstance(parent, dict):
+        if replace and token not in parent:
+            raise LayoutPatchError(f"missing key {token!r}")
+        _dict_set(parent, token, copy.deepcopy(value), undo)
+    else:
+        raise LayoutPatchError(f"cannot modify {type(parent).__name__}")
+
+
+def _remove(device: DeviceConfig, path: Any, undo: _Undo) -> Any:
+    _owner, parent, _owner_field, token = _resolve_parent(device, path)
+
+    if is_dataclass(parent):
+        old = _child(parent, token)
+        if token in _READ_ONLY_FIELDS:
+            raise LayoutPatchError(f"'{token}' cannot be patched")
+        _set_attr(parent, token, _field_default(parent, token), undo)
+        return old
+    if isinstance(parent, list):
+        return _list_pop(parent, _list_index(parent, token, allow_end=False), undo)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise LayoutPatchError(f"missing key {token!r}")
+        return _dict_del(parent, token, undo)
+    raise LayoutPatchError(f"cannot modify {type(parent).__name__}")
+
+
+#
+# RFC 6902 ops
+#
+
+
+def _op_add(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    if "value" not in op:
+        raise LayoutPatchError("missing 'value'")
+    _add(device, op.get("path"), op["value"], undo)
+
+
+def _op_replace(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    if "value" not in op:
+        raise LayoutPatchError("missing 'value'")
+    _add(device, op.get("path"), op["value"], undo, replace=True)
+
+
+def _op_remove(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    _remove(device, op.get("path"), undo)
+
+
+def _op_move(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    src, dst = op.get("from"), op.get("path")
+    if isinstance(src, str) and isinstance(dst, str) and dst.startswith(src + "/"):
+        raise LayoutPatchError("cannot move a value into one of its children")
+    if src == dst:
+        return
+    # Model objects are moved as-is; no serialization round trip.
+    value = _remove(device, src, undo)
+    _add(device, dst, value, undo)
+
+
+def _op_copy(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    value = _to_plain(_get(device, op.get("from")))
+    _add(device, op.get("path"), value, undo)
+
+
+def _op_test(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    if "value" not in op:
+        raise LayoutPatchError("missing 'value'")
+    if _to_plain(_get(device, op.get("path"))) != op["value"]:
+        raise LayoutPatchTestFailed(f"value at {op.get('path')!r} does not match")
+
+
+#
+# Widget-level ops
+#
+
+
+def _find_page(device: DeviceConfig, ref: Any, key: str = "page") -> PageConfig:
+    if isinstance(ref, int) and not isinstance(ref, bool):
+        if 0 <= ref < len(device.pages):
+            return device.pages[ref]
+        raise LayoutPatchError(f"{key} index {ref} out of range")
+    if isinstance(ref, str):
+        for page in device.pages:
+            if page.id == ref:
+                return page
+    raise LayoutPatchError(f"unknown {key} {ref!r}")
+
+
+def _check_widget_id(page: PageConfig, widget_id: Any, widget: Optional[WidgetConfig] = None) -> None:
+    """Raise LayoutPatchDuplicateId if another widget than `widget` on page has this id."""
+    if any(w.id == widget_id and w is not widget for w in page.widgets):
+        raise LayoutPatchDuplicateId(f"widget {widget_id!r} already exists on page {page.id!r}")
+
+
+def _check_unique_widget_ids(page: PageConfig, widgets: List[WidgetConfig]) -> None:
+    """Raise LayoutPatchDuplicateId if widgets (the new widget list of page) repeat an id."""
+    seen = set()
+    for widget in widgets:
+        if widget.id in seen:
+            raise LayoutPatchDuplicateId(f"widget {widget.id!r} appears twice on page {page.id!r}")
+        seen.add(widget.id)
+
+
+def _find_widget(page: PageConfig, widget_id: Any) -> int:
+    for index, widget in enumerate(page.widgets):
+        if widget.id == widget_id:
+            return index
+    raise LayoutPatchError(f"unknown widget {widget_id!r} on page {page.id!r}")
+
+
+def _insert_index(lst: List[Any], index: Optional[Any]) -> int:
+    if index is None:
+        return len(lst)
+    if isinstance(index, bool) or not isinstance(index, int):
+        raise LayoutPatchError(f"index {index!r} must be an integer")
+    if not 0 <= index <= len(lst):
+        raise LayoutPatchError(f"index {index} out of range")
+    return index
+
+
+def _op_add_widget(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    page = _find_page(device, op.get("page"))
+    widget = _to_widget(op.get("widget"))
+    _check_widget_id(page, widget.id)
+    _list_insert(page.widgets, _insert_index(page.widgets, op.get("index")), widget, undo)
+
+
+def _op_update_widget(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    page = _find_page(device, op.get("page"))
+    widget = page.widgets[_find_widget(page, op.get("id"))]
+    changes = op.get("changes")
+    if not isinstance(changes, dict):
+        raise LayoutPatchError("'changes' must be an object")
+
+    valid = {f.name for f in fields(widget)}
+    for name, value in changes.items():
+        if name not in valid:
+            raise LayoutPatchError(f"unknown widget field {name!r}")
+        if name == "props" and isinstance(value, dict):
+            for key, prop_value in value.items():
+                if prop_value is None:
+                    if key in widget.props:
+                        _dict_del(widget.props, key, undo)
+                else:
+                    _dict_set(widget.props, key, copy.deepcopy(prop_value), undo)
+            continue
+        if name == "id":
+            _check_widget_id(page, value, widget)
+        _set_attr(widget, name, _coerce_field(widget, name, value), undo)
+
+
+def _op_remove_widget(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    page = _find_page(device, op.get("page"))
+    _list_pop(page.widgets, _find_widget(page, op.get("id")), undo)
+
+
+def _op_move_widget(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    src = _find_page(device, op.get("page"))
+    dst = _find_page(device, op.get("to_page", op.get("page")), key="to_page")
+    widget = _list_pop(src.widgets, _find_widget(src, op.get("id")), undo)
+    if dst is not src:
+        _check_widget_id(dst, widget.id)
+    _list_insert(dst.widgets, _insert_index(dst.widgets, op.get("index")), widget, undo)
+
+
+def _op_reorder_page(device: DeviceConfig, op: Dict[str, Any], undo: _Undo) -> None:
+    pages = device.pages
+    src = _find_page(device, op.get("from"), key="from")
+    src_index = pages.index(src)
+    dst_index = op.get("to")
+    if isinstance(dst_index, bool) or not isinstance(dst_index, int) or not 0 <= dst_index < len(pages):
+        raise LayoutPatchError(f"'to' index {dst_index!r} out of range")
+
+    current = pages[device.current_page] if 0 <= device.current_page < len(pages) else None
+    _list_insert(pages, dst_index, _list_pop(pages, src_index, undo), undo)
+    # Keep the device showing the same page after reordering.
+    if current is not None:
+        _set_attr(device, "current_page", pages.index(current), undo)
+
+
+_OPS: Dict[str, Callable[[DeviceConfig, Dict[str, Any], _Undo], None]] = {
+    "add": _op_add,
+    "remove": _op_remove,
+    "replace": _op_replace,
+    "move": _op_move,
+    "copy": _op_copy,
+    "test": _op_test,
+    "add_widget": _op_add_widget,
+    "update_widget": _op_update_widget,
+    "remove_widget": _op_remove_widget,
+    "move_widget": _op_move_widget,
+    "reorder_page": _op_reorder_page,
+}
@@ -11,13 +11,52 @@ All IDs and references are generic and safe for open-source usage.
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field, asdict
-from typing import Any, Dict, List, Optional
+import logging
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field
+from sys import intern
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from .const import DEFAULT_PAGES, IMAGE_WIDTH, IMAGE_HEIGHT
+from .const import DEFAULT_PAGES, DOMAIN, IMAGE_WIDTH, IMAGE_HEIGHT
 
+_LOGGER = logging.getLogger(__name__)
 
-@dataclass
+
+def _copy_json(value: Any) -> Any:
+    """Copy nested dicts/lists of a JSON-like value.
+
+    Same result as dataclasses.asdict() gives for props, without its generic
+    per-value recursion and copy.deepcopy() of every leaf.
+    """
+    if type(value) is dict:
+        return {k: _copy_json(v) for k, v in value.items()}
+    if type(value) is list:
+        return [_copy_json(v) for v in value]
+    return value
+
+
+def _interned_prop_value(key: str) -> bool:
+    """Props whose string values repeat across most widgets (colors, fonts)."""
+    return key.endswith(("color", "font_family", "font_weight", "font_style"))
+
+
+def _intern_props(props: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy props with keys and repeated string values interned.
+
+    Every stored layout stays in memory for the lifetime of Home Assistant,
+    so the same handful of keys and colors should not be held once per widget.
+    """
+    out: Dict[str, Any] = {}
+    for key, value in props.items():
+        if type(key) is str:
+            key = intern(key)
+            if type(value) is str and _interned_prop_value(key):
+                value = intern(value)
+        out[key] = value
+    return out
+
+
+@dataclass(slots=True)
 class WidgetConfig:
     """
     A single widget on a page.
@@ -123,8 +162,68 @@ class WidgetConfig:
         # Keeping boundary clamping here with hardcoded 800x480 would break
         # portrait layouts and non-standard device resolutions.
 
+    def to_dict(self) -> Dict[str, Any]:
+        # Hand-written equivalent of dataclasses.asdict(self), same key order.
+        return {
+            "id": self.id,
+            "type": self.type,
+            "x": self.x,
+            "y": self.y,
+            "width": self.width,
+            "height": self.height,
+            "entity_id": self.entity_id,
+            "title": self.title,
+            "icon": self.icon,
+            "condition_entity": self.condition_entity,
+            "condition_state": self.condition_state,
+            "condition_operator": self.condition_operator,
+            "condition_min": self.condition_min,
+            "condition_max": self.condition_max,
+            "condition_logic": self.condition_logic,
+            "props": _copy_json(self.props),
+        }
+
+    @staticmethod
+    def from_dict(w: Dict[str, Any]) -> "WidgetConfig":
+        # Parse min/max safely
+        c_min = w.get("condition_min")
+        c_max = w.get("condition_max")
+        try:
+            c_min = float(c_min) if c_min is not None and c_min != "" else None
+        except (ValueError, TypeError):
+            c_min = None
+        try:
+            c_max = float(c_max) if c_max is not None and c_max != "" else None
+        except (ValueError, TypeError):
+            c_max = None
+
+        props = w.get("props") or {}
+        if type(props) is dict:
+            props = _intern_props(props)
+
+        widget = WidgetConfig(
+            id=str(w.get("id", "")),
+            type=intern(str(w.get("type", "label"))),
+            x=int(w.get("x", 0)),
+            y=int(w.get("y", 0)),
+            width=int(w.get("width", 100)),
+            height=int(w.get("height", 40)),
+            entity_id=w.get("entity_id"),
+            title=w.get("title"),
+            icon=w.get("icon"),
+            condition_entity=w.get("condition_entity"),
+            condition_state=w.get("condition_state"),
+            condition_operator=w.get("condition_operator"),
+            condition_min=c_min,
+            condition_max=c_max,
+            condition_logic=w.get("condition_logic"),
+            props=props,
+        )
+        widget.clamp_to_canvas()
+        return widget
+
 
-@dataclass
+@dataclass(slots=True)
 class PageConfig:
     """Configuration for a single dashboard page."""
 
@@ -142,7 +241,7 @@ class PageConfig:
         data: Dict[str, Any] = {
             "id": self.id,
             "name": self.name,
-            "widgets": [asdict(w) for w in self.widgets],
+            "widgets": [w.to_dict() for w in self.widgets],
         }
         if self.refresh_s is not None:
             data["refresh_s"] = self.refresh_s
@@ -153,40 +252,7 @@ class PageConfig:
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "PageConfig":
         widgets_data = data.get("widgets", []) or []
-        widgets: List[WidgetConfig] = []
-        for w in widgets_data:
-            # Parse min/max safely
-            c_min = w.get("condition_min")
-            c_max = w.get("condition_max")
-            try:
-                c_min = float(c_min) if c_min is not None and c_min != "" else None
-            except (ValueError, TypeError):
-                c_min = None
-            try:
-                c_max = float(c_max) if c_max is not None and c_max != "" else None
-            except (ValueError, TypeError):
-                c_max = None
-
-            widget = WidgetConfig(
-                id=str(w.get("id", "")),
-                type=str(w.get("type", "label")),
-                x=int(w.get("x", 0)),
-                y=int(w.get("y", 0)),
-                width=int(w.get("width", 100)),
-                height=int(w.get("height", 40)),
-                entity_id=w.get("entity_id"),
-                title=w.get("title"),
-                icon=w.get("icon"),
-                condition_entity=w.get("condition_entity"),
-                condition_state=w.get("condition_state"),
-                condition_operator=w.get("condition_operator"),
-                condition_min=c_min,
-                condition_max=c_max,
-                condition_logic=w.get("condition_logic"),
-                props=w.get("props") or {},
-            )
-            widget.clamp_to_canvas()
-            widgets.append(widget)
+        widgets: List[WidgetConfig] = [WidgetConfig.from_dict(w) for w in widgets_data]
 
         refresh_raw = data.get("refresh_s")
         refresh_s: Optional[int]
@@ -213,7 +279,7 @@ class PageConfig:
 
 
 
-@dataclass
+@dataclass(slots=True)
 class DeviceConfig:
     """
     Configuration for a single reTerminal device.
@@ -230,6 +296,9 @@ class DeviceConfig:
       - "landscape" (800x480) or "portrait" (480x800) for editor and snippet.
     dark_mode:
       - If true, editor uses dark preview and docs explain inverted color usage.
+    revision:
+      - Monotonically increasing change counter assigned by DashboardStorage on
+        every mutation. Not part of to_dict(); persisted alongside the layout.
     """
 
     device_id: str
@@ -285,6 +354,13 @@ class DeviceConfig:
     glyphsets: List[str] = field(default_factory=lambda: ["GF_Latin_Kernel"])
     # ----------------------------------------------------
 
+    revision: int = field(default=0, compare=False)
+
+    @property
+    def etag(self) -> str:
+        """Strong HTTP entity tag for the current revision of this layout."""
+        return f'"r{self.revision}"'
+
     def ensure_pages(self, min_pages: int = DEFAULT_PAGES) -> None:
         """Ensure at least min_pages exist; add simple default pages if missing."""
         if not self.pages:
@@ -327,7 +403,14 @@ class DeviceConfig:
 
     def to_dict(self) -> Dict[str, Any]:
         """Serialize device configuration for the HTTP API and storage."""
-        self.ensure_pages()
+        # ensure_pages() only has work to do if something left the config
+        # inconsistent; skip the call on the (normal) fast path.
+        if (
+            not self.pages
+            or not 0 <= self.current_page < len(self.pages)
+            or self.orientation not in ("landscape", "portrait")
+        ):
+            self.ensure_pages()
         return {
             "device_id": self.device_id,
             "api_token": self.api_token,
@@ -440,16 +523,108 @@ class DeviceConfig:
         return cfg
 
 
-@dataclass
+class LazyDeviceMap(MutableMapping):
+    """
+    Mapping of device_id -> DeviceConfig that hydrates stored layouts lazily.
+
+    Layouts read from disk are kept as their raw dicts (add_raw) and only
+    turned into DeviceConfig/PageConfig/WidgetConfig objects on first access,
+    so startup does not pay for building every layout up front. Membership,
+    len() and iteration over keys never hydrate.
+
+    A stored layout that fails to parse is logged and dropped on access, and
+    then behaves as if it had never existed; on_discard(device_id), if set,
+    is called so the owner can drop its own records of it.
+    """
+
+    __slots__ = ("_devices", "_raw", "on_discard")
+
+    def __init__(self, devices: Optional[Dict[str, DeviceConfig]] = None) -> None:
+        # Insertion order of _devices is the mapping order; None = not hydrated.
+        self._devices: Dict[str, Optional[DeviceConfig]] = dict(devices or {})
+        self._raw: Dict[str, Tuple[Dict[str, Any], int]] = {}
+        self.on_discard: Optional[Callable[[str], None]] = None
+
+    def add_raw(self, device_id: str, data: Dict[str, Any], revision: int = 0) -> None:
+        """Register a stored layout (DeviceConfig.to_dict() format) without parsing it."""
+        self._devices[device_id] = None
+        self._raw[device_id] = (data, revision)
+
+    def is_hydrated(self, device_id: str) -> bool:
+        return self._devices.get(device_id) is not None
+
+    @property
+    def hydrated_count(self) -> int:
+        return len(self._devices) - len(self._raw)
+
+    def _hydrate(self, device_id: str) -> DeviceConfig:
+        data, revision = self._raw.pop(device_id)
+        try:
+            device = DeviceConfig.from_dict(data)
+        except Exception as exc:  # noqa: BLE001
+            _LOGGER.error("%s: Failed to parse stored layout %s, skipping: %s", DOMAIN, device_id, exc)
+            del self._devices[device_id]
+            if self.on_discard is not None:
+                self.on_discard(device_id)
+            raise KeyError(device_id) from exc
+        device.revision = revision
+        self._devices[device_id] = device
+        return device
+
+    def hydrate_all(self) -> None:
+        """Parse every layout that is still raw."""
+        for device_id in list(self._raw):
+            try:
+                self._hydrate(device_id)
+            except KeyError:
+                pass
+
+    def __getitem__(self, device_id: str) -> DeviceConfig:
+        device = self._devices[device_id]
+        if device is None:
+            device = self._hydrate(device_id)
+        return device
+
+    def __setitem__(self, device_id: str, device: DeviceConfig) -> None:
+        self._raw.pop(device_id, None)
+        self._devices[device_id] = device
+
+    def __delitem__(self, device_id: str) -> None:
+        del self._devices[device_id]
+        self._raw.pop(device_id, None)
+
+    def __contains__(self, device_id: object) -> bool:
+        return device_id in self._devices
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._devices)
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def values(self):
+        # Hydrate first so a broken layout cannot vanish mid-iteration.
+        self.hydrate_all()
+        return super().values()
+
+    def items(self):
+        self.hydrate_all()
+        return super().items()
+
+    def __repr__(self) -> str:
+        return f"LazyDeviceMap({len(self._devices)} layouts, {len(self._raw)} not loaded)"
+
+
+@dataclass(slots=True)
 class DashboardState:
     """
     Root persisted state.
 
     This is stored in hass.data[DOMAIN]["storage"] and persisted via Store.
-    It maps device_ids to DeviceConfig structures.
+    It maps device_ids to DeviceConfig structures (see LazyDeviceMap).
     """
 
-    devices: Dict[str, DeviceConfig] = field(default_factory=dict)
+    devices: LazyDeviceMap = field(default_factory=LazyDeviceMap)
     last_active_layout_id: Optional[str] = None  # Tracks the last saved/active layout
 
     def get_or_create_device(self, device_id: str, api_token: str) -> DeviceConfig:
@@ -472,7 +647,7 @@ class DashboardState:
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "DashboardState":
         raw_devices = data.get("devices", {}) or {}
-        devices: Dict[str, DeviceConfig] = {}
+        devices = LazyDeviceMap()
         for dev_id, dev_data in raw_devices.items():
             devices[dev_id] = DeviceConfig.from_dict(dev_data)
         return DashboardState(
@@ -0,0 +1,396 @@
+"""
+Cache of server-rendered page images for the ESPHome Designer Designer.
+
+E-paper panels poll their page image on every wake, but the image only
+changes when the layout or one of the entities shown on the page changes.
+Renders are therefore cached under a key made of:
+
+- device_id and page index,
+- the layout revision (bumped by DashboardStorage on every edit),
+- the page's dependency generation, bumped whenever an entity the page
+  references changes state,
+- the current minute, only for pages containing a clock widget,
+- the output format: grayscale PNG, dithered PNG (palette name, see
+  dither.py) or a packed framebuffer (bpp, compression), see framebuffer.py.
+
+The entities a page references (widget entity_id, condition_entity and entity
+ids found in props) are computed once per layout revision. One
+async_track_state_change_event subscription covers the union of them and
+marks only the affected (device, page) renders stale, so pages whose
+entities did not change stay cached and stale_pages() tells which devices
+need a refresh. Only pages that have been requested are tracked.
+
+Each render carries a strong ETag, a hash of its bytes, so a device can
+revalidate with If-None-Match and skip unchanged frames even across
+re-renders. async_wait_for_change() lets a request wait (long-poll) until
+the page may render differently: an entity it shows changed, its layout
+was edited (async_layout_changed, called by DashboardStorage) or, on clock
+pages, the minute rolled over.
+
+Rendering runs on the render pool (render_pool.py), which also dedupes
+identical renders in flight; Pillow (renderer.py) is only imported on the
+first render.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import RENDER_CACHE_SIZE
+from .framebuffer_diff import DeliveredFrame
+from .models import DeviceConfig, PageConfig
+from .render_pool import RenderPool, StateSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+# Widget types whose output depends on the wall clock.
+_TIME_DEPENDENT_TYPES = frozenset({"clock", "datetime"})
+
+# Entity shown by clock widgets when present (see renderer._draw_widget_clock).
+_CLOCK_ENTITY = "sensor.time"
+# Entity read by battery_icon widgets without an entity_id.
+_BATTERY_ENTITY = "sensor.battery_level"
+
+
+def _is_entity_key(key: str) -> bool:
+    return key in ("entity", "entity_id") or key.endswith(("_entity", "_entity_id"))
+
+
+def page_entity_ids(page: PageConfig) -> FrozenSet[str]:
+    """Return every entity id a page references."""
+    entity_ids = set()
+    for widget in page.widgets:
+        if widget.entity_id:
+            entity_ids.add(widget.entity_id)
+        if widget.condition_entity:
+            entity_ids.add(widget.condition_entity)
+        if widget.type in _TIME_DEPENDENT_TYPES:
+            entity_ids.add(_CLOCK_ENTITY)
+        elif widget.type == "battery_icon" and not widget.entity_id:
+            entity_ids.add(_BATTERY_ENTITY)
+        for key, value in widget.props.items():
+            if isinstance(value, str) and value and _is_entity_key(key):
+                entity_ids.add(value)
+            elif isinstance(value, list) and key.endswith("entities"):
+                entity_ids.update(v for v in value if isinstance(v, str) and v)
+    return frozenset(entity_ids)
+
+
+def page_is_time_dependent(page: PageConfig) -> bool:
+    return any(widget.type in _TIME_DEPENDENT_TYPES for widget in page.widgets)
+
+
+PageKey = Tuple[str, int]
+# Output other than grayscale PNG: a palette name for a dithered PNG, or
+# (bits per pixel, compression) for a packed framebuffer.
+OutputFormat = Union[str, Tuple[int, str]]
+
+
+class RenderedPage(NamedTuple):
+    data: bytes
+    # Strong ETag (quoted) derived from the content.
+    etag: str
+    # Framebuffer renders: the unpacked frame, as produced by the render job.
+    frame: Optional[DeliveredFrame] = None
+
+
+def content_etag(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=12).hexdigest() + '"'
+
+
+class _PageDependencies:
+    """Entities (and clock use) of one page at one layout revision."""
+
+    __slots__ = ("revision", "entity_ids", "time_dependent")
+
+    def __init__(self, revision: int, page: PageConfig) -> None:
+        self.revision = revision
+        self.entity_ids = page_entity_ids(page)
+        self.time_dependent = page_is_time_dependent(page)
+
+
+class PageRenderCache:
+    """LRU cache of rendered pages with event-driven invalidation."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_entries: int = RENDER_CACHE_SIZE,
+        pool: Optional[RenderPool] = None,
+    ) -> None:
+        self._hass = hass
+        self._pool = pool if pool is not None else RenderPool(hass)
+        self._max_entries = max(1, max_entries)
+        self._entries: OrderedDict[Hashable, RenderedPage] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._render_seconds = 0.0
+
+        self._deps: Dict[PageKey, _PageDependencies] = {}
+        # entity_id -> pages referencing it (reverse of _deps)
+        self._dependents: Dict[str, Set[PageKey]] = {}
+        self._generations: Dict[PageKey, int] = {}
+        self._stale: Set[PageKey] = set()
+        self._unsub_state: Optional[Callable[[], None]] = None
+        self._stale_listeners: List[Callable[[PageKey], None]] = []
+        self._invalidations = 0
+        # Long-poll requests waiting for a page to change.
+        self._waiters: Dict[PageKey, Set[asyncio.Future]] = {}
+
+    @callback
+    def _page_dependencies(self, device: DeviceConfig, page_index: int, page: PageConfig) -> _PageDependencies:
+        """Return the page's dependencies, rebuilding them if the revision changed."""
+        page_key = (device.device_id, page_index)
+        deps = self._deps.get(page_key)
+        if deps is not None and deps.revision == device.revision:
+            return deps
+
+        new = _PageDependencies(device.revision, page)
+        old_ids = deps.entity_ids if deps is not None else frozenset()
+        self._deps[page_key] = new
+        if new.entity_ids != old_ids:
+            for entity_id in old_ids - new.entity_ids:
+                pages = self._dependents[entity_id]
+                pages.discard(page_key)
+                if not pages:
+                    del self._dependents[entity_id]
+            for entity_id in new.entity_ids - old_ids:
+                self._dependents.setdefault(entity_id, set()).add(page_key)
+            self._async_update_subscription()
+        return new
+
+    @callback
+    def _async_update_subscription(self) -> None:
+        """(Re)subscribe to state changes of every tracked entity."""
+        if self._unsub_state is not None:
+            self._unsub_state()
+            self._unsub_state = None
+        if self._dependents:
+            self._unsub_state = async_track_state_change_event(
+                self._hass, list(self._dependents), self._async_state_changed
+            )
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        pages = self._dependents.get(event.data["entity_id"])
+        if not pages:
+            return
+        for page_key in pages:
+            self._generations[page_key] = self._generations.get(page_key, 0) + 1
+            self._stale.add(page_key)
+        self._invalidations += 1
+        # Free the now unreachable renders right away.
+        for key in [k for k in self._entries if (k[0], k[1]) in pages]:
+            del self._entries[key]
+        for page_key in list(pages):
+            for listener in list(self._stale_listeners):
+                listener(page_key)
+        self._async_wake(list(pages))
+
+    @callback
+    def _async_wake(self, page_keys: Iterable[PageKey]) -> None:
+        for page_key in page_keys:
+            for future in self._waiters.pop(page_key, ()):
+                if not future.done():
+                    future.set_result(None)
+
+    @callback
+    def async_layout_changed(self, device_id: str) -> None:
+        """Wake requests waiting on any page of an edited layout."""
+        self._async_wake([page_key for page_key in self._waiters if page_key[0] == device_id])
+
+    async def async_wait_for_change(self, device: DeviceConfig, page_index: int, timeout: float) -> None:
+        """Wait up to timeout seconds for the page to (possibly) render differently.
+
+        Returns early when an entity on the page changes, the layout is
+        edited, or at the next minute on clock pages. Callers re-render and
+        compare ETags; a wake-up does not guarantee different pixels.
+        """
+        if self.is_time_dependent(device, page_index):
+            timeout = min(timeout, 60 - time.time() % 60 + 0.05)
+        page_key = (device.device_id, page_index)
+        future = self._hass.loop.create_future()
+        self._waiters.setdefault(page_key, set()).add(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self._waiters.get(page_key)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[page_key]
+
+    @callback
+    def async_add_stale_listener(self, listener: Callable[[PageKey], None]) -> Callable[[], None]:
+        """Call listener((device_id, page_index)) when a tracked page goes stale."""
+        self._stale_listeners.append(listener)
+
+        @callback
+        def remove() -> None:
+            if listener in self._stale_listeners:
+                self._stale_listeners.remove(listener)
+
+        return remove
+
+    @callback
+    def is_time_dependent(self, device: DeviceConfig, page_index: int) -> bool:
+        """Whether the page's render changes with the clock (cached per revision)."""
+        if not 0 <= page_index < len(device.pages):
+            return False
+        return self._page_dependencies(device, page_index, device.pages[page_index]).time_dependent
+
+    def stale_pages(self) -> List[PageKey]:
+        """(device_id, page_index) pairs whose entities changed since their last render."""
+        return sorted(self._stale)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Drop the state subscription and cached renders.
+
+        Tracking starts again (and re-subscribes) on the next request.
+        """
+        if self._unsub_state is not None:
+            self._unsub_state()
+            self._unsub_state = None
+        self._entries.clear()
+        self._deps.clear()
+        self._dependents.clear()
+        self._stale.clear()
+        self._async_wake(list(self._waiters))
+
+    def _key(
+        self, device: DeviceConfig, page_index: int, page: PageConfig, output: Optional[OutputFormat]
+    ) -> Tuple[Any, ...]:
+        deps = self._page_dependencies(device, page_index, page)
+        generation = self._generations.get((device.device_id, page_index), 0)
+        minute = int(time.time() // 60) if deps.time_dependent else None
+        return (device.device_id, page_index, device.revision, generation, minute, output)
+
+    @property
+    def pool(self) -> RenderPool:
+        return self._pool
+
+    async def async_get_png(self, device: DeviceConfig, page_index: int) -> Optional[bytes]:
+        """Return the PNG for a page, or None if the page does not exist."""
+        return await self.async_get_render(device, page_index)
+
+    async def async_get_framebuffer(
+        self, device: DeviceConfig, page_index: int, bpp: int, compression: str
+    ) -> Optional[bytes]:
+        """Return the packed framebuffer for a page, or None if the page does not exist."""
+        return await self.async_get_render(device, page_index, (bpp, compression))
+
+    async def async_get_render(
+        self,
+        device: DeviceConfig,
+        page_index: int,
+        output: Optional[OutputFormat] = None,
+        wait: bool = False,
+    ) -> Optional[bytes]:
+        """Return a page rendered as PNG (output None or a palette name) or as a
+        (bpp, compression) framebuffer, rendering it only if the cache is stale.
+
+        Returns None if the page does not exist. Raises
+        render_pool.RenderQueueFull if the render pool is full, unless wait.
+        """
+        rendered = await self.async_get_rendered(device, page_index, output, wait)
+        return rendered.data if rendered is not None else None
+
+    async def async_get_rendered(
+        self,
+        device: DeviceConfig,
+        page_index: int,
+        output: Optional[OutputFormat] = None,
+        wait: bool = False,
+    ) -> Optional[RenderedPage]:
+        """Like async_get_render(), with the render's ETag."""
+        if not 0 <= page_index < len(device.pages):
+            return None
+        page = device.pages[page_index]
+
+        key = self._key(device, page_index, page, output)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return cached
+
+        self._misses += 1
+        self._stale.discard((device.device_id, page_index))
+        # Render from a snapshot: the executor must not see the live page
+        # while the editor keeps patching it on the event loop.
+        snapshot = PageConfig.from_dict(page.to_dict())
+
+        from .renderer import render_page_to_frame, render_page_to_png
+
+        source: Any = self._hass
+        if self._pool.uses_processes:
+            source = StateSnapshot.capture(self._hass, self._deps[(device.device_id, page_index)].entity_ids)
+        if output is None or isinstance(output, str):
+            func, args = render_page_to_png, (source, device, snapshot, output)
+        else:
+            func, args = render_page_to_frame, (source, device, snapshot, *output)
+
+        start = time.perf_counter()
+        result = await self._pool.async_run(
+            key, func, *args, wait=wait, label=f"{device.device_id}/{page_index}"
+        )
+        self._render_seconds += time.perf_counter() - start
+
+        # Framebuffer jobs also return the unpacked frame, for diffs.
+        data, frame = result if isinstance(output, tuple) else (result, None)
+        rendered = self._entries[key] = RenderedPage(data, content_etag(data), frame)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return rendered
+
+    async def async_render_all(
+        self, devices: Iterable[DeviceConfig], output: Optional[OutputFormat] = None
+    ) -> int:
+        """Render every page of the given devices into the cache.
+
+        Runs at most one job per pool worker at a time, so device requests
+        still find room in the render queue. Only the most recently rendered
+        max_entries renders stay cached. Returns the number of pages rendered;
+        failures are logged.
+        """
+        limit = asyncio.Semaphore(self._pool.workers)
+
+        async def render(device: DeviceConfig, page_index: int) -> bool:
+            async with limit:
+                try:
+                    await self.async_get_render(device, page_index, output, wait=True)
+                except Exception as exc:  # noqa: BLE001
+                    _LOGGER.error("Rendering %s page %s failed: %s", device.device_id, page_index, exc)
+                    return False
+                return True
+
+        results = await asyncio.gather(
+            *(render(device, index) for device in devices for index in range(len(device.pages)))
+        )
+        return sum(results)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        renders = self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "avg_render_ms": round(self._render_seconds * 1000 / renders, 2) if renders else None,
+            "tracked_pages": len(self._deps),
+            "tracked_entities": len(self._dependents),
+            "stale_pages": len(self._stale),
+            "invalidations": self._invalidations,
+        }
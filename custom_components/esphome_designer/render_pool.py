@@ -0,0 +1,252 @@
+"""
+Dedicated worker pool for server-side renders.
+
+Renders used to go through hass.async_add_executor_job, which shares Home
+Assistant's executor with every other integration and does not bound how
+many renders a fleet of polling panels can queue. RenderPool runs them on
+its own executor instead:
+
+- a thread pool by default; optionally a process pool, since Pillow only
+  releases the GIL for part of a render. Process workers cannot see
+  hass, so renders are given a StateSnapshot of the page's entities,
+- a bounded queue: at most workers + max_queue jobs are pending; beyond
+  that async_run() raises RenderQueueFull (or waits, for batch callers),
+- in-flight deduplication: a job whose key is already running is not
+  queued again, the caller awaits the running job,
+- timing metrics per job: queue wait and run time, totals and the most
+  recent jobs (see stats).
+
+The pool lives on the event loop; only the submitted functions run in the
+workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.util import dt as dt_util
+
+from .const import RENDER_POOL_HISTORY, RENDER_POOL_QUEUE_SIZE, RENDER_POOL_WORKERS
+from .fonts import FONT_CACHE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RenderQueueFull(Exception):
+    """Raised when the render queue is full."""
+
+
+class _SnapshotStates:
+    def __init__(self, states: Dict[str, Tuple[str, Dict[str, Any]]]) -> None:
+        self._raw = states
+        self._states: Dict[str, State] = {}
+
+    def get(self, entity_id: str) -> Optional[State]:
+        state = self._states.get(entity_id)
+        if state is None and entity_id in self._raw:
+            value, attributes = self._raw[entity_id]
+            state = self._states[entity_id] = State(entity_id, value, attributes)
+        return state
+
+    def __getstate__(self):
+        return self._raw
+
+    def __setstate__(self, raw) -> None:
+        self.__init__(raw)
+
+
+class StateSnapshot:
+    """Picklable stand-in for hass in process workers: hass.states.get() over
+    the states of a fixed set of entities captured on the event loop."""
+
+    def __init__(self, states: Dict[str, Tuple[str, Dict[str, Any]]]) -> None:
+        self.states = _SnapshotStates(states)
+
+    @classmethod
+    def capture(cls, hass: HomeAssistant, entity_ids: Iterable[str]) -> "StateSnapshot":
+        states = {}
+        for entity_id in entity_ids:
+            state = hass.states.get(entity_id)
+            if state is not None:
+                states[entity_id] = (state.state, dict(state.attributes))
+        return cls(states)
+
+
+def _init_process_worker(time_zone: str, font_dirs: Tuple[str, ...]) -> None:
+    """Give a fresh worker process the settings the renderer reads from globals."""
+    zone = dt_util.get_time_zone(time_zone)
+    if zone is not None:
+        dt_util.set_default_time_zone(zone)
+    FONT_CACHE.set_search_dirs(font_dirs)
+
+
+def _timed_call(func: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class RenderPool:
+    """Bounded, deduplicating executor for render jobs."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        workers: int = RENDER_POOL_WORKERS,
+        max_queue: int = RENDER_POOL_QUEUE_SIZE,
+        use_processes: bool = False,
+    ) -> None:
+        self._hass = hass
+        self._workers = max(1, workers)
+        self._max_queue = max(0, max_queue)
+        self._use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(self._workers + self._max_queue)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Admitted jobs not finished yet (queued in or running on the executor).
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._deduped = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+        self._max_wait = 0.0
+        self._max_run = 0.0
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=RENDER_POOL_HISTORY)
+
+    @property
+    def uses_processes(self) -> bool:
+        return self._use_processes
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @callback
+    def async_configure(self, workers: int, use_processes: bool) -> None:
+        """Apply new settings; the executor is replaced on the next job."""
+        workers = max(1, workers)
+        if (workers, use_processes) == (self._workers, self._use_processes):
+            return
+        self.async_shutdown()
+        self._workers = workers
+        self._use_processes = use_processes
+        self._slots = asyncio.Semaphore(self._workers + self._max_queue)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self._use_processes:
+                # spawn: forking Home Assistant's threads is not safe.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_process_worker,
+                    initargs=(self._hass.config.time_zone, tuple(FONT_CACHE.search_dirs)),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix="esphome_designer_render"
+                )
+        return self._executor
+
+    async def async_run(
+        self,
+        key: Hashable,
+        func: Callable[..., Any],
+        *args: Any,
+        wait: bool = False,
+        label: Optional[str] = None,
+    ) -> Any:
+        """Run func(*args) in the pool and return its result.
+
+        A job with the same key already in flight is awaited instead of
+        queued again. If the queue is full, raises RenderQueueFull, or with
+        wait=True waits for a free slot.
+        """
+        running = self._inflight.get(key)
+        if running is not None:
+            self._deduped += 1
+            return await asyncio.shield(running)
+
+        slots = self._slots
+        if slots.locked() and not wait:
+            self._rejected += 1
+            raise RenderQueueFull(f"{self._workers + self._max_queue} render jobs pending")
+        await slots.acquire()
+
+        # A task of its own, so a caller that goes away does not cancel the
+        # job for the others awaiting it.
+        task = self._hass.async_create_background_task(
+            self._async_execute(slots, func, args, label or str(key)), f"esphome_designer render {key}"
+        )
+        self._inflight[key] = task
+        task.add_done_callback(lambda _task: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _async_execute(
+        self, slots: asyncio.Semaphore, func: Callable[..., Any], args: Tuple[Any, ...], label: str
+    ) -> Any:
+        submitted = time.perf_counter()
+        self._pending += 1
+        try:
+            result, run = await self._hass.loop.run_in_executor(self._get_executor(), _timed_call, func, args)
+        except Exception:
+            self._failed += 1
+            self._record(label, time.perf_counter() - submitted, None)
+            raise
+        finally:
+            self._pending -= 1
+            slots.release()
+
+        wait = time.perf_counter() - submitted - run
+        self._completed += 1
+        self._wait_seconds += wait
+        self._run_seconds += run
+        self._max_wait = max(self._max_wait, wait)
+        self._max_run = max(self._max_run, run)
+        self._record(label, wait, run)
+        return result
+
+    def _record(self, label: str, wait: float, run: Optional[float]) -> None:
+        self._recent.append(
+            {
+                "job": label,
+                "wait_ms": round(wait * 1000, 2),
+                "run_ms": round(run * 1000, 2) if run is not None else None,
+                "ok": run is not None,
+            }
+        )
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the executor; queued jobs are cancelled, a new one starts on demand."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        completed = self._completed
+        return {
+            "mode": "process" if self._use_processes else "thread",
+            "workers": self._workers,
+            "max_queue": self._max_queue,
+            "pending": self._pending,
+            "completed": completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "deduped": self._deduped,
+            "avg_wait_ms": round(self._wait_seconds * 1000 / completed, 2) if completed else None,
+            "avg_run_ms": round(self._run_seconds * 1000 / completed, 2) if completed else None,
+            "max_wait_ms": round(self._max_wait * 1000, 2),
+            "max_run_ms": round(self._max_run * 1000, 2),
+            "recent": list(self._recent),
+        }
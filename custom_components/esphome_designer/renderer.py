@@ -8,84 +8,307 @@ Goals:
 - Deterministic, E-Ink friendly output for the reTerminal E1001.
 - No user-specific logic; everything comes from the stored layout & HA states.
 - Keep implementation clear and maintainable; can be extended with more widgets.
+
+Widgets are drawn by the function registered for their type with
+@register_widget (see WIDGET_RENDERERS); props follow the editor plugins in
+frontend/features/<type>/plugin.js. Widgets registered with dynamic=True
+(or a predicate that holds for the widget) read entity states or the clock
+and are redrawn on every render; the others go into the cached static base
+layer (layers.py). Unknown types are skipped.
 """
 
 from __future__ import annotations
 
+import functools
 import io
 import logging
-from typing import Any, Tuple
+import re
+import zlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
 
 from PIL import Image, ImageDraw, ImageFont
 
 from homeassistant.core import HomeAssistant, State
+from homeassistant.util import dt as dt_util
 
 from .const import IMAGE_WIDTH, IMAGE_HEIGHT
+from .dither import GRAY_PALETTES, device_dither_mode, dither_image, is_color_palette, prepare_image
+from .fonts import FONT_CACHE, ICON_FONT_FAMILY
+from .framebuffer import COMPRESSION_NONE, encode_packed, pack_image
+from .framebuffer_diff import DeliveredFrame
+from .layers import STATIC_LAYER_CACHE
 from .models import DeviceConfig, PageConfig, WidgetConfig
+from .text_layout import ELLIPSIS, TEXT_LAYOUT_CACHE
 
 _LOGGER = logging.getLogger(__name__)
 
-# Attempt to load a reasonable default font; HA containers usually have DejaVu.
-# Fallback to PIL's default if needed.
-try:
-    DEFAULT_FONT = ImageFont.truetype("DejaVuSans.ttf", 18)
-    DEFAULT_FONT_SMALL = ImageFont.truetype("DejaVuSans.ttf", 14)
-    DEFAULT_FONT_LARGE = ImageFont.truetype("DejaVuSans.ttf", 24)
-except Exception:  # noqa: BLE001
-    DEFAULT_FONT = ImageFont.load_default()
-    DEFAULT_FONT_SMALL = ImageFont.load_default()
-    DEFAULT_FONT_LARGE = ImageFont.load_default()
-
-
-def _get_font(size: int | None) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
-    if not size:
-        return DEFAULT_FONT
+DEFAULT_FONT_SIZE = 18
+
+Box = Tuple[int, int, int, int]
+
+# Editor color names (frontend/js/utils/device.js getColorStyle), as RGB.
+_NAMED_COLORS = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "red": (255, 0, 0),
+    "green": (0, 255, 0),
+    "blue": (0, 0, 255),
+    "yellow": (255, 255, 0),
+    "orange": (255, 165, 0),
+    "gray": (160, 160, 160),
+    "grey": (160, 160, 160),
+}
+
+_ICON_CODE = re.compile(r"^F[0-9A-F]{4}$")
+
+
+# A gray level ("L" renders) or an RGB triple ("RGB" renders).
+Color = Union[int, Tuple[int, int, int]]
+
+
+def _luma(color: Color) -> int:
+    if isinstance(color, int):
+        return color
+    # Same weights as Pillow's RGB -> L conversion.
+    return (color[0] * 299 + color[1] * 587 + color[2] * 114) // 1000
+
+
+class RenderContext:
+    """Per-render state passed to every widget renderer.
+
+    Pages are drawn in "L" unless rgb is set (colour palettes, see
+    render_page_image); colors come from color() / gray() in the matching form.
+    """
+
+    __slots__ = ("hass", "device", "dark", "rgb", "fg", "bg")
+
+    def __init__(self, hass: HomeAssistant, device: DeviceConfig, dark: bool, rgb: bool = False) -> None:
+        self.hass = hass
+        self.device = device
+        self.dark = dark
+        self.rgb = rgb
+        # "theme_auto" foreground / page background.
+        self.fg = self.gray(255 if dark else 0)
+        self.bg = self.gray(0 if dark else 255)
+
+    @property
+    def mode(self) -> str:
+        return "RGB" if self.rgb else "L"
+
+    def gray(self, level: int) -> Color:
+        """A gray level as a color of this render's mode."""
+        return (level, level, level) if self.rgb else level
+
+    def state(self, entity_id: str | None) -> State | None:
+        if not entity_id:
+            return None
+        return self.hass.states.get(entity_id)
+
+    def color(self, value: Any, default: Optional[int] = None) -> Optional[Color]:
+        """Color for an editor color; None for "transparent".
+
+        Unknown values fall back to default, a gray level (the theme
+        foreground if None).
+        """
+        fallback = self.fg if default is None else self.gray(default)
+        if not isinstance(value, str) or not value or value == "theme_auto" or "{{" in value:
+            return fallback
+        value = value.strip().lower()
+        if value == "transparent":
+            return None
+        rgb = _NAMED_COLORS.get(value)
+        if rgb is None:
+            hex_value = value[1:] if value.startswith("#") else value[2:] if value.startswith("0x") else None
+            if hex_value is None or len(hex_value) != 6:
+                return fallback
+            try:
+                rgb = tuple(int(hex_value[i:i + 2], 16) for i in (0, 2, 4))
+            except ValueError:
+                return fallback
+        return rgb if self.rgb else _luma(rgb)
+
+
+class WidgetRenderer(NamedTuple):
+    draw: Callable[[RenderContext, ImageDraw.ImageDraw, WidgetConfig], None]
+    # Output depends on entity states or the clock: always, or only for the
+    # widgets the predicate accepts.
+    dynamic: Union[bool, Callable[[WidgetConfig], bool]]
+
+
+WIDGET_RENDERERS: Dict[str, WidgetRenderer] = {}
+
+
+def _has_entity(w_cfg: WidgetConfig) -> bool:
+    """Widgets that only read their own entity are static without one."""
+    return bool(w_cfg.entity_id)
+
+
+def register_widget(*types: str, dynamic: Union[bool, Callable[[WidgetConfig], bool]] = False):
+    """Register the decorated function as the renderer of the given widget types."""
+
+    def decorator(func):
+        for wtype in types:
+            WIDGET_RENDERERS[wtype] = WidgetRenderer(func, dynamic)
+        return func
+
+    return decorator
+
+
+def _get_font(
+    size: int | None,
+    family: str | None = None,
+    weight: Any = 400,
+    style: Any = "normal",
+) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """Return a cached font (see fonts.FontCache)."""
+    return FONT_CACHE.get(size or DEFAULT_FONT_SIZE, family, weight, style)
+
+
+def _widget_font(w_cfg: WidgetConfig, size: int, weight: Any = None) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """Font for a widget at the given size, honouring its family/weight/italic props."""
+    props = w_cfg.props
+    return _get_font(
+        size,
+        props.get("font_family"),
+        weight if weight is not None else props.get("font_weight", 400),
+        props.get("font_style") or props.get("italic"),
+    )
+
+
+def _prop_int(props: Dict[str, Any], key: str, default: int) -> int:
     try:
-        return ImageFont.truetype("DejaVuSans.ttf", size)
-    except Exception:  # noqa: BLE001
-        return DEFAULT_FONT
+        return int(float(props.get(key, default)))
+    except (TypeError, ValueError):
+        return default
 
 
-def _get_state(hass: HomeAssistant, entity_id: str | None) -> State | None:
-    if not entity_id:
+def _prop_flag(props: Dict[str, Any], key: str, default: bool) -> bool:
+    """Boolean prop; the editor sometimes stores "true"/"false" strings."""
+    value = props.get(key, default)
+    if isinstance(value, str):
+        return value.strip().lower() not in ("false", "0", "")
+    return bool(value)
+
+
+def _state_number(state: State | None) -> Optional[float]:
+    """Numeric value of a state, ignoring units or other trailing text."""
+    if state is None:
+        return None
+    match = re.match(r"\s*([-+]?\d*[.,]?\d+)", str(state.state))
+    if match is None:
         return None
-    return hass.states.get(entity_id)
+    return float(match.group(1).replace(",", "."))
 
 
-def _draw_text_centered(draw: ImageDraw.ImageDraw, box: Tuple[int, int, int, int], text: str, font) -> None:
+def _text_size(text: str, font) -> Tuple[int, int]:
+    """Width/height of text (cached, see text_layout.py)."""
+    return TEXT_LAYOUT_CACHE.size(font, text)
+
+
+def _draw_text_centered(
+    draw: ImageDraw.ImageDraw, box: Box, text: str, font, fill: int = 0
+) -> None:
     x1, y1, x2, y2 = box
-    w, h = draw.textsize(text, font=font)
+    w, h = _text_size(text, font)
     x = x1 + (x2 - x1 - w) / 2
     y = y1 + (y2 - y1 - h) / 2
-    draw.text((x, y), text, fill=0, font=font)
+    draw.text((x, y), text, fill=fill, font=font)
+
+
+def _draw_lines_aligned(
+    draw: ImageDraw.ImageDraw, box: Box, lines: List[Tuple[str, Any]], fill: int, align: str
+) -> None:
+    """Draw (text, font) lines as a block aligned in box by an editor text_align
+    value (TOP_LEFT, CENTER, BOTTOM_RIGHT, ...)."""
+    x1, y1, x2, y2 = box
+    gap = 4
+    boxes = [TEXT_LAYOUT_CACHE.bbox(font, text) if text else (0, 0, 0, 0) for text, font in lines]
+    heights = [
+        max(bottom - top, getattr(font, "size", 0)) for (_l, top, _r, bottom), (_text, font) in zip(boxes, lines)
+    ]
+    block_h = sum(heights) + gap * (len(lines) - 1)
+
+    align = (align or "TOP_LEFT").upper()
+    if align.startswith("BOTTOM"):
+        y = y2 - block_h
+    elif align.startswith("TOP"):
+        y = y1
+    else:
+        y = y1 + (y2 - y1 - block_h) / 2
+
+    for (text, font), (left, top, right, _bottom), line_h in zip(lines, boxes, heights):
+        if text:
+            w = right - left
+            if align.endswith("RIGHT"):
+                x = x2 - w
+            elif align.endswith("LEFT"):
+                x = x1
+            else:
+                x = x1 + (x2 - x1 - w) / 2
+            draw.text((x - left, y - top), text, fill=fill, font=font)
+        y += line_h + gap
+
+
+def _widget_box(w_cfg: WidgetConfig) -> Box:
+    return (w_cfg.x, w_cfg.y, w_cfg.x + w_cfg.width, w_cfg.y + w_cfg.height)
+
+
+def _icon_size(w_cfg: WidgetConfig, default: int) -> int:
+    if _prop_flag(w_cfg.props, "fit_icon_to_frame", False):
+        return max(8, min(w_cfg.width - 8, w_cfg.height - 8))
+    return _prop_int(w_cfg.props, "size", default)
+
+
+def _draw_icon(
+    ctx: RenderContext,
+    draw: ImageDraw.ImageDraw,
+    w_cfg: WidgetConfig,
+    code: str,
+    size: int,
+    caption: Optional[str] = None,
+) -> None:
+    """Draw a Material Design Icons glyph (editor code "Fxxxx"), optionally with
+    a caption below, centered in the widget."""
+    fill = ctx.color(w_cfg.props.get("color"))
+    lines = [(chr(int(code, 16)), _get_font(size, ICON_FONT_FAMILY))]
+    if caption is not None:
+        lines.append((caption, _widget_font(w_cfg, _prop_int(w_cfg.props, "font_size", 12))))
+    _draw_lines_aligned(draw, _widget_box(w_cfg), lines, fill, "CENTER")
 
 
+@register_widget("sensor", "sensor_text", dynamic=_has_entity)
 def _draw_widget_sensor(
-    hass: HomeAssistant,
+    ctx: RenderContext,
     draw: ImageDraw.ImageDraw,
     w_cfg: WidgetConfig,
 ) -> None:
-    state = _get_state(hass, w_cfg.entity_id)
+    props = w_cfg.props
+    state = ctx.state(w_cfg.entity_id)
     x1, y1 = w_cfg.x, w_cfg.y
     x2, y2 = x1 + w_cfg.width, y1 + w_cfg.height
+    fill = ctx.color(props.get("color"))
 
-    font_size = int(w_cfg.props.get("font_size", 18))
-    font = _get_font(font_size)
-    title_font = _get_font(int(w_cfg.props.get("title_font_size", font_size - 2)))
+    font_size = _prop_int(props, "value_font_size", _prop_int(props, "font_size", 18))
+    font = _widget_font(w_cfg, font_size)
+    title_font = _widget_font(
+        w_cfg, _prop_int(props, "label_font_size", _prop_int(props, "title_font_size", font_size - 2))
+    )
 
     if state is None:
         label = w_cfg.title or (w_cfg.entity_id or "")
-        _draw_text_centered(draw, (x1, y1, x2, y2), f"{label}: n/a", font)
+        _draw_text_centered(draw, (x1, y1, x2, y2), f"{label}: n/a", font, fill)
         return
 
     # Resolve friendly label
     label = w_cfg.title or state.attributes.get("friendly_name") or w_cfg.entity_id or ""
     value = state.state
-    unit = state.attributes.get("unit_of_measurement", "")
+    unit = props.get("unit") or state.attributes.get("unit_of_measurement", "")
+    if props.get("hide_unit") or str(props.get("value_format", "")).endswith("_no_unit"):
+        unit = ""
 
     # Format value (simple)
     try:
-        decimals = int(w_cfg.props.get("decimals", 1))
+        decimals = _prop_int(props, "precision", _prop_int(props, "decimals", 1))
         fval = float(value)
         value_str = f"{fval:.{decimals}f}"
     except Exception:  # noqa: BLE001
@@ -96,76 +319,107 @@ def _draw_widget_sensor(
     value_y = y1 + (y2 - y1) / 2
 
     # Label
-    if label:
-        draw.text((x1 + 4, label_y + 2), str(label), fill=0, font=title_font)
-
-    # Value
-    text = f"{value_str}{unit}"
-    vw, vh = draw.textsize(text, font=font)
+    if label and props.get("value_format", "label_value") != "value_only":
+        label = TEXT_LAYOUT_CACHE.ellipsize(title_font, str(label), w_cfg.width - 8)
+        draw.text((x1 + 4, label_y + 2), label, fill=fill, font=title_font)
+
+    # Value, cut to the widget width
+    text = f"{props.get('prefix', '')}{value_str}{unit}{props.get('postfix', '')}"
+    text = TEXT_LAYOUT_CACHE.ellipsize(font, text, w_cfg.width - 6)
+    vw, vh = _text_size(text, font)
     vx = min(x1 + 4, x2 - vw - 2)
-    draw.text((vx, value_y - vh / 2), text, fill=0, font=font)
+    draw.text((vx, value_y - vh / 2), text, fill=fill, font=font)
 
 
+@register_widget("label", "text")
 def _draw_widget_label(
+    ctx: RenderContext,
     draw: ImageDraw.ImageDraw,
     w_cfg: WidgetConfig,
 ) -> None:
-    x1, y1 = w_cfg.x, w_cfg.y
-    x2, y2 = x1 + w_cfg.width, y1 + w_cfg.height
-    text = w_cfg.title or w_cfg.props.get("text", "") or ""
+    props = w_cfg.props
+    text = w_cfg.title or props.get("text", "") or props.get("value", "") or ""
     if not text:
         return
-    font = _get_font(int(w_cfg.props.get("font_size", 18)))
-    _draw_text_centered(draw, (x1, y1, x2, y2), text, font)
+    box = _widget_box(w_cfg)
+    bg = ctx.color(props.get("bg_color", "transparent"))
+    if bg is not None:
+        draw.rectangle((box[0], box[1], box[2] - 1, box[3] - 1), fill=bg)
+    font = _widget_font(w_cfg, _prop_int(props, "font_size", 18))
+    fill = ctx.color(props.get("color"))
+    if "text_align" not in props:
+        _draw_text_centered(draw, box, text, font, fill)
+        return
+    lines = [(line, font) for line in str(text).split("\n")]
+    _draw_lines_aligned(draw, box, lines, fill, props["text_align"])
 
 
+@register_widget("clock", dynamic=True)
 def _draw_widget_clock(
-    hass: HomeAssistant,
+    ctx: RenderContext,
     draw: ImageDraw.ImageDraw,
     w_cfg: WidgetConfig,
 ) -> None:
     # Use HA's time, falling back to system if needed.
-    now = hass.states.get("sensor.time")  # optional; for simplicity
+    now = ctx.state("sensor.time")  # optional; for simplicity
     x1, y1 = w_cfg.x, w_cfg.y
-    x2, y2 = x1 + w_cfg.width, y1 + w_cfg.height
-
-    font_time = _get_font(int(w_cfg.props.get("time_font_size", 28)))
-    font_date = _get_font(int(w_cfg.props.get("date_font_size", 16)))
-
-    if now:
-        time_str = now.state
-    else:
-        from datetime import datetime
-
-        time_str = datetime.now().strftime("%H:%M")
+    fill = ctx.color(w_cfg.props.get("color"))
 
-    # Date from system since no specific entity is enforced
-    from datetime import datetime
+    font_time = _widget_font(w_cfg, _prop_int(w_cfg.props, "time_font_size", 28))
+    font_date = _widget_font(w_cfg, _prop_int(w_cfg.props, "date_font_size", 16))
 
-    date_str = datetime.now().strftime("%a, %b %d")
+    local = dt_util.now()
+    time_str = now.state if now else local.strftime("%H:%M")
+    # Date from HA's clock since no specific entity is enforced
+    date_str = local.strftime("%a, %b %d")
 
     # Time top, date below
-    tw, th = draw.textsize(time_str, font=font_time)
-    dw, dh = draw.textsize(date_str, font=font_date)
+    tw, th = _text_size(time_str, font_time)
+    dw, dh = _text_size(date_str, font_date)
 
     cx = x1 + (w_cfg.width - tw) / 2
     cy = y1 + (w_cfg.height - (th + dh + 4)) / 2
 
-    draw.text((cx, cy), time_str, fill=0, font=font_time)
-    draw.text((x1 + (w_cfg.width - dw) / 2, cy + th + 4), date_str, fill=0, font=font_date)
+    draw.text((cx, cy), time_str, fill=fill, font=font_time)
+    draw.text((x1 + (w_cfg.width - dw) / 2, cy + th + 4), date_str, fill=fill, font=font_date)
 
 
+@register_widget("datetime", dynamic=True)
+def _draw_widget_datetime(
+    ctx: RenderContext,
+    draw: ImageDraw.ImageDraw,
+    w_cfg: WidgetConfig,
+) -> None:
+    props = w_cfg.props
+    now = dt_util.now()
+    time_line = (f"{now:%H:%M}", _widget_font(w_cfg, _prop_int(props, "time_font_size", 28), weight=700))
+    date_font = _widget_font(w_cfg, _prop_int(props, "date_font_size", 16))
+
+    fmt = props.get("format", "time_date")
+    if fmt == "time_only":
+        lines = [time_line]
+    elif fmt == "date_only":
+        lines = [(f"{now:%d.%m.%Y}", date_font)]
+    elif fmt == "weekday_day_month":
+        lines = [(f"{now:%A %d %B}", date_font)]
+    else:
+        lines = [time_line, (f"{now:%a}, {now:%b} {now.day}", date_font)]
+    _draw_lines_aligned(draw, _widget_box(w_cfg), lines, ctx.color(props.get("color")), props.get("text_align", "CENTER"))
+
+
+@register_widget("list", dynamic=_has_entity)
 def _draw_widget_list(
-    hass: HomeAssistant,
+    ctx: RenderContext,
     draw: ImageDraw.ImageDraw,
     w_cfg: WidgetConfig,
 ) -> None:
-    state = _get_state(hass, w_cfg.entity_id)
+    state = ctx.state(w_cfg.entity_id)
     x = w_cfg.x + 4
     y = w_cfg.y + 4
     max_y = w_cfg.y + w_cfg.height - 4
+    fill = ctx.color(w_cfg.props.get("color"))
 
-    font = _get_font(int(w_cfg.props.get("font_size", 14)))
+    font = _widget_font(w_cfg, _prop_int(w_cfg.props, "font_size", 14))
     line_height = font.size + 4 if hasattr(font, "size") else 18
 
     items = []
@@ -186,63 +440,403 @@ def _draw_widget_list(
         if placeholder:
             items = [placeholder]
 
-    for i, item in enumerate(items):
-        item_y = y + i * line_height
-        if item_y + line_height > max_y:
+    # Long items wrap onto further lines; whatever does not fit is cut with
+    # an ellipsis.
+    max_lines = (max_y - y) // line_height
+    max_width = w_cfg.width - 8
+    lines: List[str] = []
+    for item in items:
+        if len(lines) >= max_lines:
+            if lines and not lines[-1].endswith(ELLIPSIS):
+                lines[-1] = TEXT_LAYOUT_CACHE.ellipsize(font, lines[-1] + ELLIPSIS, max_width)
             break
-        draw.text((x, item_y), f"- {item}", fill=0, font=font)
+        lines.extend(TEXT_LAYOUT_CACHE.wrap(font, f"- {item}", max_width, max_lines - len(lines)))
+    for i, line in enumerate(lines):
+        draw.text((x, y + i * line_height), line, fill=fill, font=font)
 
 
-def render_page_to_png(
+@register_widget("shape_rect", "rounded_rect", "shape_circle")
+def _draw_widget_shape(
+    ctx: RenderContext,
+    draw: ImageDraw.ImageDraw,
+    w_cfg: WidgetConfig,
+) -> None:
+    props = w_cfg.props
+    wtype = w_cfg.type.lower()
+    x1, y1, x2, y2 = _widget_box(w_cfg)
+    box = (x1, y1, x2 - 1, y2 - 1)
+    color = props.get("color", "theme_auto")
+    filled = _prop_flag(props, "fill", False)
+    fill = ctx.color(color) if filled else None
+
+    if wtype == "rounded_rect":
+        border_width = _prop_int(props, "border_width", 4)
+        if filled and not _prop_flag(props, "show_border", True):
+            outline = fill
+        else:
+            outline = ctx.color(props.get("border_color") or ("black" if filled else color))
+    else:
+        border_width = _prop_int(props, "border_width", 1) or 1
+        outline = ctx.color(props.get("border_color") or color)
+    border_width = max(0, min(border_width, w_cfg.width // 2, w_cfg.height // 2))
+
+    if wtype == "shape_circle":
+        draw.ellipse(box, fill=fill, outline=outline, width=border_width)
+        return
+    radius = _prop_int(props, "radius", 10 if wtype == "rounded_rect" else 0)
+    if radius > 0:
+        draw.rounded_rectangle(box, radius=radius, fill=fill, outline=outline, width=border_width)
+    else:
+        draw.rectangle(box, fill=fill, outline=outline, width=border_width)
+
+
+@register_widget("line")
+def _draw_widget_line(
+    ctx: RenderContext,
+    draw: ImageDraw.ImageDraw,
+    w_cfg: WidgetConfig,
+) -> None:
+    props = w_cfg.props
+    stroke = max(1, _prop_int(props, "stroke_width", 1))
+    fill = ctx.color(props.get("color"))
+    if props.get("orientation", "horizontal") == "vertical":
+        box = (w_cfg.x, w_cfg.y, w_cfg.x + stroke - 1, w_cfg.y + w_cfg.height - 1)
+    else:
+        box = (w_cfg.x, w_cfg.y, w_cfg.x + w_cfg.width - 1, w_cfg.y + stroke - 1)
+    draw.rectangle(box, fill=fill)
+
+
+@register_widget("progress_bar", dynamic=_has_entity)
+def _draw_widget_progress_bar(
+    ctx: RenderContext,
+    draw: ImageDraw.ImageDraw,
+    w_cfg: WidgetConfig,
+) -> None:
+    props = w_cfg.props
+    x1, y1, x2, y2 = _widget_box(w_cfg)
+    fill = ctx.color(props.get("color"))
+    # Contrasting track behind the filled part.
+    track = ctx.gray(0 if fill is not None and _luma(fill) >= 128 else 255)
+
+    value = _state_number(ctx.state(w_cfg.entity_id))
+    low, high = _prop_int(props, "min", 0), _prop_int(props, "max", 100)
+    percent = 0.0
+    if value is not None and high > low:
+        percent = max(0.0, min(100.0, (value - low) * 100.0 / (high - low)))
+
+    bar_h = max(2, _prop_int(props, "bar_height", 15))
+    border = max(0, _prop_int(props, "border_width", 1))
+    label = w_cfg.title or ""
+    show_pct = _prop_flag(props, "show_percentage", True)
+    show_label = _prop_flag(props, "show_label", True) and bool(label or show_pct)
+
+    font = _widget_font(w_cfg, 12)
+    label_h = _text_size("Ag%", font)[1] + 2 if show_label else 0
+    gap = 4 if show_label else 0
+    top = y1 + (y2 - y1 - (label_h + gap + bar_h)) / 2
+
+    if show_label:
+        if label:
+            draw.text((x1, top), label, fill=fill, font=font)
+        if show_pct:
+            pct = f"{round(percent)}%"
+            draw.text((x2 - _text_size(pct, font)[0], top), pct, fill=fill, font=font)
+
+    bar_top = int(top + label_h + gap)
+    bar = (x1, bar_top, x2 - 1, bar_top + bar_h - 1)
+    draw.rectangle(bar, fill=track, outline=fill, width=border)
+    inner_w = (x2 - x1) - 2 * border
+    filled_w = int(round(inner_w * percent / 100.0))
+    if filled_w > 0:
+        draw.rectangle(
+            (x1 + border, bar_top + border, x1 + border + filled_w - 1, bar_top + bar_h - 1 - border),
+            fill=fill,
+        )
+
+
+# Battery level (at least) -> MDI glyph, as in frontend/features/battery_icon.
+_BATTERY_ICONS = (
+    (95, "F0079"),
+    (85, "F0082"),
+    (75, "F0081"),
+    (65, "F0080"),
+    (55, "F007F"),
+    (45, "F007E"),
+    (35, "F007D"),
+    (25, "F007C"),
+    (15, "F007B"),
+    (5, "F007A"),
+)
+
+
+@register_widget("battery_icon", dynamic=True)
+def _draw_widget_battery_icon(
+    ctx: RenderContext,
+    draw: ImageDraw.ImageDraw,
+    w_cfg: WidgetConfig,
+) -> None:
+    level = _state_number(ctx.state(w_cfg.entity_id or "sensor.battery_level"))
+    if level is None:
+        code = "F0091"  # battery-unknown
+    else:
+        code = next((icon for threshold, icon in _BATTERY_ICONS if level >= threshold), "F0083")
+    caption = f"{round(level)}%" if level is not None else "--%"
+    _draw_icon(ctx, draw, w_cfg, code, _icon_size(w_cfg, 24), caption)
+
+
+# Home Assistant weather condition -> MDI glyph, as in frontend/features/weather_icon.
+_WEATHER_ICONS = {
+    "clear-night": "F0594",
+    "cloudy": "F0590",
+    "exceptional": "F0026",
+    "fog": "F0591",
+    "hail": "F0592",
+    "lightning": "F0593",
+    "lightning-rainy": "F067E",
+    "partlycloudy": "F0595",
+    "pouring": "F0596",
+    "rainy": "F0597",
+    "snowy": "F0598",
+    "snowy-rainy": "F067F",
+    "sunny": "F0599",
+    "windy": "F059D",
+    "windy-variant": "F059E",
+}
+
+
+def _weather_entity(w_cfg: WidgetConfig) -> Optional[str]:
+    return w_cfg.entity_id or w_cfg.props.get("weather_entity")
+
+
+@register_widget("weather_icon", dynamic=lambda w_cfg: bool(_weather_entity(w_cfg)))
+def _draw_widget_weather_icon(
+    ctx: RenderContext,
+    draw: ImageDraw.ImageDraw,
+    w_cfg: WidgetConfig,
+) -> None:
+    state = ctx.state(_weather_entity(w_cfg))
+    code = _WEATHER_ICONS.get(state.state if state else "", "F0599")
+    _draw_icon(ctx, draw, w_cfg, code, _icon_size(w_cfg, 48))
+
+
+@register_widget("icon")
+def _draw_widget_icon(
+    ctx: RenderContext,
+    draw: ImageDraw.ImageDraw,
+    w_cfg: WidgetConfig,
+) -> None:
+    code = str(w_cfg.props.get("code") or "").strip().upper()
+    if not _ICON_CODE.match(code):
+        code = "F0595"
+    _draw_icon(ctx, draw, w_cfg, code, _icon_size(w_cfg, 24))
+
+
+_QR_ERROR_CORRECTION = {"LOW": "L", "MEDIUM": "M", "QUARTILE": "Q", "HIGH": "H"}
+
+
+@functools.lru_cache(maxsize=1)
+def _qrcode_module():
+    """The qrcode package (a manifest requirement), or None if it cannot be imported."""
+    try:
+        import qrcode
+    except ImportError as exc:
+        _LOGGER.warning("qrcode cannot be imported, QR code widgets are drawn as placeholders: %s", exc)
+        return None
+    return qrcode
+
+
+@register_widget("qr_code")
+def _draw_widget_qr_code(
+    ctx: RenderContext,
+    draw: ImageDraw.ImageDraw,
+    w_cfg: WidgetConfig,
+) -> None:
+    props = w_cfg.props
+    x1, y1, x2, y2 = _widget_box(w_cfg)
+    fg = ctx.color(props.get("color"))
+    bg = ctx.color(props.get("bg_color", "white"), default=255)
+
+    qrcode = _qrcode_module()
+    if qrcode is None:
+        # Broken install: mark the area instead of failing the render.
+        draw.rectangle((x1, y1, x2 - 1, y2 - 1), outline=fg)
+        draw.line((x1, y1, x2 - 1, y2 - 1), fill=fg)
+        draw.line((x1, y2 - 1, x2 - 1, y1), fill=fg)
+        return
+
+    level = _QR_ERROR_CORRECTION.get(str(props.get("ecc", "LOW")).upper(), "L")
+    qr = qrcode.QRCode(
+        error_correction=getattr(qrcode.constants, f"ERROR_CORRECT_{level}"),
+        border=0,
+    )
+    qr.add_data(str(props.get("value") or ""))
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+
+    modules = len(matrix)
+    scale = max(1, min(w_cfg.width, w_cfg.height) // modules)
+    ox = x1 + (w_cfg.width - modules * scale) // 2
+    oy = y1 + (w_cfg.height - modules * scale) // 2
+    if bg is not None:
+        draw.rectangle((x1, y1, x2 - 1, y2 - 1), fill=bg)
+    for row, cells in enumerate(matrix):
+        for col, dark in enumerate(cells):
+            if dark:
+                x, y = ox + col * scale, oy + row * scale
+                draw.rectangle((x, y, x + scale - 1, y + scale - 1), fill=fg)
+
+
+def _overlaps(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _is_dynamic(w_cfg: WidgetConfig) -> bool:
+    renderer = WIDGET_RENDERERS.get((w_cfg.type or "label").lower())
+    if renderer is None:
+        return False
+    return renderer.dynamic(w_cfg) if callable(renderer.dynamic) else renderer.dynamic
+
+
+def split_layers(page: PageConfig) -> Tuple[List[WidgetConfig], List[WidgetConfig]]:
+    """Split a page's widgets into (static base layer, dynamic overlay).
+
+    A static widget drawn after an overlapping overlay widget is moved to the
+    overlay as well, so the composite keeps the page's stacking order.
+    """
+    static: List[WidgetConfig] = []
+    overlay: List[WidgetConfig] = []
+    overlay_boxes: List[Box] = []
+    for w_cfg in page.widgets:
+        # Ensure widget is in bounds
+        w_cfg.clamp_to_canvas()
+        box = _widget_box(w_cfg)
+        if _is_dynamic(w_cfg) or any(_overlaps(box, other) for other in overlay_boxes):
+            overlay.append(w_cfg)
+            overlay_boxes.append(box)
+        else:
+            static.append(w_cfg)
+    return static, overlay
+
+
+def _page_dark_mode(device: DeviceConfig, page: PageConfig) -> bool:
+    if page.dark_mode in ("dark", "light"):
+        return page.dark_mode == "dark"
+    return bool(device.dark_mode)
+
+
+def _draw_widget(ctx: RenderContext, draw: ImageDraw.ImageDraw, w_cfg: WidgetConfig) -> None:
+    wtype = (w_cfg.type or "label").lower()
+    renderer = WIDGET_RENDERERS.get(wtype)
+    if renderer is None:
+        _LOGGER.debug("Skipping unknown widget type: %s", wtype)
+        return
+
+    try:
+        renderer.draw(ctx, draw, w_cfg)
+    except Exception as exc: # noqa: BLE001
+        _LOGGER.error(
+            "Error rendering widget %s in device %s: %s",
+            w_cfg.id,
+            ctx.device.device_id,
+            exc,
+        )
+
+
+def render_page_image(
     hass: HomeAssistant,
     device: DeviceConfig,
     page: PageConfig,
-) -> bytes:
+    use_layer_cache: bool = True,
+    rgb: bool = False,
+) -> Image.Image:
     """
-    Render a single page to PNG bytes.
+    Render a single page to a grayscale ("L") Pillow image, or an "RGB" one
+    keeping the editor colors if rgb is set.
 
-    - Creates an 800x480 white canvas.
-    - Draws each widget based on its type.
-    - Returns PNG bytes suitable for direct response to the device.
+    - Creates an 800x480 canvas, white (black in dark mode).
+    - Draws the static widgets once per layout revision (layers.py), then
+      the dynamic widgets onto a copy of that base layer.
     """
 
     # Use dimensions from device config, falling back to defaults
     width = device.width or IMAGE_WIDTH
     height = device.height or IMAGE_HEIGHT
 
-    # Base white canvas, 1-channel (L) for grayscale. E-ink can dither this.
-    image = Image.new("L", (width, height), color=255)
+    ctx = RenderContext(hass, device, _page_dark_mode(device, page), rgb)
+    static, overlay = split_layers(page)
+    key = (device.device_id, device.revision, page.id, ctx.dark, ctx.mode, width, height)
+    base = STATIC_LAYER_CACHE.get(key) if use_layer_cache else None
+
+    if base is None:
+        # Base canvas, 1-channel (L) for grayscale. E-ink can dither this.
+        base = Image.new(ctx.mode, (width, height), color=ctx.bg)
+        draw = ImageDraw.Draw(base)
+
+        # Optional: draw a subtle border
+        draw.rectangle((0, 0, width - 1, height - 1), outline=ctx.fg)
+
+        for w_cfg in static:
+            _draw_widget(ctx, draw, w_cfg)
+        if use_layer_cache:
+            STATIC_LAYER_CACHE.put(key, base)
+
+    image = base.copy()
     draw = ImageDraw.Draw(image)
+    for w_cfg in overlay:
+        _draw_widget(ctx, draw, w_cfg)
+    return image
 
-    # Optional: draw a subtle border
-    draw.rectangle((0, 0, width - 1, height - 1), outline=0)
 
-    for w_cfg in page.widgets:
-        # Ensure widget is in bounds
-        w_cfg.clamp_to_canvas()
+def render_page_to_png(
+    hass: HomeAssistant,
+    device: DeviceConfig,
+    page: PageConfig,
+    palette: str | None = None,
+) -> bytes:
+    """Render a single page to PNG bytes suitable for direct response to the device.
 
-        wtype = (w_cfg.type or "label").lower()
-
-        try:
-            if wtype in ("sensor", "sensor_text"):
-                _draw_widget_sensor(hass, draw, w_cfg)
-            elif wtype in ("label", "text"):
-                _draw_widget_label(draw, w_cfg)
-            elif wtype == "clock":
-                _draw_widget_clock(hass, draw, w_cfg)
-            elif wtype == "list":
-                _draw_widget_list(hass, draw, w_cfg)
-            else:
-                _LOGGER.debug("Skipping unknown widget type: %s", wtype)
-        except Exception as exc: # noqa: BLE001
-            _LOGGER.error(
-                "Error rendering widget %s in device %s: %s",
-                w_cfg.id,
-                device.device_id,
-                exc,
-            )
-
-    # Export as PNG
+    Without a palette the PNG is grayscale; with one (see dither.PALETTES) it
+    is an indexed PNG dithered with the device's mode. Pages are drawn in RGB
+    for palettes with colored inks, so colored widgets can use them.
+    """
+    image = render_page_image(hass, device, page, rgb=palette is not None and is_color_palette(palette))
+    if palette is not None:
+        image = dither_image(prepare_image(image, device), device_dither_mode(device), palette)
     output = io.BytesIO()
     image.save(output, format="PNG", optimize=True)
-    return output.getvalue()
\ No newline at end of file
+    return output.getvalue()
+
+
+def render_page_to_framebuffer(
+    hass: HomeAssistant,
+    device: DeviceConfig,
+    page: PageConfig,
+    bpp: int,
+    compression: str = COMPRESSION_NONE,
+) -> bytes:
+    """Render a single page to a packed framebuffer (see framebuffer.py),
+    dithered to the bpp's gray levels with the device's mode."""
+    return render_page_to_frame(hass, device, page, bpp, compression)[0]
+
+
+def render_page_to_frame(
+    hass: HomeAssistant,
+    device: DeviceConfig,
+    page: PageConfig,
+    bpp: int,
+    compression: str = COMPRESSION_NONE,
+) -> Tuple[bytes, DeliveredFrame]:
+    """render_page_to_framebuffer(), plus the unpacked frame it encodes.
+
+    The frame is what diffs are computed on, so callers need not decode
+    the framebuffer again.
+    """
+    image = prepare_image(render_page_image(hass, device, page), device)
+    image = dither_image(image, device_dither_mode(device), GRAY_PALETTES[bpp])
+    raw = pack_image(image, bpp)
+    crc = zlib.crc32(raw)
+    width, height = image.size
+    return (
+        encode_packed(raw, width, height, bpp, compression, crc),
+        DeliveredFrame(bpp, width, height, raw, crc),
+    )
@@ -0,0 +1,247 @@
+"""
+Pre-rendering scheduler for the ESPHome Designer Designer.
+
+Battery panels wake, fetch their page image and go back to sleep. Rendering at
+request time keeps the device awake (radio on) for the whole render. Instead,
+every time a device fetches its image we predict its next wake from the
+layout's refresh settings and render the page it fetched (PNG or framebuffer,
+whichever it fetched) shortly before then, so the request on wake is served
+from the render cache.
+
+The next wake is predicted from the time of the last fetch and:
+- deep_sleep_interval (deep_sleep_enabled) or refresh_interval,
+- no_refresh_start_hour / no_refresh_end_hour: the device does not refresh
+  inside this (local time, possibly overnight) window, so the next refresh
+  is the first interval tick after it ends,
+- daily_refresh_enabled / daily_refresh_time,
+- manual_refresh_only: only the daily refresh (if any) is predictable.
+
+If a pre-rendered page goes stale before the device wakes (an entity on it
+changed), it is rendered again right away to keep the result hot.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Set
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import PRERENDER_LEAD_TIME
+from .models import DeviceConfig
+from .render_cache import OutputFormat, PageKey, PageRenderCache
+from .storage import DashboardStorage
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _window_hour(value: Any) -> Optional[int]:
+    """A no-refresh window bound as an hour 0-23 (24 is midnight), or None if invalid."""
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 24:
+        return None
+    return value % 24
+
+
+def _window_end(local: datetime, end: int) -> datetime:
+    """First local end:00 after local, time zone aware across DST changes."""
+    day = local.date()
+    window_end = dt_util.start_of_local_day(day) + timedelta(hours=end)
+    if window_end <= local:
+        window_end = dt_util.start_of_local_day(day + timedelta(days=1)) + timedelta(hours=end)
+    return window_end
+
+
+def _in_window(hour: int, start: Optional[int], end: Optional[int]) -> bool:
+    if start is None or end is None or start == end:
+        return False
+    if start < end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def _next_daily(time_str: str, after: datetime) -> Optional[datetime]:
+    """Next local occurrence of "HH:MM" strictly after `after` (UTC result)."""
+    try:
+        hour, minute = (int(part) for part in time_str.split(":")[:2])
+        local = dt_util.as_local(after)
+        candidate = local.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    except (TypeError, ValueError):
+        return None
+    if candidate <= local:
+        candidate += timedelta(days=1)
+    return dt_util.as_utc(candidate)
+
+
+def expected_next_wake(device: DeviceConfig, last_fetch: datetime) -> Optional[datetime]:
+    """Predict when the device will next fetch its page, or None if unknown."""
+    candidates = []
+
+    interval = device.deep_sleep_interval if device.deep_sleep_enabled else device.refresh_interval
+    if not device.manual_refresh_only and interval and interval > 0:
+        wake = last_fetch + timedelta(seconds=interval)
+        start, end = _window_hour(device.no_refresh_start_hour), _window_hour(device.no_refresh_end_hour)
+        local = dt_util.as_local(wake)
+        if _in_window(local.hour, start, end):
+            window_end = _window_end(local, end)
+            ticks = math.ceil((dt_util.as_utc(window_end) - last_fetch).total_seconds() / interval)
+            wake = last_fetch + timedelta(seconds=ticks * interval)
+        candidates.append(wake)
+
+    if device.daily_refresh_enabled:
+        daily = _next_daily(device.daily_refresh_time, last_fetch)
+        if daily is not None:
+            candidates.append(daily)
+
+    return min(candidates) if candidates else None
+
+
+class PreRenderScheduler:
+    """Renders the page each polling device last fetched just before it wakes."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        storage: DashboardStorage,
+        render_cache: PageRenderCache,
+        lead_time: float = PRERENDER_LEAD_TIME,
+    ) -> None:
+        self._hass = hass
+        self._storage = storage
+        self._render_cache = render_cache
+        self._lead_time = timedelta(seconds=lead_time)
+        self._last_fetch: Dict[str, datetime] = {}
+        # Output format each device fetched last (None: PNG).
+        self._outputs: Dict[str, Optional[OutputFormat]] = {}
+        # Page index each device fetched last (None: its current_page).
+        self._pages: Dict[str, Optional[int]] = {}
+        self._next_wake: Dict[str, datetime] = {}
+        self._timers: Dict[str, Callable[[], None]] = {}
+        # Devices whose page was pre-rendered and that have not fetched it yet.
+        self._armed: Set[str] = set()
+        self._rendering: Set[str] = set()
+        render_cache.async_add_stale_listener(self._async_page_stale)
+        self._prerenders = 0
+        self._rerenders = 0
+        self._errors = 0
+
+    @callback
+    def async_note_fetch(
+        self, device_id: str, output: Optional[OutputFormat] = None, page_index: Optional[int] = None
+    ) -> None:
+        """Record that a device fetched page_index now; schedule the next pre-render."""
+        self._last_fetch[device_id] = dt_util.utcnow()
+        self._outputs[device_id] = output
+        self._pages[device_id] = page_index
+        self._armed.discard(device_id)
+        self._async_schedule(device_id)
+
+    def _page_index(self, device_id: str, device: DeviceConfig) -> int:
+        """Page to pre-render: the one last fetched, else the device's current page."""
+        page_index = self._pages.get(device_id)
+        if page_index is None or not 0 <= page_index < len(device.pages):
+            return device.current_page
+        return page_index
+
+    @callback
+    def _async_schedule(self, device_id: str) -> None:
+        cancel = self._timers.pop(device_id, None)
+        if cancel is not None:
+            cancel()
+        self._next_wake.pop(device_id, None)
+
+        device = self._storage.get_device(device_id)
+        if device is None:
+            return
+        try:
+            wake = expected_next_wake(device, self._last_fetch[device_id])
+        except Exception as exc:  # noqa: BLE001
+            # Called from the image request path; a bad setting must not fail it.
+            _LOGGER.error("Predicting the next wake of %s failed: %s", device_id, exc)
+            self._errors += 1
+            return
+        if wake is None:
+            return
+
+        when = wake - self._lead_time
+        # Clock pages are cached per minute: render within the wake's minute.
+        if self._render_cache.is_time_dependent(device, self._page_index(device_id, device)):
+            when = max(when, wake.replace(second=0, microsecond=0))
+        when = max(when, dt_util.utcnow())
+
+        self._next_wake[device_id] = wake
+        self._timers[device_id] = async_track_point_in_utc_time(
+            self._hass, partial(self._async_fire, device_id), when
+        )
+
+    @callback
+    def _async_fire(self, device_id: str, _now: datetime) -> None:
+        self._timers.pop(device_id, None)
+        self._hass.async_create_task(self._async_prerender(device_id))
+
+    async def _async_prerender(self, device_id: str, rerender: bool = False) -> None:
+        if device_id in self._rendering:
+            return
+        device = self._storage.get_device(device_id)
+        if device is None:
+            return
+        page_index = self._page_index(device_id, device)
+        self._rendering.add(device_id)
+        try:
+            await self._render_cache.async_get_render(
+                device, page_index, self._outputs.get(device_id), wait=True
+            )
+        except Exception as exc:  # noqa: BLE001
+            self._errors += 1
+            _LOGGER.error("Pre-rendering %s failed: %s", device_id, exc)
+            return
+        finally:
+            self._rendering.discard(device_id)
+
+        if rerender:
+            self._rerenders += 1
+        else:
+            self._prerenders += 1
+        self._armed.add(device_id)
+        _LOGGER.debug("Pre-rendered page %s of %s", page_index, device_id)
+
+    @callback
+    def _async_page_stale(self, page_key: PageKey) -> None:
+        device_id, page_index = page_key
+        if device_id not in self._armed:
+            return
+        wake = self._next_wake.get(device_id)
+        device = self._storage.get_device(device_id)
+        if wake is None or device is None or dt_util.utcnow() > wake + self._lead_time:
+            # The device missed its wake; wait for its next fetch.
+            self._armed.discard(device_id)
+            return
+        if page_index == self._page_index(device_id, device):
+            self._hass.async_create_task(self._async_prerender(device_id, rerender=True))
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel all pending pre-renders; scheduling resumes on the next fetch."""
+        for cancel in self._timers.values():
+            cancel()
+        self._timers.clear()
+        self._next_wake.clear()
+        self._armed.clear()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "devices": len(self._last_fetch),
+            "scheduled": len(self._timers),
+            "armed": len(self._armed),
+            "prerenders": self._prerenders,
+            "rerenders": self._rerenders,
+            "errors": self._errors,
+            "next_wakes": {
+                device_id: wake.isoformat() for device_id, wake in sorted(self._next_wake.items())
+            },
+        }
@@ -5,6 +5,7 @@ Implements:
 - esphome_designer.set_page
 - esphome_designer.next_page
 - esphome_designer.prev_page
+- esphome_designer.render_all (warm the render cache)
 
 These operate purely on the stored DeviceConfig state and do not hard-code
 any user-specific entities.
@@ -15,6 +16,7 @@ entirely client-side in frontend/js/io/yaml_export.js
 
 from __future__ import annotations
 
+import functools
 import logging
 
 import voluptuous as vol
@@ -28,6 +30,7 @@ from .const import (
     SERVICE_SET_PAGE,
     SERVICE_NEXT_PAGE,
     SERVICE_PREV_PAGE,
+    SERVICE_RENDER_ALL,
 )
 from .storage import DashboardStorage
 
@@ -51,7 +54,7 @@ async def _handle_set_page(hass: HomeAssistant, call: ServiceCall) -> None:
 
     _LOGGER.debug("%s: set_page called for device=%s page=%s", DOMAIN, device_id, page_index)
 
-    async def updater(device):
+    def updater(device):
         device.set_page(page_index)
 
     updated = await storage.async_update_device(device_id, updater)
@@ -65,7 +68,7 @@ async def _handle_next_page(hass: HomeAssistant, call: ServiceCall) -> None:
 
     _LOGGER.debug("%s: next_page called for device=%s", DOMAIN, device_id)
 
-    async def updater(device):
+    def updater(device):
         device.next_page()
 
     updated = await storage.async_update_device(device_id, updater)
@@ -79,7 +82,7 @@ async def _handle_prev_page(hass: HomeAssistant, call: ServiceCall) -> None:
 
     _LOGGER.debug("%s: prev_page called for device=%s", DOMAIN, device_id)
 
-    async def updater(device):
+    def updater(device):
         device.prev_page()
 
     updated = await storage.async_update_device(device_id, updater)
@@ -87,6 +90,26 @@ async def _handle_prev_page(hass: HomeAssistant, call: ServiceCall) -> None:
         _LOGGER.warning("%s: prev_page failed, unknown device_id=%s", DOMAIN, device_id)
 
 
+async def _handle_render_all(hass: HomeAssistant, call: ServiceCall) -> None:
+    storage = _require_storage(hass)
+    render_cache = hass.data.get(DOMAIN, {}).get("render_cache")
+    if render_cache is None:
+        raise RuntimeError(f"{DOMAIN}: render cache not initialized")
+
+    device_id: str | None = call.data.get(CONF_DEVICE_ID)
+    if device_id:
+        device = storage.get_device(device_id)
+        if device is None:
+            _LOGGER.warning("%s: render_all failed, unknown device_id=%s", DOMAIN, device_id)
+            return
+        devices = [device]
+    else:
+        devices = list(storage.state.devices.values())
+
+    rendered = await render_cache.async_render_all(devices)
+    _LOGGER.debug("%s: render_all rendered %s pages of %s devices", DOMAIN, rendered, len(devices))
+
+
 def async_register_services(hass: HomeAssistant, storage: DashboardStorage) -> None:
     """Register integration services (idempotent)."""
     global _REGISTERED
@@ -104,24 +127,31 @@ def async_register_services(hass: HomeAssistant, storage: DashboardStorage) -> N
     hass.services.async_register(
         DOMAIN,
         SERVICE_SET_PAGE,
-        lambda call: hass.async_create_task(_handle_set_page(hass, call)),
+        functools.partial(_handle_set_page, hass),
         schema=base_schema.extend({vol.Required("page"): cv.positive_int}),
     )
 
     hass.services.async_register(
         DOMAIN,
         SERVICE_NEXT_PAGE,
-        lambda call: hass.async_create_task(_handle_next_page(hass, call)),
+        functools.partial(_handle_next_page, hass),
         schema=base_schema,
     )
 
     hass.services.async_register(
         DOMAIN,
         SERVICE_PREV_PAGE,
-        lambda call: hass.async_create_task(_handle_prev_page(hass, call)),
+        functools.partial(_handle_prev_page, hass),
         schema=base_schema,
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RENDER_ALL,
+        functools.partial(_handle_render_all, hass),
+        schema=vol.Schema({vol.Optional(CONF_DEVICE_ID): cv.string}),
+    )
+
     _REGISTERED = True
     _LOGGER.debug("%s: services registered", DOMAIN)
 
@@ -133,7 +163,7 @@ def async_unregister_services(hass: HomeAssistant) -> None:
     if not _REGISTERED:
         return
 
-    for service in (SERVICE_SET_PAGE, SERVICE_NEXT_PAGE, SERVICE_PREV_PAGE):
+    for service in (SERVICE_SET_PAGE, SERVICE_NEXT_PAGE, SERVICE_PREV_PAGE, SERVICE_RENDER_ALL):
         if hass.services.has_service(DOMAIN, service):
             hass.services.async_remove(DOMAIN, service)
 
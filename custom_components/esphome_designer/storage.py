@@ -3,30 +3,145 @@ Persistent storage for the ESPHome Designer Designer.
 
 Uses Home Assistant's Store helper to persist the DashboardState defined in models.py.
 This is the single source of truth for all devices, pages, and widgets.
+
+Layouts are sharded: every layout lives in its own Store file and a small index
+file records which layouts exist (and the last active one). Saving a layout
+only serializes and writes that layout's shard, so an editor autosave costs
+O(widgets in that layout) instead of O(all layouts).
+
+Shards are loaded as raw dicts and only parsed into models on first access
+(see LazyDeviceMap); the index carries a small summary of every layout,
+updated as layouts change, so listing layouts does not need to parse any.
+The index is only rewritten when a layout is added or removed or a summary
+field other than revision, modified time and size changes; shards carry
+those three and async_load takes them from there.
 """
 
 from __future__ import annotations
 
+import asyncio
+import gzip
+import hashlib
 import logging
-from typing import Any, Dict, Optional
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.json import json_bytes, json_fragment
 from homeassistant.helpers.storage import Store
-
-from .const import DOMAIN, STORAGE_KEY, STORAGE_VERSION
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DEFAULT_SAVE_DELAY,
+    DOMAIN,
+    LEGACY_STORAGE_KEY,
+    STORAGE_INDEX_SUFFIX,
+    STORAGE_KEY,
+    STORAGE_LAYOUT_SUFFIX,
+    STORAGE_VERSION,
+)
+from .layout_patch import apply_layout_patch
 from .models import DashboardState, DeviceConfig
 
 _LOGGER = logging.getLogger(__name__)
 
+# Layout IDs matching this pattern are used verbatim in shard file names.
+# Anything else (upper case, dots, spaces, unicode) is hashed so it is always
+# a safe, case-insensitive-filesystem friendly file name.
+_SAFE_SHARD_RE = re.compile(r"^[a-z0-9_-]{1,64}$")
 
-class DashboardStorage:
-    """Wrapper around Store to manage DashboardState."""
+# Layout revisions come from one storage-wide counter. The index persists a
+# "revision_floor" above every revision handed out so far, reserved in blocks
+# of this size, so revisions (and ETags) never repeat, even after a crash
+# that lost delayed writes.
+_REVISION_RESERVE = 1024
+
+# Per-layout summary kept in the index (and served by async_list_layouts).
+_SUMMARY_FIELDS = (
+    "name",
+    "device_model",
+    "page_count",
+    "widget_count",
+    "revision",
+    "modified",
+    "size",
+)
+
+# Summary fields that change with (nearly) every edit. Shards carry them as
+# well and async_load restores them from there, so a change to only these
+# does not rewrite the index.
+_SHARD_SUMMARY_FIELDS = ("revision", "modified", "size")
+
+
+class LayoutConflictError(Exception):
+    """Raised when an If-Match precondition does not match the stored layout."""
 
-    def __init__(self, hass: HomeAssistant, storage_key: str = STORAGE_KEY, version: int = STORAGE_VERSION) -> None:
+    def __init__(self, layout_id: str, device: Optional[DeviceConfig]) -> None:
+        super().__init__(f"layout {layout_id} was modified concurrently")
+        self.layout_id = layout_id
+        self.revision = device.revision if device else None
+        self.etag = device.etag if device else None
+
+
+class DashboardStorage:
+    """Wrapper around Store to manage DashboardState.
+
+    On-disk layout:
+    - "<storage_key>.index": {"layouts": {layout_id: {"store_key": ..., "name": ...,
+                                                      "device_model": ...,
+                                                      "page_count": ...,
+                                                      "widget_count": ...,
+                                                      "revision": ...,
+                                                      "modified": ...,
+                                                      "size": ...}},
+                              "last_active_layout_id": ...,
+                              "revision_floor": ...}
+    - "<storage_key>.layout.<slug>": {"layout_id": ..., "revision": ...,
+                                      "modified": ..., "size": ...,
+                                      "layout": DeviceConfig.to_dict()}
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        storage_key: str = STORAGE_KEY,
+        version: int = STORAGE_VERSION,
+        save_delay: float = DEFAULT_SAVE_DELAY,
+    ) -> None:
         self._hass = hass
-        self._store = Store(hass, version, storage_key)
+        self._storage_key = storage_key
+        self._version = version
+        self._index_store = Store(hass, version, f"{storage_key}{STORAGE_INDEX_SUFFIX}")
+        self._layout_stores: Dict[str, Store] = {}
+        # layout_id -> shard Store key, mirrors the persisted index
+        self._shard_keys: Dict[str, str] = {}
+        # layout_id -> index summary (_SUMMARY_FIELDS), maintained on mutation
+        self._layout_summaries: Dict[str, Dict[str, Any]] = {}
+        self._saved_index: Optional[Dict[str, Any]] = None
         self._state: Optional[DashboardState] = None
 
+        self._save_delay = max(0.0, float(save_delay))
+        self._dirty_layouts: set[str] = set()
+        self._index_dirty = False
+        self._saves_requested = 0
+        self._saves_performed = 0
+
+        self._revision = 0
+        self._revision_floor = 0
+
+        # layout_id -> (revision, JSON bytes) / (revision, gzipped JSON bytes)
+        self._json_cache: Dict[str, Tuple[int, bytes]] = {}
+        self._gzip_cache: Dict[str, Tuple[int, bytes]] = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        # Per-layout locks so read-check-replace sequences cannot interleave.
+        # Entries are never dropped: a deleted layout's lock may still have
+        # waiters, and a fresh lock for the same id would run beside them.
+        self._layout_locks: Dict[str, asyncio.Lock] = {}
+
+        self._change_listeners: List[Callable[[str], None]] = []
+
     @property
     def state(self) -> DashboardState:
         """Return in-memory state; guaranteed non-None after async_load."""
@@ -35,51 +150,449 @@ class DashboardStorage:
             self._state = DashboardState()
         return self._state
 
+    #
+    # Shard bookkeeping
+    #
+
+    def _shard_key(self, layout_id: str) -> str:
+        """Return (allocating if needed) the Store key of a layout shard."""
+        key = self._shard_keys.get(layout_id)
+        if key is not None:
+            return key
+
+        if _SAFE_SHARD_RE.match(layout_id):
+            slug = layout_id
+        else:
+            slug = "h_" + hashlib.sha1(layout_id.encode("utf-8")).hexdigest()[:16]
+
+        key = f"{self._storage_key}{STORAGE_LAYOUT_SUFFIX}{slug}"
+        used = set(self._shard_keys.values())
+        suffix = 2
+        candidate = key
+        while candidate in used:
+            candidate = f"{key}_{suffix}"
+            suffix += 1
+
+        self._shard_keys[layout_id] = candidate
+        return candidate
+
+    def _layout_store(self, layout_id: str) -> Store:
+        key = self._shard_key(layout_id)
+        store = self._layout_stores.get(key)
+        if store is None:
+            store = Store(self._hass, self._version, key)
+            self._layout_stores[key] = store
+        return store
+
+    def _update_summary(self, layout_id: str, device: DeviceConfig, modified: bool = True) -> bool:
+        """Refresh a layout's index summary from the device.
+
+        size is left as is; it is filled in when the shard is serialized.
+        Returns True if the index needs rewriting: the layout is new or a
+        field other than _SHARD_SUMMARY_FIELDS changed.
+        """
+        previous = self._layout_summaries.get(layout_id)
+        summary = self._layout_summaries[layout_id] = {
+            "name": device.name,
+            "device_model": device.device_model,
+            "page_count": len(device.pages),
+            "widget_count": sum(len(page.widgets) for page in device.pages),
+            "revision": device.revision,
+            "modified": dt_util.utcnow().isoformat() if modified else (previous or {}).get("modified"),
+            "size": (previous or {}).get("size"),
+        }
+        if previous is None:
+            return True
+        return any(
+            summary[field] != previous.get(field)
+            for field in _SUMMARY_FIELDS
+            if field not in _SHARD_SUMMARY_FIELDS
+        )
+
+    def _layout_summary(self, layout_id: str) -> Optional[Dict[str, Any]]:
+        """Index summary of a layout, without hydrating it when possible."""
+        summary = self._layout_summaries.get(layout_id)
+        if summary is not None and summary.get("size") is not None and summary.get("widget_count") is not None:
+            return summary
+
+        # Summary missing or written by an older version: build it once.
+        device = self.state.devices.get(layout_id)
+        if device is None:
+            return None
+        self._update_summary(layout_id, device, modified=False)
+        self._layout_summaries[layout_id]["size"] = len(self.layout_json(device))
+        self._schedule_index_save()
+        return self._layout_summaries[layout_id]
+
+    def _index_data(self) -> Dict[str, Any]:
+        layouts: Dict[str, Any] = {}
+        for layout_id in self.state.devices:
+            record = {"store_key": self._shard_key(layout_id)}
+            record.update(self._layout_summaries.get(layout_id, {}))
+            layouts[layout_id] = record
+        return {
+            "layouts": layouts,
+            "last_active_layout_id": self.state.last_active_layout_id,
+            "revision_floor": self._revision_floor,
+        }
+
+    def _next_revision(self) -> int:
+        """Allocate the next layout revision, reserving a new block if needed."""
+        self._revision += 1
+        if self._revision >= self._revision_floor:
+            self._revision_floor = self._revision + _REVISION_RESERVE
+            # Persist the reservation right away rather than after save_delay.
+            self._hass.async_create_task(self._async_save_index())
+        return self._revision
+
+    def _layout_lock(self, layout_id: str) -> asyncio.Lock:
+        lock = self._layout_locks.get(layout_id)
+        if lock is None:
+            lock = self._layout_locks[layout_id] = asyncio.Lock()
+        return lock
+
+    def _layout_exists(self, layout_id: str) -> bool:
+        """Whether the layout is stored, without hydrating it."""
+        return self._state is not None and layout_id in self._state.devices
+
+    def _check_not_deleted(self, layout_id: str, existed: bool) -> None:
+        """Raise LayoutConflictError if the layout was deleted while waiting for its lock."""
+        if existed and not self._layout_exists(layout_id):
+            raise LayoutConflictError(layout_id, None)
+
+    @staticmethod
+    def _check_precondition(
+        layout_id: str, existing: Optional[DeviceConfig], if_match: Optional[List[str]]
+    ) -> None:
+        """Raise LayoutConflictError unless if_match (ETags) covers existing.
+
+        None means "no precondition"; "*" matches any existing layout.
+        """
+        if if_match is None:
+            return
+        if existing is not None and ("*" in if_match or existing.etag in if_match):
+            return
+        raise LayoutConflictError(layout_id, existing)
+
+    #
+    # Load / save
+    #
+
     async def async_load(self) -> None:
         """Load state from disk into memory."""
-        data = await self._store.async_load()
-        
+        index = await self._index_store.async_load()
+
+        if index is None:
+            await self._async_migrate_single_blob()
+            return
+
+        state = DashboardState(last_active_layout_id=index.get("last_active_layout_id"))
+        state.devices.on_discard = self._discard_layout
+
+        layouts = index.get("layouts", {}) or {}
+        for layout_id, record in layouts.items():
+            record = record or {}
+            store_key = record.get("store_key")
+            if store_key:
+                self._shard_keys[layout_id] = store_key
+                # Indexes written by older versions lack (some) summary fields;
+                # those layouts are hydrated when first listed.
+                self._layout_summaries[layout_id] = {
+                    field: record.get(field) for field in _SUMMARY_FIELDS
+                }
+
+        layout_ids = list(self._shard_keys)
+        shards = await asyncio.gather(
+            *(self._layout_store(layout_id).async_load() for layout_id in layout_ids)
+        )
+
+        # The first revision allocated after a restart reserves a new block.
+        self._revision_floor = int(index.get("revision_floor", 0))
+        self._revision = self._revision_floor
+        for layout_id, shard in zip(layout_ids, shards):
+            if not shard or not isinstance(shard.get("layout"), dict):
+                _LOGGER.warning("%s: Layout shard for %s is missing, skipping", DOMAIN, layout_id)
+                self._forget_layout(layout_id)
+                continue
+            try:
+                revision = int(shard.get("revision", 0))
+            except (TypeError, ValueError):
+                revision = 0
+            # Parsed into a DeviceConfig on first access.
+            state.devices.add_raw(layout_id, shard["layout"], revision)
+            summary = self._layout_summaries[layout_id]
+            summary["revision"] = revision
+            # Newer than the index when only these changed since its last write.
+            for field in ("modified", "size"):
+                if shard.get(field) is not None:
+                    summary[field] = shard[field]
+            self._revision = max(self._revision, revision)
+
+        self._state = state
+        self._saved_index = index
+        _LOGGER.debug("%s: Loaded %d layouts from sharded storage", DOMAIN, len(state.devices))
+
+    async def _async_migrate_single_blob(self) -> None:
+        """One-time migration from the single-key (or legacy reterminal) format.
+
+        The index is written last so an interrupted migration is simply retried
+        on the next start. The old file is left in place as a backup.
+        """
+        data = await Store(self._hass, self._version, self._storage_key).async_load()
+        source = self._storage_key
+
         # MIGRATION: If new storage is empty, check for legacy 0.8.6.2 storage
         if not data:
-            _LOGGER.debug("%s: No new state found, checking for legacy 'reterminal_dashboard' storage", DOMAIN)
+            _LOGGER.debug("%s: No new state found, checking for legacy '%s' storage", DOMAIN, LEGACY_STORAGE_KEY)
             # Legacy store uses exact same format but different key
-            legacy_store = Store(self._hass, 1, "reterminal_dashboard")
-            legacy_data = await legacy_store.async_load()
-            
-            if legacy_data:
-                _LOGGER.info("%s: Found legacy 0.8.6.2 layouts, migrating to %s...", DOMAIN, DOMAIN)
-                data = legacy_data
-                # We will save this to the new store automatically on next save, 
-                # or we can force it immediately below. For safety, let's just use it as 'data'.
-
-        if data:
-            try:
-                self._state = DashboardState.from_dict(data)
-                _LOGGER.debug("%s: Loaded dashboard state from storage", DOMAIN)
-                
-                # If we just loaded legacy data (and thus self._state is dirty relative to new store),
-                # we should probably persist it to the new store soon.
-                # However, to avoid side effects during load, we'll let the user's first action 
-                # (or auto-save on change) trigger the save. 
-                # But actually, if they never change anything, they might lose it?
-                # Let's force a save if we see it was a migration? 
-                # No, async_load is often called at startup. Calling async_save here might be risky 
-                # if the loop isn't ready or if it causes a loop. 
-                # Safe approach: Just load it into memory. It will be saved when they make a change.
-            except Exception as exc:  # noqa: BLE001
-                _LOGGER.error("%s: Failed to parse stored state, starting fresh: %s", DOMAIN, exc)
-                self._state = DashboardState()
-        else:
+            data = await Store(self._hass, 1, LEGACY_STORAGE_KEY).async_load()
+            source = LEGACY_STORAGE_KEY
+
+        if not data:
             _LOGGER.debug("%s: No storage found (new or legacy), starting fresh", DOMAIN)
             self._state = DashboardState()
+            return
+
+        try:
+            self._state = DashboardState.from_dict(data)
+        except Exception as exc:  # noqa: BLE001
+            _LOGGER.error("%s: Failed to parse stored state from '%s', starting fresh: %s", DOMAIN, source, exc)
+            self._state = DashboardState()
+            return
+
+        _LOGGER.info(
+            "%s: Migrating %d layouts from '%s' to sharded storage",
+            DOMAIN,
+            len(self._state.devices),
+            source,
+        )
+        for layout_id, device in self._state.devices.items():
+            self._revision += 1
+            device.revision = self._revision
+            self._update_summary(layout_id, device)
+        self._revision_floor = self._revision + _REVISION_RESERVE
+        await asyncio.gather(
+            *(self._async_save_layout(layout_id) for layout_id in self._state.devices)
+        )
+        await self._async_save_index()
+
+    #
+    # Dirty tracking / write-behind
+    #
+    # Mutations only mark a shard (or the index) dirty; Store.async_delay_save
+    # coalesces bursts into one write per shard after `save_delay` seconds.
+    # Store also registers a final-write listener, so pending saves are
+    # flushed on Home Assistant shutdown; async_flush covers entry unload.
+    #
+
+    @property
+    def save_delay(self) -> float:
+        """Seconds a dirty shard waits before being written."""
+        return self._save_delay
+
+    @save_delay.setter
+    def save_delay(self, value: float) -> None:
+        self._save_delay = max(0.0, float(value))
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Save counters for diagnostics."""
+        return {
+            "saves_requested": self._saves_requested,
+            "saves_performed": self._saves_performed,
+            "dirty_layouts": len(self._dirty_layouts),
+            "index_dirty": self._index_dirty,
+            "save_delay": self._save_delay,
+            "serialization_cache_hits": self._cache_hits,
+            "serialization_cache_misses": self._cache_misses,
+            "layouts": len(self.state.devices),
+            "layouts_hydrated": self.state.devices.hydrated_count,
+        }
+
+    @callback
+    def _mark_layout_dirty(self, layout_id: str) -> None:
+        """Record a layout change: bump its revision and schedule a coalesced write."""
+        device = self.state.devices[layout_id]
+        device.revision = self._next_revision()
+        self._invalidate_serialized(layout_id)
+        index_changed = self._update_summary(layout_id, device)
+        self._saves_requested += 1
+        self._dirty_layouts.add(layout_id)
+        self._layout_store(layout_id).async_delay_save(
+            lambda: self._layout_save_data(layout_id), self._save_delay
+        )
+        # New layouts and changed summaries (name, counts, ...) also change the index.
+        if index_changed:
+            self._schedule_index_save()
+        for listener in list(self._change_listeners):
+            listener(layout_id)
+
+    @callback
+    def async_add_change_listener(self, listener: Callable[[str], None]) -> Callable[[], None]:
+        """Call listener(layout_id) whenever a layout changes (new revision)."""
+        self._change_listeners.append(listener)
+
+        @callback
+        def remove() -> None:
+            if listener in self._change_listeners:
+                self._change_listeners.remove(listener)
+
+        return remove
+
+    @callback
+    def _mark_index_dirty(self) -> None:
+        """Schedule a coalesced index write."""
+        self._saves_requested += 1
+        self._schedule_index_save()
+
+    @callback
+    def _set_last_active(self, layout_id: Optional[str]) -> None:
+        """Record the last active layout; it lives in the index."""
+        if self.state.last_active_layout_id == layout_id:
+            return
+        self.state.last_active_layout_id = layout_id
+        self._mark_index_dirty()
+
+    @callback
+    def _schedule_index_save(self) -> None:
+        # The payload is built by _index_save_data when the write happens.
+        self._index_dirty = True
+        self._index_store.async_delay_save(self._index_save_data, self._save_delay)
+
+    @callback
+    def _layout_save_data(self, layout_id: str) -> Dict[str, Any]:
+        """Serialize a layout shard; called by Store when the write happens."""
+        self._dirty_layouts.discard(layout_id)
+        self._saves_performed += 1
+        device = self.state.devices[layout_id]
+        _LOGGER.debug("%s: Writing layout %s", DOMAIN, layout_id)
+        # Reuse (and warm) the API serialization cache; the encoded bytes are
+        # immutable, so Store can write them from its executor safely.
+        encoded = self.layout_json(device)
+        summary = self._layout_summaries.get(layout_id)
+        if summary is not None:
+            summary["size"] = len(encoded)
+        return {
+            "layout_id": layout_id,
+            "revision": device.revision,
+            "modified": summary.get("modified") if summary else None,
+            "size": len(encoded),
+            "layout": json_fragment(encoded),
+        }
+
+    @callback
+    def _index_save_data(self) -> Dict[str, Any]:
+        self._index_dirty = False
+        self._saves_performed += 1
+        data = self._index_data()
+        self._saved_index = data
+        return data
+
+    async def _async_save_layout(self, layout_id: str) -> None:
+        """Write a single layout shard immediately."""
+        if layout_id not in self.state.devices:
+            return
+        await self._layout_store(layout_id).async_save(self._layout_save_data(layout_id))
+
+    async def _async_save_index(self) -> None:
+        """Write the index immediately if its content changed."""
+        if self._index_data() == self._saved_index:
+            self._index_dirty = False
+            return
+        await self._index_store.async_save(self._index_save_data())
+
+    @callback
+    def _forget_layout(self, layout_id: str) -> Optional[str]:
+        """Drop the bookkeeping of a layout; returns its shard key, if any."""
+        self._dirty_layouts.discard(layout_id)
+        self._invalidate_serialized(layout_id)
+        self._layout_summaries.pop(layout_id, None)
+        return self._shard_keys.pop(layout_id, None)
+
+    @callback
+    def _discard_layout(self, layout_id: str) -> None:
+        """LazyDeviceMap.on_discard: delete a stored layout that fails to parse."""
+        if self.state.last_active_layout_id == layout_id:
+            self.state.last_active_layout_id = None
+        self._mark_index_dirty()
+        key = self._forget_layout(layout_id)
+        if key is not None:
+            self._hass.async_create_task(self._async_remove_shard_store(key))
+
+    async def _async_remove_layout_shard(self, layout_id: str) -> None:
+        key = self._forget_layout(layout_id)
+        if key is not None:
+            await self._async_remove_shard_store(key)
+
+    async def _async_remove_shard_store(self, key: str) -> None:
+        # async_remove also cancels a pending delayed write for this shard.
+        store = self._layout_stores.pop(key, None) or Store(self._hass, self._version, key)
+        await store.async_remove()
+
+    #
+    # Serialization cache
+    #
+    # Layout GETs and POST echoes serve pre-encoded bytes keyed on the layout
+    # revision; any mutation bumps the revision and drops the cached bytes.
+    #
+
+    def layout_json(self, device: DeviceConfig) -> bytes:
+        """Return device.to_dict() encoded as JSON bytes, cached per revision."""
+        cacheable = self.state.devices.get(device.device_id) is device
+        if cacheable:
+            cached = self._json_cache.get(device.device_id)
+            if cached is not None and cached[0] == device.revision:
+                self._cache_hits += 1
+                return cached[1]
+
+        self._cache_misses += 1
+        data = json_bytes(device.to_dict())
+        if cacheable:
+            self._json_cache[device.device_id] = (device.revision, data)
+        return data
+
+    def layout_json_gzip(self, device: DeviceConfig) -> bytes:
+        """Return the gzip-compressed layout_json(), cached per revision."""
+        cacheable = self.state.devices.get(device.device_id) is device
+        if cacheable:
+            cached = self._gzip_cache.get(device.device_id)
+            if cached is not None and cached[0] == device.revision:
+                self._cache_hits += 1
+                return cached[1]
+
+        # mtime=0 keeps the output (and thus the response) deterministic.
+        data = gzip.compress(self.layout_json(device), mtime=0)
+        if cacheable:
+            self._gzip_cache[device.device_id] = (device.revision, data)
+        return data
+
+    def _invalidate_serialized(self, layout_id: str) -> None:
+        self._json_cache.pop(layout_id, None)
+        self._gzip_cache.pop(layout_id, None)
+
+    async def async_flush(self) -> None:
+        """Write all pending (dirty) shards and the index now."""
+        if self._state is None:
+            return
+        await asyncio.gather(
+            *(self._async_save_layout(layout_id) for layout_id in list(self._dirty_layouts))
+        )
+        if self._index_dirty:
+            await self._async_save_index()
+        _LOGGER.debug("%s: Pending layout saves flushed", DOMAIN)
 
     async def async_save(self) -> None:
-        """Persist current state to disk."""
+        """Persist every layout and the index to disk.
+
+        Prefer the per-layout helpers below; this is for bulk changes made
+        directly on ``state``.
+        """
         if self._state is None:
             _LOGGER.warning("%s: async_save called with no state initialized", DOMAIN)
             return
-        data = self._state.to_dict()
-        await self._store.async_save(data)
+        for layout_id in self._state.devices:
+            self._mark_layout_dirty(layout_id)
+        await self.async_flush()
         _LOGGER.debug("%s: Dashboard state saved", DOMAIN)
 
     #
@@ -89,7 +602,7 @@ class DashboardStorage:
     async def async_get_or_create_device(self, device_id: str, api_token: str) -> DeviceConfig:
         """Get or create a device configuration."""
         device = self.state.get_or_create_device(device_id, api_token)
-        await self.async_save()
+        self._mark_layout_dirty(device_id)
         return device
 
     async def async_get_default_device(self) -> DeviceConfig:
@@ -113,7 +626,7 @@ class DashboardStorage:
         
         # No devices exist, create default
         device = self.state.get_or_create_device("reterminal_e1001", api_token="")
-        await self.async_save()
+        self._mark_layout_dirty(device.device_id)
         return device
 
     async def async_get_layout_default(self) -> DeviceConfig:
@@ -122,9 +635,8 @@ class DashboardStorage:
 
     async def async_save_layout_default(self, device: DeviceConfig) -> None:
         """Persist a DeviceConfig as the default device."""
+        self._set_last_active(device.device_id)
         await self.async_set_device(device)
-        self.state.last_active_layout_id = device.device_id
-        await self.async_save()
 
     async def async_get_layout(self, layout_id: str) -> Optional[DeviceConfig]:
         """Get a specific layout by ID."""
@@ -132,19 +644,48 @@ class DashboardStorage:
             await self.async_load()
         return self.get_device(layout_id)
 
-    async def async_list_layouts(self) -> List[Dict[str, Any]]:
-        """List all available layouts with compact info."""
+    async def async_list_layouts(
+        self,
+        search: Optional[str] = None,
+        device_model: Optional[str] = None,
+        sort: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """List layouts with compact info, served from the index summaries.
+
+        search: case-insensitive substring of the layout id or name.
+        device_model: exact device_model match.
+        sort: "id" or a summary field, prefixed with "-" for descending;
+        None keeps storage order. Raises ValueError for unknown fields.
+        """
         if self._state is None:
             await self.async_load()
-        
+
+        descending = bool(sort) and sort.startswith("-")
+        sort_field = sort[1:] if descending else sort
+        if sort_field and sort_field != "id" and sort_field not in _SUMMARY_FIELDS:
+            raise ValueError(f"cannot sort by {sort_field!r}")
+
+        needle = search.casefold() if search else None
         results = []
-        for dev_id, device in self.state.devices.items():
-            results.append({
-                "id": dev_id,
-                "name": device.name,
-                "page_count": len(device.pages),
-                "device_model": device.device_model
-            })
+        for dev_id in list(self.state.devices):
+            summary = self._layout_summary(dev_id)
+            if summary is None:
+                continue
+            if device_model and summary["device_model"] != device_model:
+                continue
+            if needle and needle not in dev_id.casefold() and needle not in str(summary["name"]).casefold():
+                continue
+            results.append({"id": dev_id, **summary})
+
+        if sort_field:
+            def sort_key(item: Dict[str, Any]) -> Tuple[bool, Any]:
+                value = item[sort_field]
+                if isinstance(value, str):
+                    value = value.casefold()
+                # Layouts without a value (e.g. no modified time yet) sort last.
+                return (value is None) != descending, value if value is not None else 0
+
+            results.sort(key=sort_key, reverse=descending)
         return results
 
     async def async_save_layout(self, device: DeviceConfig) -> None:
@@ -153,13 +694,15 @@ class DashboardStorage:
 
     async def async_delete_layout(self, layout_id: str) -> None:
         """Remove a layout from storage."""
-        if self._state is None:
-            await self.async_load()
-        if layout_id in self.state.devices:
-            del self.state.devices[layout_id]
-            if self.state.last_active_layout_id == layout_id:
-                self.state.last_active_layout_id = None
-            await self.async_save()
+        async with self._layout_lock(layout_id):
+            if self._state is None:
+                await self.async_load()
+            if layout_id in self.state.devices:
+                del self.state.devices[layout_id]
+                if self.state.last_active_layout_id == layout_id:
+                    self.state.last_active_layout_id = None
+                self._mark_index_dirty()
+                await self._async_remove_layout_shard(layout_id)
 
     def get_device(self, device_id: str) -> Optional[DeviceConfig]:
         """Get an existing device configuration, or None."""
@@ -167,8 +710,9 @@ class DashboardStorage:
 
     async def async_set_device(self, device: DeviceConfig) -> None:
         """Insert or replace a device configuration."""
-        self.state.devices[device.device_id] = device
-        await self.async_save()
+        async with self._layout_lock(device.device_id):
+            self.state.devices[device.device_id] = device
+            self._mark_layout_dirty(device.device_id)
 
     async def async_update_device(self, device_id: str, updater) -> Optional[DeviceConfig]:
         """
@@ -176,19 +720,20 @@ class DashboardStorage:
 
         updater: Callable[[DeviceConfig], None]
         """
-        device = self.get_device(device_id)
-        if device is None:
-            _LOGGER.warning("%s: Tried to update unknown device_id=%s", DOMAIN, device_id)
-            return None
+        async with self._layout_lock(device_id):
+            device = self.get_device(device_id)
+            if device is None:
+                _LOGGER.warning("%s: Tried to update unknown device_id=%s", DOMAIN, device_id)
+                return None
 
-        try:
-            updater(device)
-        except Exception as exc:  # noqa: BLE001
-            _LOGGER.error("%s: Error while updating device %s: %s", DOMAIN, device_id, exc)
-            return None
+            try:
+                updater(device)
+            except Exception as exc:  # noqa: BLE001
+                _LOGGER.error("%s: Error while updating device %s: %s", DOMAIN, device_id, exc)
+                return None
 
-        await self.async_save()
-        return device
+            self._mark_layout_dirty(device_id)
+            return device
 
     #
     # Token / security helpers
@@ -218,7 +763,12 @@ class DashboardStorage:
     # - widget props schema evolution
     #
 
-    async def async_update_layout(self, device_id: str, raw_layout: Dict[str, Any]) -> Optional[DeviceConfig]:
+    async def async_update_layout(
+        self,
+        device_id: str,
+        raw_layout: Dict[str, Any],
+        if_match: Optional[List[str]] = None,
+    ) -> Optional[DeviceConfig]:
         """
         Replace a device layout from raw layout dict (from editor).
 
@@ -226,12 +776,28 @@ class DashboardStorage:
         - Force device_id/api_token from existing device when missing.
         - Merge with existing data to preserve all fields.
         - Let DeviceConfig.from_dict handle defaults and validation.
+
+        if_match: optional list of ETags; raises LayoutConflictError if the
+        stored layout's current ETag is not among them, or if the layout was
+        deleted while this update waited for it.
         """
+        existed = self._layout_exists(device_id)
+        async with self._layout_lock(device_id):
+            self._check_not_deleted(device_id, existed)
+            return await self._async_update_layout_locked(device_id, raw_layout, if_match)
+
+    async def _async_update_layout_locked(
+        self,
+        device_id: str,
+        raw_layout: Dict[str, Any],
+        if_match: Optional[List[str]],
+    ) -> Optional[DeviceConfig]:
         # Ensure state loaded
         if self._state is None:
             await self.async_load()
 
         existing = self.get_device(device_id)
+        self._check_precondition(device_id, existing, if_match)
         
         # Merge logic
         merged: Dict[str, Any] = {}
@@ -255,30 +821,70 @@ class DashboardStorage:
         device.ensure_pages()
         self.state.devices[device.device_id] = device
         # Track this as the last active layout
-        self.state.last_active_layout_id = device.device_id
-        await self.async_save()
+        self._set_last_active(device.device_id)
+        self._mark_layout_dirty(device.device_id)
         return device
 
+    async def async_patch_layout(
+        self,
+        device_id: str,
+        ops: List[Dict[str, Any]],
+        if_match: Optional[List[str]] = None,
+    ) -> Optional[DeviceConfig]:
+        """
+        Apply a partial update (see layout_patch) to a layout in place.
+
+        Returns None if the layout does not exist; raises LayoutPatchError if
+        the patch is invalid, in which case the layout is left unchanged, and
+        LayoutConflictError if if_match does not cover the current ETag.
+        Only the patched layout is marked dirty.
+        """
+        async with self._layout_lock(device_id):
+            if self._state is None:
+                await self.async_load()
+
+            device = self.get_device(device_id)
+            if device is None:
+                return None
+            self._check_precondition(device_id, device, if_match)
+
+            apply_layout_patch(device, ops)
+            self._set_last_active(device_id)
+            self._mark_layout_dirty(device_id)
+            return device
+
     async def async_set_last_active_layout(self, layout_id: str) -> None:
         """Set the last active layout ID."""
         if self._state is None:
             await self.async_load()
-        self.state.last_active_layout_id = layout_id
-        await self.async_save()
+        self._set_last_active(layout_id)
         _LOGGER.debug("%s: Set last active layout to: %s", DOMAIN, layout_id)
 
-    async def async_update_layout_default(self, raw_layout: Dict[str, Any]) -> DeviceConfig:
+    async def async_update_layout_default(
+        self,
+        raw_layout: Dict[str, Any],
+        if_match: Optional[List[str]] = None,
+    ) -> DeviceConfig:
         """
         Update the default device layout from raw layout dict (from editor).
 
         This is the primary entrypoint for the editor's POST /layout.
         Uses DeviceConfig.from_dict after merging with existing data to ensure
         all fields (rendering_mode, hardware configs, etc.) are preserved.
+        if_match is checked against the layout that will be replaced.
         """
-        # Ensure state loaded
-        if self._state is None:
-            await self.async_load()
-
+        target_id = (raw_layout or {}).get("device_id") or "reterminal_e1001"
+        existed = self._layout_exists(target_id)
+        async with self._layout_lock(target_id):
+            self._check_not_deleted(target_id, existed)
+            # Ensure state loaded
+            if self._state is None:
+                await self.async_load()
+
+            self._check_precondition(target_id, self.get_device(target_id), if_match)
+            return self._update_layout_default_locked(raw_layout)
+
+    def _update_layout_default_locked(self, raw_layout: Dict[str, Any]) -> DeviceConfig:
         # Existing default device (if any)
         existing = self.get_device("reterminal_e1001")
         
@@ -314,8 +920,8 @@ class DashboardStorage:
         device.ensure_pages()
         self.state.devices[device.device_id] = device
         # Track this as the last active layout
-        self.state.last_active_layout_id = device.device_id
-        await self.async_save()
+        self._set_last_active(device.device_id)
+        self._mark_layout_dirty(device.device_id)
         return device
 
     async def async_update_layout_from_device(self, device: DeviceConfig) -> DeviceConfig:
@@ -332,13 +938,14 @@ class DashboardStorage:
         if not device.device_id:
             device.device_id = "reterminal_e1001"
 
-        existing = self.get_device(device.device_id)
-        if existing and not device.api_token:
-            device.api_token = existing.api_token
-
-        device.ensure_pages()
-        self.state.devices[device.device_id] = device
-        # Track this as the last active layout
-        self.state.last_active_layout_id = device.device_id
-        await self.async_save()
-        return device
\ No newline at end of file
+        async with self._layout_lock(device.device_id):
+            existing = self.get_device(device.device_id)
+            if existing and not device.api_token:
+                device.api_token = existing.api_token
+
+            device.ensure_pages()
+            self.state.devices[device.device_id] = device
+            # Track this as the last active layout
+            self._set_last_active(device.device_id)
+            self._mark_layout_dirty(device.device_id)
+            return device
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Text measurement and layout cache for the server-side renderer.
+
+Widgets measure the same strings in the same fonts on every render (labels,
+clock strings, units), and centering or aligning text needs its bounding
+box before drawing it. TextLayoutCache memoizes, keyed by (font, text):
+
+- bbox(): the ink bounding box as ImageDraw.textbbox() reports it for an
+  "L" image (multi-line text included),
+- length(): the advance width (FreeTypeFont.getlength()),
+- ellipsize() / wrap(): single-line truncation with an ellipsis and greedy
+  word wrapping to a pixel width, so long sensor and list values are laid
+  out once rather than re-measured word by word on every render.
+
+Fonts come from fonts.FONT_CACHE, so the same face is the same object
+across renders and can key the cache; a key holds a reference to its font,
+so a font evicted from FONT_CACHE cannot be confused with a new one.
+
+Renders run in executor threads, so the cache is locked. Pillow is only
+imported on the first measurement: the stats view imports this module at
+setup.
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .const import TEXT_LAYOUT_CACHE_SIZE
+
+ELLIPSIS = "…"
+
+Box = Tuple[int, int, int, int]
+
+
+@functools.lru_cache(maxsize=1)
+def _measure_draw():
+    """Draw used for measuring; measurements depend only on the font and the
+    image mode ("L" renders)."""
+    from PIL import Image, ImageDraw
+
+    return ImageDraw.Draw(Image.new("L", (1, 1)))
+
+
+class TextLayoutCache:
+    """Bounded LRU of text measurements and line layouts."""
+
+    def __init__(self, max_entries: int = TEXT_LAYOUT_CACHE_SIZE) -> None:
+        self._max_entries = max(1, max_entries)
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _get(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def _put(self, key: Hashable, value: Any) -> Any:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def bbox(self, font, text: str) -> Box:
+        """(left, top, right, bottom) of text drawn at (0, 0)."""
+        key = ("bbox", font, text)
+        box = self._get(key)
+        if box is None:
+            box = self._put(key, tuple(int(v) for v in _measure_draw().textbbox((0, 0), text, font=font)))
+        return box
+
+    def size(self, font, text: str) -> Tuple[int, int]:
+        """Ink width and height of text."""
+        left, top, right, bottom = self.bbox(font, text)
+        return right - left, bottom - top
+
+    def length(self, font, text: str) -> float:
+        """Advance width of a single line of text."""
+        key = ("length", font, text)
+        width = self._get(key)
+        if width is None:
+            width = self._put(key, float(_measure_draw().textlength(text, font=font)))
+        return width
+
+    def ellipsize(self, font, text: str, max_width: float) -> str:
+        """text, or its longest prefix plus an ellipsis that fits max_width."""
+        key = ("ellipsize", font, text, int(max_width))
+        line = self._get(key)
+        if line is None:
+            line = self._put(key, self._ellipsize(font, text, max_width))
+        return line
+
+    def wrap(self, font, text: str, max_width: float, max_lines: Optional[int] = None) -> Tuple[str, ...]:
+        """Word-wrap text (newlines kept) into lines no wider than max_width.
+
+        Words wider than a line are broken between characters. With
+        max_lines, the text is cut there and the last line ellipsized.
+        """
+        key = ("wrap", font, text, int(max_width), max_lines)
+        lines = self._get(key)
+        if lines is None:
+            lines = self._put(key, self._wrap(font, text, max_width, max_lines))
+        return lines
+
+    def _ellipsize(self, font, text: str, max_width: float) -> str:
+        if self.length(font, text) <= max_width:
+            return text
+        # Binary search for the longest prefix that fits with the ellipsis.
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.length(font, text[:mid].rstrip() + ELLIPSIS) <= max_width:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low].rstrip() + ELLIPSIS
+
+    def _break_word(self, font, word: str, max_width: float) -> List[str]:
+        pieces = []
+        while word:
+            end = len(word)
+            while end > 1 and self.length(font, word[:end]) > max_width:
+                end -= 1
+            pieces.append(word[:end])
+            word = word[end:]
+        return pieces
+
+    def _wrap(self, font, text: str, max_width: float, max_lines: Optional[int]) -> Tuple[str, ...]:
+        lines: List[str] = []
+        for paragraph in str(text).split("\n"):
+            line = ""
+            for word in paragraph.split():
+                candidate = f"{line} {word}" if line else word
+                if self.length(font, candidate) <= max_width:
+                    line = candidate
+                    continue
+                if line:
+                    lines.append(line)
+                pieces = self._break_word(font, word, max_width)
+                lines.extend(pieces[:-1])
+                line = pieces[-1]
+            lines.append(line)
+
+        if max_lines is not None and len(lines) > max_lines:
+            lines = lines[:max(0, max_lines)]
+            if lines:
+                lines[-1] = self._ellipsize(font, lines[-1] + ELLIPSIS, max_width)
+        return tuple(lines)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+# Shared by every render.
+TEXT_LAYOUT_CACHE = TextLayoutCache()
@@ -0,0 +1,191 @@
+"""
+First-page thumbnails for the layouts list.
+
+The layouts list only carries summaries (name, device model, page count,
+revision); previewing a layout used to mean loading the whole document into
+the editor canvas. LayoutThumbnails renders the first page of a layout with
+the server-side renderer, scaled down to one of THUMBNAIL_WIDTHS, as PNG or
+WebP, and keeps it on disk under <config>/esphome_designer/thumbnails.
+
+Files are named after the layout and its revision. DashboardStorage bumps
+the revision on every edit and never hands one out twice, so a cached file
+is valid for as long as its revision is current: the name doubles as the
+ETag and no invalidation is needed. Writing a new thumbnail removes the
+files of older revisions of the layout; async_prune() removes those of
+deleted layouts.
+
+Thumbnails show entity states as they were when first rendered. Renders go
+through the render pool (render_pool.py) and skip the static layer cache,
+so previews do not evict the layers of live device pages.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import re
+from typing import Any, Collection, Dict, NamedTuple, Optional
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, THUMBNAIL_DIR, THUMBNAIL_WEBP_QUALITY
+from .models import DeviceConfig, PageConfig
+from .render_cache import page_entity_ids
+from .render_pool import RenderPool, StateSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bump when the renderer output changes enough to invalidate stored thumbnails.
+_VERSION = 1
+
+_SAFE_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_CONTENT_TYPES = {"png": "image/png", "webp": "image/webp"}
+
+
+class Thumbnail(NamedTuple):
+    data: bytes
+    content_type: str
+    # Strong ETag (quoted), the file name.
+    etag: str
+
+
+def _layout_slug(layout_id: str) -> str:
+    if _SAFE_NAME_RE.match(layout_id):
+        return layout_id
+    return "h_" + hashlib.sha1(layout_id.encode("utf-8")).hexdigest()[:16]
+
+
+def render_thumbnail(hass: Any, device: DeviceConfig, page: PageConfig, width: int, fmt: str) -> bytes:
+    """Render a page and scale it to width pixels, encoded as fmt ("png"/"webp")."""
+    from PIL import Image
+
+    from .renderer import render_page_image
+
+    image = render_page_image(hass, device, page, use_layer_cache=False)
+    height = max(1, round(image.height * width / image.width))
+    image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    if fmt == "webp":
+        image.save(output, format="WEBP", quality=THUMBNAIL_WEBP_QUALITY)
+    else:
+        image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+class LayoutThumbnails:
+    """Disk cache of layout thumbnails, rendered on demand."""
+
+    def __init__(self, hass: HomeAssistant, pool: RenderPool) -> None:
+        self._hass = hass
+        self._pool = pool
+        self._directory = hass.config.path(DOMAIN, THUMBNAIL_DIR)
+        self._hits = 0
+        self._renders = 0
+        self._pruned = 0
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def _file_name(self, device: DeviceConfig, width: int, fmt: str) -> str:
+        return f"{_layout_slug(device.device_id)}.{device.revision}.{width}.v{_VERSION}.{fmt}"
+
+    def etag(self, device: DeviceConfig, width: int, fmt: str = "png") -> str:
+        """ETag of the current thumbnail, known without reading or rendering it."""
+        return f'"{self._file_name(device, width, fmt)}"'
+
+    async def async_get(self, device: DeviceConfig, width: int, fmt: str = "png") -> Optional[Thumbnail]:
+        """Return the thumbnail of a layout's first page, rendering it if needed.
+
+        Returns None for a layout without pages. Raises
+        render_pool.RenderQueueFull if the render pool is full.
+        """
+        if not device.pages:
+            return None
+        name = self._file_name(device, width, fmt)
+        path = os.path.join(self._directory, name)
+
+        data = await self._hass.async_add_executor_job(_read_file, path)
+        if data is not None:
+            self._hits += 1
+            return Thumbnail(data, _CONTENT_TYPES[fmt], f'"{name}"')
+
+        page = PageConfig.from_dict(device.pages[0].to_dict())
+        source: Any = self._hass
+        if self._pool.uses_processes:
+            source = StateSnapshot.capture(self._hass, page_entity_ids(page))
+        data = await self._pool.async_run(
+            ("thumbnail", name),
+            render_thumbnail,
+            source,
+            device,
+            page,
+            width,
+            fmt,
+            label=f"{device.device_id} thumbnail",
+        )
+        self._renders += 1
+        await self._hass.async_add_executor_job(
+            _write_file, self._directory, name, data, f"{_layout_slug(device.device_id)}."
+        )
+        return Thumbnail(data, _CONTENT_TYPES[fmt], f'"{name}"')
+
+    async def async_prune(self, layout_ids: Collection[str]) -> None:
+        """Delete the thumbnails of layouts not in layout_ids."""
+        keep = {_layout_slug(layout_id) for layout_id in layout_ids}
+        self._pruned += await self._hass.async_add_executor_job(_prune_files, self._directory, keep)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self._hits,
+            "renders": self._renders,
+            "pruned": self._pruned,
+        }
+
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_file(directory: str, name: str, data: bytes, prefix: str) -> None:
+    """Write a thumbnail atomically and remove the layout's other thumbnails
+    of older revisions."""
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{name}.tmp")
+    with open(temp_path, "wb") as file:
+        file.write(data)
+    os.replace(temp_path, os.path.join(directory, name))
+
+    revision = name[len(prefix):].split(".", 1)[0]
+    for other in os.listdir(directory):
+        if other.startswith(prefix) and other[len(prefix):].split(".", 1)[0] != revision:
+            try:
+                os.remove(os.path.join(directory, other))
+            except OSError as exc:
+                _LOGGER.debug("Could not remove thumbnail %s: %s", other, exc)
+
+
+def _prune_files(directory: str, keep: Collection[str]) -> int:
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for name in names:
+        if name.split(".", 1)[0] in keep:
+            continue
+        try:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+        except OSError as exc:
+            _LOGGER.debug("Could not remove thumbnail %s: %s", name, exc)
+    return removed
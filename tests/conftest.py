@@ -0,0 +1,36 @@
+"""Shared fixtures for the integration's tests.
+
+Tests run against a real, not started, HomeAssistant instance whose config
+directory is the test's tmp_path. Async test bodies are coroutines taking
+hass, run with the ``run`` fixture.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+
+@pytest.fixture
+def run(tmp_path):
+    """run(test) awaits test(hass) on a fresh HomeAssistant and returns its result."""
+
+    def _run(test):
+        async def main():
+            hass = HomeAssistant(str(tmp_path))
+            hass.config.config_dir = str(tmp_path)
+            try:
+                return await test(hass)
+            finally:
+                await hass.async_stop(force=True)
+
+        return asyncio.run(main())
+
+    return _run
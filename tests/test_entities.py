@@ -0,0 +1,36 @@
+"""Tests for the entities endpoint."""
+
+from __future__ import annotations
+
+from aiohttp.test_utils import make_mocked_request
+
+from custom_components.esphome_designer.api import entities
+from custom_components.esphome_designer.api.entities import ReTerminalEntitiesView
+
+
+def test_cap_applies_to_every_response(run, monkeypatch):
+    monkeypatch.setattr(entities, "ENTITIES_MAX_RESULTS", 3)
+
+    async def test(hass):
+        for index in range(5):
+            hass.states.async_set(f"sensor.s{index}", str(index))
+        view = ReTerminalEntitiesView(hass)
+        # The response payload, before encoding.
+        view.json = lambda data, *args, **kwargs: data
+
+        async def get(query: str):
+            return await view.get(make_mocked_request("GET", f"/entities?{query}"))
+
+        # The bare list is capped too; more takes limit / cursor paging.
+        assert [entity["entity_id"] for entity in await get("domains=sensor")] == [
+            "sensor.s0",
+            "sensor.s1",
+            "sensor.s2",
+        ]
+        page = await get("domains=sensor&limit=10")
+        assert len(page["entities"]) == 3
+        page = await get(f"domains=sensor&cursor={page['next_cursor']}")
+        assert [entity["entity_id"] for entity in page["entities"]] == ["sensor.s3", "sensor.s4"]
+        assert page["next_cursor"] is None
+
+    run(test)
@@ -0,0 +1,121 @@
+"""Tests for the packed framebuffer format."""
+
+from __future__ import annotations
+
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from custom_components.esphome_designer.framebuffer import (
+    COMPRESSION_NONE,
+    COMPRESSION_RLE,
+    HEADER_SIZE,
+    decode_framebuffer,
+    encode_framebuffer,
+    pack_image,
+    packbits_decode,
+    packbits_encode,
+    stride,
+)
+from custom_components.esphome_designer.models import DeviceConfig, PageConfig, WidgetConfig
+from custom_components.esphome_designer.render_cache import PageRenderCache
+from custom_components.esphome_designer.render_pool import RenderPool
+
+# Not a multiple of 8, so every row is padded at 1, 2 and 4 bpp.
+WIDTH, HEIGHT = 13, 5
+
+
+def _gray_image(bpp: int) -> tuple:
+    """(image, levels): an L image using every gray level of bpp, left to right."""
+    top = (1 << bpp) - 1
+    levels = [[(x + y) % (top + 1) for x in range(WIDTH)] for y in range(HEIGHT)]
+    image = Image.new("L", (WIDTH, HEIGHT))
+    image.putdata([level * 255 // top for row in levels for level in row])
+    return image, levels
+
+
+def test_header_layout():
+    image, _levels = _gray_image(2)
+    data = encode_framebuffer(image, 2, COMPRESSION_RLE)
+    raw = pack_image(image, 2)
+
+    assert HEADER_SIZE == 24
+    assert data[0:4] == b"EDFB"
+    assert data[4:8] == bytes([1, 2, 0x01, 0])
+    assert struct.unpack_from("<HH", data, 8) == (WIDTH, HEIGHT)
+    raw_size, payload_size, crc = struct.unpack_from("<III", data, 12)
+    assert raw_size == len(raw) == stride(WIDTH, 2) * HEIGHT
+    assert payload_size == len(data) - HEADER_SIZE
+    assert crc == zlib.crc32(raw)
+
+
+@pytest.mark.parametrize("bpp", [1, 2, 4])
+@pytest.mark.parametrize("compression", [COMPRESSION_NONE, COMPRESSION_RLE])
+def test_round_trip(bpp, compression):
+    image, levels = _gray_image(bpp)
+    header, raw = decode_framebuffer(encode_framebuffer(image, bpp, compression))
+
+    assert (header.bpp, header.width, header.height) == (bpp, WIDTH, HEIGHT)
+    assert header.compressed == (compression == COMPRESSION_RLE)
+    unpacked = Image.frombytes("P", (WIDTH, HEIGHT), raw, "raw", f"P;{bpp}")
+    assert list(unpacked.tobytes()) == [level for row in levels for level in row]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"a",
+        b"ab",
+        b"aaa",
+        bytes(range(200)),
+        b"\x00" * 127,
+        b"\x00" * 128,
+        b"\x00" * 129,
+        b"\x00" * 130,
+        b"\x00" * 131,
+        b"\x00" * 256,
+        b"ab" + b"\xff" * 300 + bytes(range(130)) + b"cc",
+    ],
+)
+def test_packbits_round_trip(data):
+    assert packbits_decode(packbits_encode(data)) == data
+
+
+def test_packbits_run_boundary():
+    # One repeat packet holds at most 128 bytes; shorter tails are literals.
+    assert packbits_encode(b"\x00" * 128) == bytes([129, 0])
+    assert packbits_encode(b"\x00" * 129) == bytes([129, 0, 0, 0])
+    assert packbits_encode(b"\x00" * 131) == bytes([129, 0, 254, 0])
+    # Literal packets hold at most 128 bytes too.
+    assert packbits_encode(bytes(range(129)))[0] == 127
+    assert packbits_encode(bytes(range(129)))[129] == 0
+
+
+@pytest.mark.parametrize("compression", [COMPRESSION_NONE, COMPRESSION_RLE])
+def test_crc_mismatch_is_detected(compression):
+    image, _levels = _gray_image(4)
+    data = bytearray(encode_framebuffer(image, 4, compression))
+    # Corrupt the stored CRC, so the payload still decodes to the right size.
+    data[20] ^= 0xFF
+    with pytest.raises(ValueError, match="CRC"):
+        decode_framebuffer(bytes(data))
+
+
+def test_framebuffer_render_carries_its_frame(run):
+    widget = WidgetConfig(id="box", type="shape_rect", x=10, y=10, width=100, height=50, props={"fill": True})
+    device = DeviceConfig(device_id="hall_frame", api_token="", pages=[PageConfig(id="p0", name="Page", widgets=[widget])])
+    device.ensure_pages()
+
+    async def test(hass):
+        cache = PageRenderCache(hass, pool=RenderPool(hass, workers=1))
+        return await cache.async_get_rendered(device, 0, (2, COMPRESSION_RLE))
+
+    rendered = run(test)
+    # The frame recorded by the render job is what the framebuffer decodes to.
+    header, raw = decode_framebuffer(rendered.data)
+    frame = rendered.frame
+    assert (frame.bpp, frame.width, frame.height, frame.crc32) == (2, header.width, header.height, header.crc32)
+    assert frame.raw == raw
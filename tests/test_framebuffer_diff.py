@@ -0,0 +1,56 @@
+"""Tests for the dirty-rectangle diff."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.esphome_designer.framebuffer_diff import DeliveredFrame, FrameHistory, dirty_rects
+
+ROW_BYTES = 100
+HEIGHT = 480
+
+
+def _changed(points) -> bytes:
+    new = bytearray(ROW_BYTES * HEIGHT)
+    for x, y in points:
+        new[y * ROW_BYTES + x] = 1
+    return bytes(new)
+
+
+def _covered(rects, x: int, y: int) -> bool:
+    return any(rx <= x < rx + w and ry <= y < ry + h for rx, ry, w, h in rects)
+
+
+@pytest.mark.parametrize("spacing", [(24, 48), (8, 24)])
+def test_rects_cover_changes_within_limit(spacing):
+    points = [(x, y) for y in range(0, HEIGHT, spacing[1]) for x in range(0, ROW_BYTES, spacing[0])]
+    rects = dirty_rects(bytes(ROW_BYTES * HEIGHT), _changed(points), ROW_BYTES, HEIGHT, 8)
+
+    assert 0 < len(rects) <= 8
+    assert all(_covered(rects, x, y) for x, y in points)
+
+
+def test_changes_everywhere_fall_back_to_bounding_box():
+    # A checkerboard of changed tiles: far too many runs to merge pairwise.
+    points = [(tx * 4, ty * 8) for ty in range(HEIGHT // 8) for tx in range(ROW_BYTES // 4) if (tx + ty) % 2 == 0]
+    rects = dirty_rects(bytes(ROW_BYTES * HEIGHT), _changed(points), ROW_BYTES, HEIGHT, 64)
+
+    assert rects == [(0, 0, ROW_BYTES - 3, HEIGHT - 7)]
+
+
+def test_unchanged_frame_has_no_rects():
+    frame = _changed([(5, 5)])
+    assert dirty_rects(frame, frame, ROW_BYTES, HEIGHT, 8) == []
+
+
+def test_history_keeps_recent_frames_by_crc():
+    history = FrameHistory(depth=2)
+    frames = [DeliveredFrame(1, 8, 1, bytes([i]), crc32=i) for i in range(3)]
+    for frame in frames:
+        history.add("hall", frame)
+
+    # The oldest frame is dropped; the others stay usable as bases.
+    assert history.find("hall", 0) is None
+    assert history.find("hall", 1) is frames[1]
+    assert history.find("hall", 2) is frames[2]
+    assert history.find("office", 2) is None
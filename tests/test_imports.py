@@ -0,0 +1,30 @@
+"""Pillow is imported lazily: setting up the integration must not load it."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _loads_pil(module: str) -> bool:
+    code = f"import sys; import {module}; print('PIL' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=_ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.strip() == "True"
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "custom_components.esphome_designer",
+        "custom_components.esphome_designer.http_api",
+        "custom_components.esphome_designer.dither",
+        "custom_components.esphome_designer.text_layout",
+    ],
+)
+def test_module_does_not_import_pil(module):
+    assert not _loads_pil(module)
@@ -0,0 +1,103 @@
+"""Tests for the layout endpoints' ETag and conflict handling."""
+
+from __future__ import annotations
+
+from http import HTTPStatus
+
+from aiohttp.test_utils import make_mocked_request
+
+from custom_components.esphome_designer.api import layout
+from custom_components.esphome_designer.api.layout import ReTerminalLayoutDetailView
+from custom_components.esphome_designer.storage import DashboardStorage
+
+
+async def _setup(hass) -> tuple:
+    storage = DashboardStorage(hass, save_delay=0)
+    await storage.async_load()
+    await storage.async_update_layout("hall", {"name": "Hall"})
+    return storage, ReTerminalLayoutDetailView(hass, storage)
+
+
+def _request(method: str, **headers: str):
+    return make_mocked_request(method, "/layouts/hall", headers=headers)
+
+
+def test_if_none_match_returns_not_modified(run):
+    async def test(hass):
+        storage, view = await _setup(hass)
+        etag = storage.get_device("hall").etag
+        gzip_etag = f'{etag[:-1]}-gzip"'
+
+        response = await view.get(_request("GET", **{"If-None-Match": etag}), "hall")
+        assert response.status == HTTPStatus.NOT_MODIFIED
+        assert response.headers["ETag"] == etag
+
+        # The gzip representation has its own ETag, and either one matches.
+        response = await view.get(_request("GET", **{"Accept-Encoding": "gzip"}), "hall")
+        assert response.status == HTTPStatus.OK
+        assert response.headers["ETag"] == gzip_etag
+        response = await view.get(
+            _request("GET", **{"If-None-Match": gzip_etag, "Accept-Encoding": "gzip"}), "hall"
+        )
+        assert response.status == HTTPStatus.NOT_MODIFIED
+        assert response.headers["ETag"] == gzip_etag
+
+        await storage.async_update_layout("hall", {"name": "Hallway"})
+        response = await view.get(_request("GET", **{"If-None-Match": etag}), "hall")
+        assert response.status == HTTPStatus.OK
+        assert response.headers["ETag"] == storage.get_device("hall").etag
+
+    run(test)
+
+
+def test_stale_if_match_is_rejected(run, monkeypatch):
+    async def test(hass):
+        storage, view = await _setup(hass)
+        stale = storage.get_device("hall").etag
+        await storage.async_update_layout("hall", {"name": "Hallway"})
+        current = storage.get_device("hall")
+
+        async def body(_request):
+            return {"name": "Lost update"}
+
+        monkeypatch.setattr(layout, "_parse_json_body", body)
+        # Keep the JSON payloads, before encoding.
+        payloads = []
+        json_response = view.json
+        view.json = lambda data, *args, **kwargs: payloads.append(data) or json_response(data, *args, **kwargs)
+
+        response = await view.post(_request("POST", **{"If-Match": stale}), "hall")
+        assert response.status == HTTPStatus.CONFLICT
+        assert response.headers["ETag"] == current.etag
+        assert payloads == [{"error": "conflict", "revision": current.revision, "etag": current.etag}]
+        assert storage.get_device("hall").name == "Hallway"
+
+        # The gzip variant of the current ETag is accepted.
+        response = await view.post(_request("POST", **{"If-Match": f'{current.etag[:-1]}-gzip"'}), "hall")
+        assert response.status == HTTPStatus.OK
+        assert storage.get_device("hall").name == "Lost update"
+
+    run(test)
+
+
+def test_revision_floor_survives_reload(run):
+    async def test(hass):
+        storage, _view = await _setup(hass)
+        await storage.async_flush()
+        saved = storage.get_device("hall").etag
+
+        # This write is never flushed, as if Home Assistant crashed.
+        storage.save_delay = 3600
+        await storage.async_update_layout("hall", {"name": "Unsaved"})
+        unsaved = storage.get_device("hall").revision
+        await hass.async_block_till_done()
+
+        reloaded = DashboardStorage(hass, save_delay=0)
+        await reloaded.async_load()
+        assert reloaded.get_device("hall").etag == saved
+
+        # A new revision never reuses one handed out before the crash.
+        await reloaded.async_update_layout("hall", {"name": "Hallway"})
+        assert reloaded.get_device("hall").revision > unsaved
+
+    run(test)
@@ -0,0 +1,105 @@
+"""Tests for partial layout updates."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.esphome_designer.layout_patch import (
+    LayoutPatchDuplicateId,
+    LayoutPatchError,
+    apply_layout_patch,
+)
+from custom_components.esphome_designer.models import DeviceConfig
+
+
+def _device() -> DeviceConfig:
+    device = DeviceConfig.from_dict({"device_id": "hall", "name": "Hall", "pages": [{"id": "p0", "widgets": []}]})
+    device.ensure_pages()
+    return device
+
+
+@pytest.mark.parametrize(
+    ("path", "value"),
+    [
+        ("/daily_refresh_time", 5),
+        ("/name", {"a": 1}),
+        ("/name", ["a"]),
+        ("/name", None),
+        ("/pages/0/name", 3),
+        ("/glyphsets", "GF_Latin_Kernel"),
+        ("/glyphsets", ["GF_Latin_Kernel", 1]),
+        ("/custom_hardware", []),
+    ],
+)
+def test_rejects_wrongly_typed_values(path, value):
+    device = _device()
+    before = device.to_dict()
+    with pytest.raises(LayoutPatchError):
+        apply_layout_patch(device, [{"op": "replace", "path": path, "value": value}])
+    assert device.to_dict() == before
+
+
+def test_accepts_typed_values():
+    device = _device()
+    apply_layout_patch(
+        device,
+        [
+            {"op": "replace", "path": "/daily_refresh_time", "value": "07:30"},
+            {"op": "replace", "path": "/glyphsets", "value": ["GF_Latin_Core"]},
+            {"op": "replace", "path": "/no_refresh_start_hour", "value": None},
+            {"op": "replace", "path": "/pages/0/refresh_s", "value": "60"},
+        ],
+    )
+    assert device.daily_refresh_time == "07:30"
+    assert device.glyphsets == ["GF_Latin_Core"]
+    assert device.pages[0].refresh_s == 60
+
+
+@pytest.mark.parametrize(
+    "op",
+    [
+        {"op": "replace", "path": "/pages/0/widgets/1/id", "value": "a"},
+        {"op": "add", "path": "/pages/0/widgets/-", "value": {"id": "a", "type": "label"}},
+        {"op": "replace", "path": "/pages/0/widgets/1", "value": {"id": "a", "type": "label"}},
+        {"op": "update_widget", "page": 0, "id": "b", "changes": {"id": "a"}},
+        {"op": "add_widget", "page": 0, "widget": {"id": "b", "type": "label"}},
+        {
+            "op": "replace",
+            "path": "/pages/0/widgets",
+            "value": [{"id": "c", "type": "label"}, {"id": "c", "type": "icon"}],
+        },
+        {
+            "op": "replace",
+            "path": "/pages",
+            "value": [{"id": "p0", "widgets": [{"id": "c", "type": "label"}, {"id": "c", "type": "icon"}]}],
+        },
+        {
+            "op": "add",
+            "path": "/pages/-",
+            "value": {"id": "p1", "widgets": [{"id": "c", "type": "label"}, {"id": "c", "type": "icon"}]},
+        },
+    ],
+)
+def test_rejects_duplicate_widget_ids(op):
+    device = _device()
+    apply_layout_patch(
+        device,
+        [
+            {"op": "add_widget", "page": 0, "widget": {"id": "a", "type": "label"}},
+            {"op": "add_widget", "page": 0, "widget": {"id": "b", "type": "label"}},
+        ],
+    )
+    before = device.to_dict()
+    with pytest.raises(LayoutPatchDuplicateId):
+        apply_layout_patch(device, [op])
+    assert device.to_dict() == before
+
+    # Keeping a widget's own id, or replacing it in place, is fine.
+    apply_layout_patch(
+        device,
+        [
+            {"op": "replace", "path": "/pages/0/widgets/0/id", "value": "a"},
+            {"op": "replace", "path": "/pages/0/widgets/1", "value": {"id": "b", "type": "icon"}},
+        ],
+    )
+    assert [w.type for w in device.pages[0].widgets] == ["label", "icon"]
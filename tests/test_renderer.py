@@ -0,0 +1,62 @@
+"""Tests for the server-side renderer."""
+
+from __future__ import annotations
+
+import io
+
+import pytest
+from PIL import Image
+
+from custom_components.esphome_designer.dither import PALETTES
+from custom_components.esphome_designer.models import DeviceConfig, PageConfig, WidgetConfig
+from custom_components.esphome_designer.renderer import render_page_image, render_page_to_png
+
+
+def _page(color: str) -> tuple:
+    widget = WidgetConfig(
+        id="box", type="shape_rect", x=100, y=100, width=200, height=100, props={"fill": True, "color": color}
+    )
+    page = PageConfig(id="p0", name="Page", widgets=[widget])
+    # Static layers are cached per device and revision: one device per color.
+    device = DeviceConfig(device_id=f"hall_{color}", api_token="", pages=[page])
+    device.ensure_pages()
+    return device, page
+
+
+@pytest.mark.parametrize(("palette", "color"), [("bwr", "red"), ("bwry", "yellow"), ("acep7", "blue")])
+def test_colored_widget_dithers_to_its_ink(run, palette, color):
+    device, page = _page(color)
+
+    async def test(hass):
+        return render_page_to_png(hass, device, page, palette)
+
+    image = Image.open(io.BytesIO(run(test)))
+    ink = PALETTES[palette].index({"red": (255, 0, 0), "yellow": (255, 255, 0), "blue": (0, 0, 255)}[color])
+    assert image.mode == "P"
+    assert image.getpixel((200, 150)) == ink
+    assert image.getpixel((10, 10)) == PALETTES[palette].index((255, 255, 255))
+
+
+def test_gray_palette_keeps_gray_render(run):
+    device, page = _page("red")
+
+    async def test(hass):
+        return render_page_to_png(hass, device, page, "gray16")
+
+    image = Image.open(io.BytesIO(run(test)))
+    # Red is drawn as its luma (76) and lands on the nearest gray level.
+    assert image.getpixel((200, 150)) == round(76 / 17)
+
+
+def test_qr_code_is_rendered():
+    widget = WidgetConfig(id="qr", type="qr_code", x=100, y=100, width=100, height=100, props={"value": "hello"})
+    page = PageConfig(id="p0", name="Page", widgets=[widget])
+    device = DeviceConfig(device_id="hall_qr", api_token="", pages=[page])
+    device.ensure_pages()
+
+    image = render_page_image(None, device, page, use_layer_cache=False)
+    # Version 1 code: 21 modules of 4 px, centered at 108. Top-left finder
+    # pattern: dark outer ring, light ring, dark 3x3 center.
+    assert image.getpixel((109, 109)) == 0
+    assert image.getpixel((113, 113)) == 255
+    assert image.getpixel((121, 121)) == 0
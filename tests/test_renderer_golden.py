@@ -0,0 +1,28 @@
+"""Visual regression: rendered pages against benchmarks/bench_renderer_golden.json.
+
+Text rendering depends on the Pillow/FreeType (and qrcode) versions, so the
+comparison only runs in the environment the hashes were recorded in;
+re-record with ``python -m benchmarks.bench_renderer --update-golden``.
+"""
+
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from benchmarks.bench_renderer import environment, golden_page_hash, load_golden
+
+_GOLDEN = load_golden()
+_NAME_RE = re.compile(r"^mixed_(\d+)_(light|dark)$")
+
+pytestmark = pytest.mark.skipif(
+    _GOLDEN.get("environment") != environment(),
+    reason=f"golden hashes were recorded with {_GOLDEN.get('environment')}, not {environment()}",
+)
+
+
+@pytest.mark.parametrize("name", sorted(_GOLDEN.get("pages", {})))
+def test_page_matches_golden(name):
+    widget_count, mode = _NAME_RE.match(name).groups()
+    assert golden_page_hash(int(widget_count), mode == "dark") == _GOLDEN["pages"][name]
@@ -0,0 +1,53 @@
+"""Tests for the pre-render scheduler's wake prediction."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.esphome_designer.models import DeviceConfig
+from custom_components.esphome_designer.scheduler import expected_next_wake
+
+
+@pytest.fixture
+def berlin():
+    previous = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Berlin"))
+    yield
+    dt_util.set_default_time_zone(previous)
+
+
+def _device(start, end, interval=600) -> DeviceConfig:
+    return DeviceConfig(
+        device_id="hall",
+        api_token="",
+        refresh_interval=interval,
+        no_refresh_start_hour=start,
+        no_refresh_end_hour=end,
+    )
+
+
+def _local(*args) -> datetime:
+    return datetime(*args, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+
+def test_window_ending_at_midnight(berlin):
+    wake = expected_next_wake(_device(22, 24), dt_util.as_utc(_local(2024, 6, 1, 22, 30)))
+    assert dt_util.as_local(wake) == _local(2024, 6, 2, 0, 0)
+
+
+@pytest.mark.parametrize("end", [25, -1, "6", True])
+def test_invalid_window_is_ignored(berlin, end):
+    last_fetch = dt_util.as_utc(_local(2024, 6, 1, 22, 30))
+    wake = expected_next_wake(_device(22, end), last_fetch)
+    assert dt_util.as_local(wake) == _local(2024, 6, 1, 22, 40)
+
+
+def test_window_across_dst_change(berlin):
+    # Clocks go forward at 02:00 on 2024-03-31; the window still ends at 06:00 local.
+    last_fetch = dt_util.as_utc(_local(2024, 3, 30, 22, 30))
+    wake = dt_util.as_local(expected_next_wake(_device(22, 6, interval=3600), last_fetch))
+    assert (wake.date(), wake.hour) == (_local(2024, 3, 31).date(), 6)
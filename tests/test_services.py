@@ -0,0 +1,64 @@
+"""Tests for the integration's services."""
+
+from __future__ import annotations
+
+from homeassistant.core import HassJobType
+
+from custom_components.esphome_designer.const import (
+    DOMAIN,
+    SERVICE_NEXT_PAGE,
+    SERVICE_PREV_PAGE,
+    SERVICE_RENDER_ALL,
+    SERVICE_SET_PAGE,
+)
+from custom_components.esphome_designer.render_cache import PageRenderCache
+from custom_components.esphome_designer.render_pool import RenderPool
+from custom_components.esphome_designer.services import async_register_services, async_unregister_services
+from custom_components.esphome_designer.storage import DashboardStorage
+
+_LAYOUT = {"name": "Hall", "pages": [{"id": "p0"}, {"id": "p1"}, {"id": "p2"}]}
+
+
+async def _setup(hass) -> DashboardStorage:
+    storage = DashboardStorage(hass, save_delay=0)
+    await storage.async_load()
+    await storage.async_update_layout("hall", dict(_LAYOUT))
+    hass.data[DOMAIN] = {"storage": storage}
+    async_register_services(hass, storage)
+    return storage
+
+
+def test_page_services(run):
+    async def test(hass):
+        storage = await _setup(hass)
+        try:
+            # Sync handlers run in the executor, where scheduling a task on the loop is not allowed.
+            services = hass.services.async_services()[DOMAIN]
+            for service in (SERVICE_SET_PAGE, SERVICE_NEXT_PAGE, SERVICE_PREV_PAGE, SERVICE_RENDER_ALL):
+                assert services[service].job.job_type is HassJobType.Coroutinefunction
+
+            await hass.services.async_call(DOMAIN, SERVICE_SET_PAGE, {"device_id": "hall", "page": 2}, blocking=True)
+            assert storage.get_device("hall").current_page == 2
+
+            await hass.services.async_call(DOMAIN, SERVICE_PREV_PAGE, {"device_id": "hall"}, blocking=True)
+            assert storage.get_device("hall").current_page == 1
+
+            await hass.services.async_call(DOMAIN, SERVICE_NEXT_PAGE, {"device_id": "hall"}, blocking=True)
+            assert storage.get_device("hall").current_page == 2
+        finally:
+            async_unregister_services(hass)
+
+    run(test)
+
+
+def test_render_all(run):
+    async def test(hass):
+        await _setup(hass)
+        render_cache = hass.data[DOMAIN]["render_cache"] = PageRenderCache(hass, pool=RenderPool(hass, workers=1))
+        try:
+            await hass.services.async_call(DOMAIN, SERVICE_RENDER_ALL, {"device_id": "hall"}, blocking=True)
+            assert render_cache.stats["entries"] == len(_LAYOUT["pages"])
+        finally:
+            async_unregister_services(hass)
+
+    run(test)
@@ -0,0 +1,161 @@
+"""Tests for the sharded layout storage."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+
+import pytest
+from homeassistant.helpers.storage import Store
+
+from custom_components.esphome_designer.const import LEGACY_STORAGE_KEY, STORAGE_KEY
+from custom_components.esphome_designer.storage import DashboardStorage, LayoutConflictError
+
+# The pre-sharding single-file format (DashboardState.to_dict()).
+_SINGLE_FILE_STATE = {
+    "devices": {
+        "kitchen": {"device_id": "kitchen", "name": "Kitchen", "pages": [{"id": "p0", "widgets": []}]},
+        "office": {"device_id": "office", "name": "Office", "pages": [{"id": "p0"}, {"id": "p1"}]},
+    },
+    "last_active_layout_id": "office",
+}
+
+
+async def _reload(hass) -> DashboardStorage:
+    # Let delayed writes already in flight reach the disk first.
+    await hass.async_block_till_done()
+    storage = DashboardStorage(hass, save_delay=0)
+    await storage.async_load()
+    return storage
+
+
+@pytest.mark.parametrize("key", [STORAGE_KEY, LEGACY_STORAGE_KEY])
+def test_single_file_store_is_migrated(run, tmp_path, key):
+    async def test(hass):
+        await Store(hass, 1, key).async_save(_SINGLE_FILE_STATE)
+
+        storage = await _reload(hass)
+        assert list(storage.state.devices) == ["kitchen", "office"]
+        assert storage.get_device("office").name == "Office"
+        assert storage.state.last_active_layout_id == "office"
+
+        # The next start loads the shards; the old file is kept as a backup.
+        reloaded = await _reload(hass)
+        assert reloaded.state.devices.hydrated_count == 0
+        assert [layout["name"] for layout in await reloaded.async_list_layouts()] == ["Kitchen", "Office"]
+        assert len(reloaded.get_device("office").pages) == 2
+        assert reloaded.state.last_active_layout_id == "office"
+        assert (tmp_path / ".storage" / key).exists()
+        assert (tmp_path / ".storage" / f"{STORAGE_KEY}.layout.kitchen").exists()
+
+    run(test)
+
+
+def test_layouts_are_hydrated_on_first_access(run):
+    async def test(hass):
+        storage = await _reload(hass)
+        await storage.async_update_layout("kitchen", {"name": "Kitchen"})
+        await storage.async_update_layout("office", {"name": "Office"})
+        await storage.async_flush()
+
+        storage = await _reload(hass)
+        assert storage.state.devices.hydrated_count == 0
+        # Listing is served from the index summaries.
+        layouts = await storage.async_list_layouts(sort="name")
+        assert [(layout["id"], layout["page_count"]) for layout in layouts] == [("kitchen", 1), ("office", 1)]
+        assert storage.state.devices.hydrated_count == 0
+
+        assert storage.get_device("office").name == "Office"
+        assert storage.state.devices.hydrated_count == 1
+        assert not storage.state.devices.is_hydrated("kitchen")
+
+    run(test)
+
+
+def test_active_layout_survives_reload(run):
+    async def test(hass):
+        storage = await _reload(hass)
+        await storage.async_update_layout("kitchen", {"name": "Kitchen"})
+        await storage.async_update_layout("office", {"name": "Office"})
+        await storage.async_flush()
+        assert (await _reload(hass)).state.last_active_layout_id == "office"
+
+        # Editing an existing layout makes it active without changing its summary.
+        await storage.async_update_layout("kitchen", {"name": "Kitchen"})
+        await storage.async_flush()
+        assert (await _reload(hass)).state.last_active_layout_id == "kitchen"
+
+        await storage.async_patch_layout("office", [{"op": "replace", "path": "/name", "value": "Office"}])
+        await storage.async_flush()
+        assert (await _reload(hass)).state.last_active_layout_id == "office"
+
+    run(test)
+
+
+def test_unparsable_layout_is_deleted_on_discard(run, tmp_path):
+    async def test(hass):
+        storage = await _reload(hass)
+        await storage.async_update_layout("office", {"name": "Office"})
+        await storage.async_update_layout("kitchen", {"name": "Kitchen"})
+        await storage.async_flush()
+        await hass.async_block_till_done()
+
+        # Corrupt the kitchen shard so that it fails to parse when hydrated.
+        (shard,) = (tmp_path / ".storage").glob("*.kitchen")
+        shard.write_text(shard.read_text().replace('"pages":[', '"pages":"broken","old_pages":['))
+
+        storage = await _reload(hass)
+        assert storage.state.devices.get("kitchen") is None
+        await storage.async_flush()
+
+        reloaded = await _reload(hass)
+        assert list(reloaded.state.devices) == ["office"]
+        assert reloaded.state.last_active_layout_id is None
+        assert not shard.exists()
+
+    run(test)
+
+
+def test_update_queued_behind_delete_does_not_recreate(run):
+    async def test(hass):
+        storage = await _reload(hass)
+        await storage.async_update_layout("office", {"name": "Office"})
+
+        # Queue a delete and then an update on the layout's lock.
+        lock = storage._layout_lock("office")
+        async with lock:
+            delete = asyncio.ensure_future(storage.async_delete_layout("office"))
+            await asyncio.sleep(0)
+            update = asyncio.ensure_future(storage.async_update_layout("office", {"name": "Renamed"}))
+            await asyncio.sleep(0)
+
+        await delete
+        with pytest.raises(LayoutConflictError):
+            await update
+        assert storage.get_device("office") is None
+        assert storage._layout_lock("office") is lock
+
+    run(test)
+
+
+def test_serialized_layout_is_cached_per_revision(run):
+    async def test(hass):
+        storage = await _reload(hass)
+        await storage.async_update_layout("hall", {"name": "Hall"})
+        device = storage.get_device("hall")
+
+        encoded = storage.layout_json(device)
+        compressed = storage.layout_json_gzip(device)
+        hits = storage.stats["serialization_cache_hits"]
+        assert storage.layout_json(device) is encoded
+        assert storage.layout_json_gzip(device) is compressed
+        assert storage.stats["serialization_cache_hits"] == hits + 2
+
+        # A write bumps the revision and drops both cached encodings.
+        await storage.async_patch_layout("hall", [{"op": "replace", "path": "/name", "value": "Hallway"}])
+        assert storage.layout_json(device) is not encoded
+        assert b'"Hallway"' in storage.layout_json(device)
+        assert storage.layout_json_gzip(device) is not compressed
+        assert gzip.decompress(storage.layout_json_gzip(device)) == storage.layout_json(device)
+
+    run(test)